@@ -1,3 +1,4 @@
 """Initialize."""
 
 from .client import Client  # noqa
+from .options import ClientOptions  # noqa
@@ -0,0 +1,301 @@
+"""Define columnar (NumPy-backed) tables of watering history for analytics.
+
+This module requires NumPy, which is only installed with the "analytics" extra.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError as err:  # pragma: no cover
+    raise ImportError(
+        "regenmaschine.analytics requires NumPy "
+        "(pip install 'regenmaschine[analytics]')"
+    ) from err
+
+# The cycle fields that hold the volume of water used (in order of preference); only
+# controllers with a flow meter report one:
+CYCLE_VOLUME_FIELDS = ("realVolume", "volume")
+
+
+@dataclass(frozen=True)
+class RuntimeComparison:
+    """Define a comparison of scheduled and actual runtime (in seconds)."""
+
+    scheduled: float
+    actual: float
+
+    @property
+    def ratio(self) -> float:
+        """Return the actual runtime as a fraction of the scheduled runtime.
+
+        Returns:
+            The ratio (or NaN if nothing was scheduled).
+        """
+        return self.actual / self.scheduled if self.scheduled else math.nan
+
+
+def _sum_by(keys: Any, values: Any) -> dict[Any, float]:
+    """Sum values by key (treating missing values as 0).
+
+    Args:
+        keys: An array of keys.
+        values: An array of values (the same length as keys).
+
+    Returns:
+        A dictionary of key to sum (ordered by key).
+    """
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(
+        inverse.ravel(),
+        weights=np.nan_to_num(values.astype(np.float64), nan=0.0),
+        minlength=len(unique),
+    )
+    return dict(zip(unique.tolist(), sums.tolist()))
+
+
+class ColumnarTable:
+    """Define a table whose columns are equal-length NumPy arrays."""
+
+    def __init__(self, columns: Mapping[str, Any]) -> None:
+        """Initialize.
+
+        Args:
+            columns: A dictionary of column name to array.
+
+        Raises:
+            ValueError: Raised when the columns aren't the same length.
+        """
+        self._columns = {name: np.asarray(column) for name, column in columns.items()}
+        if len({len(column) for column in self._columns.values()}) > 1:
+            raise ValueError("Every column must be the same length")
+
+    def __getitem__(self, name: str) -> Any:
+        """Return a column.
+
+        Args:
+            name: The name of the column.
+
+        Returns:
+            The column's array.
+        """
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        """Return the number of rows.
+
+        Returns:
+            The number of rows.
+        """
+        return len(next(iter(self._columns.values()), ()))
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Return the column names.
+
+        Returns:
+            The column names.
+        """
+        return tuple(self._columns)
+
+    def sum_by(self, key: str, value: str) -> dict[Any, float]:
+        """Sum a column for each distinct value of another.
+
+        Args:
+            key: The name of the column to group by.
+            value: The name of the column to sum.
+
+        Returns:
+            A dictionary of key to sum (ordered by key); dates are datetime.date
+            objects.
+        """
+        return _sum_by(self._columns[key], self._columns[value])
+
+
+class WateringLogTable(ColumnarTable):
+    """Define a table of watering cycles (one row per cycle).
+
+    Columns: date (datetime64[D]), program_id, zone_id, cycle_id, flag, start (UNIX
+    timestamp), user_duration (scheduled), machine_duration (adjusted by the
+    controller), real_duration (actual), and volume (NaN if unreported). Durations are
+    in seconds.
+    """
+
+    @classmethod
+    def from_days(cls, days: Iterable[dict[str, Any]]) -> WateringLogTable:
+        """Flatten the days returned by Watering.log() into a table.
+
+        Args:
+            days: The days returned by Watering.log() (or Watering.log_range(), etc.).
+
+        Returns:
+            A WateringLogTable.
+        """
+        rows: dict[str, list[Any]] = {
+            "date": [],
+            "program_id": [],
+            "zone_id": [],
+            "cycle_id": [],
+            "flag": [],
+            "start": [],
+            "user_duration": [],
+            "machine_duration": [],
+            "real_duration": [],
+            "volume": [],
+        }
+
+        for day in days:
+            for program in day.get("programs", []):
+                for zone in program.get("zones", []):
+                    for cycle in zone.get("cycles", []):
+                        rows["date"].append(day["date"])
+                        rows["program_id"].append(program["id"])
+                        rows["zone_id"].append(zone["uid"])
+                        rows["cycle_id"].append(cycle.get("id", 0))
+                        rows["flag"].append(zone.get("flag", 0))
+                        rows["start"].append(cycle.get("startTimestamp", 0))
+                        rows["user_duration"].append(cycle.get("userDuration", 0))
+                        rows["machine_duration"].append(cycle.get("machineDuration", 0))
+                        rows["real_duration"].append(cycle.get("realDuration", 0))
+                        rows["volume"].append(
+                            next(
+                                (
+                                    cycle[field]
+                                    for field in CYCLE_VOLUME_FIELDS
+                                    if field in cycle
+                                ),
+                                math.nan,
+                            )
+                        )
+
+        return cls(
+            {
+                "date": np.array(rows["date"], dtype="datetime64[D]"),
+                **{
+                    name: np.array(rows[name], dtype=np.int64)
+                    for name in ("program_id", "zone_id", "cycle_id", "flag", "start")
+                },
+                **{
+                    name: np.array(rows[name], dtype=np.float64)
+                    for name in (
+                        "user_duration",
+                        "machine_duration",
+                        "real_duration",
+                        "volume",
+                    )
+                },
+            }
+        )
+
+    def get_runtime_comparison(
+        self, key: str = "zone_id"
+    ) -> dict[Any, RuntimeComparison]:
+        """Compare scheduled and actual runtime for each distinct value of a column.
+
+        Args:
+            key: The name of the column to group by (e.g., zone_id or date).
+
+        Returns:
+            A dictionary of key to RuntimeComparison.
+        """
+        scheduled = self.sum_by(key, "user_duration")
+        actual = self.sum_by(key, "real_duration")
+        return {
+            group: RuntimeComparison(scheduled[group], actual[group])
+            for group in scheduled
+        }
+
+    def total_by_day(self, value: str = "real_duration") -> dict[Any, float]:
+        """Total a column per day.
+
+        Args:
+            value: The name of the column to total.
+
+        Returns:
+            A dictionary of datetime.date to total.
+        """
+        return self.sum_by("date", value)
+
+    def total_by_program(self, value: str = "real_duration") -> dict[Any, float]:
+        """Total a column per program.
+
+        Args:
+            value: The name of the column to total.
+
+        Returns:
+            A dictionary of program ID to total.
+        """
+        return self.sum_by("program_id", value)
+
+    def total_by_zone(self, value: str = "real_duration") -> dict[Any, float]:
+        """Total a column per zone.
+
+        Args:
+            value: The name of the column to total.
+
+        Returns:
+            A dictionary of zone ID to total.
+        """
+        return self.sum_by("zone_id", value)
+
+
+class RunsTable(ColumnarTable):
+    """Define a table of past program runs (one row per program per day).
+
+    Columns: date (datetime64[D]), program_id, used, et0, and qpf.
+    """
+
+    @classmethod
+    def from_runs(cls, runs: Iterable[dict[str, Any]]) -> RunsTable:
+        """Flatten the runs returned by Watering.runs() into a table.
+
+        Args:
+            runs: The runs returned by Watering.runs().
+
+        Returns:
+            A RunsTable.
+        """
+        runs = list(runs)
+        return cls(
+            {
+                "date": np.array(
+                    [run["dateTime"][:10] for run in runs], dtype="datetime64[D]"
+                ),
+                "program_id": np.array([run["pid"] for run in runs], dtype=np.int64),
+                "used": np.array([run.get("used", False) for run in runs], dtype=bool),
+                "et0": np.array(
+                    [run.get("et0", math.nan) for run in runs], dtype=np.float64
+                ),
+                "qpf": np.array(
+                    [run.get("qpf", math.nan) for run in runs], dtype=np.float64
+                ),
+            }
+        )
+
+    def total_by_day(self, value: str = "et0") -> dict[Any, float]:
+        """Total a column per day.
+
+        Args:
+            value: The name of the column to total.
+
+        Returns:
+            A dictionary of datetime.date to total.
+        """
+        return self.sum_by("date", value)
+
+    def total_by_program(self, value: str = "used") -> dict[Any, float]:
+        """Total a column per program.
+
+        Args:
+            value: The name of the column to total (by default, the number of days
+                each program ran).
+
+        Returns:
+            A dictionary of program ID to total.
+        """
+        return self.sum_by("program_id", value)
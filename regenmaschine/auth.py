@@ -0,0 +1,107 @@
+"""Define objects to manage controller access tokens."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+DEFAULT_REFRESH_MARGIN = 60
+
+
+class Credentials:  # pylint: disable=too-few-public-methods
+    """Define credentials kept in memory to re-authenticate with a controller."""
+
+    __slots__ = ("email", "password")
+
+    def __init__(self, password: str, email: str | None = None) -> None:
+        """Initialize.
+
+        Args:
+            password: The controller (or account) password.
+            email: An optional RainMachine account email address.
+        """
+        self.email = email
+        self.password = password
+
+    def __repr__(self) -> str:
+        """Return a representation that doesn't leak the credentials.
+
+        Returns:
+            A redacted representation.
+        """
+        return f"{type(self).__name__}(<redacted>)"
+
+    def __reduce__(self) -> str | tuple[object, ...]:
+        """Refuse to be pickled (so credentials never end up on disk by accident).
+
+        Raises:
+            TypeError: Always.
+        """
+        raise TypeError(f"{type(self).__name__} objects can't be pickled")
+
+
+class TokenManager:
+    """Define an object to keep a controller's access token fresh."""
+
+    def __init__(
+        self,
+        authenticate: Callable[[], Awaitable[None]],
+        *,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            authenticate: A coroutine function that logs in again.
+            refresh_margin: How many seconds before expiration a token is refreshed.
+        """
+        self._authenticate = authenticate
+        self._expires_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._refresh_margin = refresh_margin
+        self.generation = 0
+
+    @property
+    def needs_refresh(self) -> bool:
+        """Return whether the token is expired (or about to be).
+
+        Returns:
+            Whether the token should be refreshed.
+        """
+        if self._expires_at is None:
+            return False
+        return time.monotonic() >= self._expires_at - self._refresh_margin
+
+    def set_expiration(self, expires_in: float | None) -> None:
+        """Set when the current token expires.
+
+        Args:
+            expires_in: The number of seconds until the token expires (or None if the
+                API doesn't say).
+        """
+        if expires_in is None:
+            self._expires_at = None
+        else:
+            self._expires_at = time.monotonic() + expires_in
+
+    async def async_ensure_valid(self) -> None:
+        """Refresh the token ahead of its expiration (if needed)."""
+        if self.needs_refresh:
+            await self.async_refresh(self.generation)
+
+    async def async_refresh(self, generation: int) -> None:
+        """Refresh the token.
+
+        Concurrent callers are serialized behind a single lock; a caller that was
+        waiting while another caller refreshed the token (i.e., whose generation is
+        out of date) doesn't refresh it again.
+
+        Args:
+            generation: The token generation the caller last used.
+        """
+        async with self._lock:
+            if generation != self.generation:
+                return
+            await self._authenticate()
+            self.generation += 1
@@ -0,0 +1,165 @@
+"""Define a circuit breaker that stops requests to offline controllers."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from enum import Enum
+from typing import Any, TypeVar
+
+from .const import LOGGER
+from .errors import (
+    CircuitOpenError,
+    ConnectionFailedError,
+    RequestError,
+    RequestTimeoutError,
+)
+
+_T = TypeVar("_T")
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# Only failures to reach the controller at all count against it:
+TRIPPING_ERRORS = (ConnectionFailedError, RequestTimeoutError)
+
+
+class BreakerState(str, Enum):
+    """Define the states of a circuit breaker."""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+StateChangeCallback = Callable[[BreakerState, BreakerState], None]
+
+
+class CircuitBreaker:  # pylint: disable=too-few-public-methods
+    """Define a circuit breaker for a single controller.
+
+    The breaker opens after a number of consecutive connection (or timeout) failures;
+    while it's open, requests fail fast with a CircuitOpenError instead of waiting out
+    the request timeout. Once the reset timeout has passed, the next request sends a
+    single probe to the controller (half-open); if the probe succeeds, the breaker
+    closes and the request proceeds, otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable[Any]],
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        on_state_change: StateChangeCallback | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            probe: A coroutine function that makes a cheap request to the controller
+                (bypassing the breaker).
+            failure_threshold: The number of consecutive failures that open the
+                breaker.
+            reset_timeout: The number of seconds the breaker stays open before a
+                probe is sent.
+            on_state_change: An optional callback that is called with the old and new
+                state whenever the state changes.
+        """
+        self._failure_threshold = failure_threshold
+        self._failures = 0
+        self._on_state_change = on_state_change
+        self._opened_at = 0.0
+        self._probe = probe
+        self._probe_lock = asyncio.Lock()
+        self._reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+
+    def _open(self) -> None:
+        """Open the breaker."""
+        self._opened_at = time.monotonic()
+        self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState) -> None:
+        """Set the breaker's state (and notify the callback).
+
+        Args:
+            state: The new state.
+        """
+        old_state = self.state
+        LOGGER.debug("Circuit breaker state changed: %s -> %s", old_state, state)
+        self.state = state
+
+        if self._on_state_change is None:
+            return
+        try:
+            self._on_state_change(old_state, state)
+        except Exception as err:  # noqa: BLE001  # pylint: disable=broad-except
+            LOGGER.exception("Error in circuit breaker callback: %s", err)
+
+    async def _async_probe(self) -> None:
+        """Send a single probe to see whether the controller is back.
+
+        Raises:
+            CircuitOpenError: Raised when the controller still can't be reached (or
+                another probe is already in flight).
+        """
+        if self._probe_lock.locked():
+            raise CircuitOpenError("The controller is being probed")
+
+        async with self._probe_lock:
+            self._set_state(BreakerState.HALF_OPEN)
+            try:
+                await self._probe()
+            except TRIPPING_ERRORS as err:
+                self._open()
+                raise CircuitOpenError(f"The controller is offline: {err}") from err
+            except RequestError:
+                # The controller answered (albeit with an error), so it's reachable:
+                pass
+
+            self._failures = 0
+            self._set_state(BreakerState.CLOSED)
+
+    async def async_call(self, func: Callable[[], Awaitable[_T]]) -> _T:
+        """Call a coroutine function that makes a request through the breaker.
+
+        Args:
+            func: A coroutine function that makes the request.
+
+        Returns:
+            The result of the coroutine function.
+
+        Raises:
+            CircuitOpenError: Raised when the breaker is open.
+            ConnectionFailedError: Raised (and counted as a failure) when the
+                controller can't be reached.
+            RequestError: Raised when the controller returns an error (which means
+                it's reachable).
+            RequestTimeoutError: Raised (and counted as a failure) when the request
+                times out.
+        """
+        if self.state is not BreakerState.CLOSED:
+            remaining = self._opened_at + self._reset_timeout - time.monotonic()
+            if self.state is BreakerState.OPEN and remaining > 0:
+                raise CircuitOpenError(
+                    f"The controller is offline (retrying in {remaining:.1f} seconds)"
+                )
+            await self._async_probe()
+
+        try:
+            result = await func()
+        except TRIPPING_ERRORS:
+            self._failures += 1
+            if (
+                self.state is BreakerState.CLOSED
+                and self._failures >= self._failure_threshold
+            ):
+                self._open()
+            raise
+        except RequestError:
+            self._failures = 0
+            raise
+
+        self._failures = 0
+        return result
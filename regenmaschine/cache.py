@@ -0,0 +1,210 @@
+"""Define a response cache for controller API endpoints."""
+
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+# How long (in seconds) GET responses from an endpoint may be served from cache; an
+# endpoint that doesn't match any of these patterns is never cached:
+DEFAULT_TTLS: dict[str, float] = {
+    "apiVer": 3600,
+    "provision(/name|/wifi)?": 3600,
+    "restrictions/global": 3600,
+    "parser": 300,
+    "program(/[0-9]+)?": 30,
+    "program/nextrun": 30,
+    "zone(/[0-9]+)?(/properties)?": 30,
+    "restrictions/(currently|hourly|raindelay)": 30,
+    "watering/(program|queue|zone)": 2,
+}
+
+# Which cached endpoints a successful POST makes stale; "{id}" is replaced with the ID
+# captured from the POST endpoint. A POST that matches none of these clears the cache:
+DEFAULT_INVALIDATIONS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    (
+        "zone/(?P<id>[0-9]+)/properties",
+        ("zone", "zone/properties", "zone/{id}", "zone/{id}/properties"),
+    ),
+    (
+        "zone/(?P<id>[0-9]+)/(start|stop)",
+        ("zone", "zone/{id}", "watering/program", "watering/queue", "watering/zone"),
+    ),
+    (
+        "program/(?P<id>[0-9]+)",
+        ("program", "program/{id}", "program/nextrun"),
+    ),
+    (
+        "program/(?P<id>[0-9]+)/(start|stop)",
+        (
+            "program",
+            "program/{id}",
+            "zone",
+            "watering/program",
+            "watering/queue",
+            "watering/zone",
+        ),
+    ),
+    (
+        "watering/(pauseall|stopall)",
+        ("program", "zone", "watering/program", "watering/queue", "watering/zone"),
+    ),
+    (
+        "restrictions/global",
+        ("restrictions/global", "restrictions/currently", "restrictions/hourly"),
+    ),
+    ("watering/flowmeter", ("watering/flowmeter",)),
+    ("parser/data", ("parser",)),
+)
+
+CacheKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def _generate_key(endpoint: str, params: Mapping[str, Any] | None) -> CacheKey:
+    """Generate a cache key for an endpoint and its query parameters.
+
+    Args:
+        endpoint: An API URL endpoint.
+        params: Optional query parameters.
+
+    Returns:
+        A hashable cache key.
+    """
+    if not params:
+        return (endpoint, ())
+    return (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+class ResponseCache:
+    """Define a per-controller cache of GET responses."""
+
+    def __init__(
+        self,
+        ttls: Mapping[str, float] | None = None,
+        invalidations: Iterable[tuple[str, Iterable[str]]] | None = None,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            ttls: An optional mapping of endpoint patterns to TTLs (in seconds).
+            invalidations: Optional pairs of POST endpoint patterns and the cached
+                endpoints they make stale.
+        """
+        if ttls is None:
+            ttls = DEFAULT_TTLS
+        if invalidations is None:
+            invalidations = DEFAULT_INVALIDATIONS
+
+        self._entries: dict[CacheKey, tuple[float, Any]] = {}
+        # Invalidation counters (overall and per endpoint), so that a response fetched
+        # before an invalidation isn't cached after it:
+        self._generation = 0
+        self._generations: dict[str, int] = {}
+        self._invalidations = [
+            (re.compile(pattern), tuple(targets)) for pattern, targets in invalidations
+        ]
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls.items()]
+        self.hits = 0
+        self.misses = 0
+
+    def _get_ttl(self, endpoint: str) -> float | None:
+        """Get the TTL for an endpoint.
+
+        Args:
+            endpoint: An API URL endpoint.
+
+        Returns:
+            The TTL (in seconds), or None if the endpoint shouldn't be cached.
+        """
+        for pattern, ttl in self._ttls:
+            if pattern.fullmatch(endpoint):
+                return ttl
+        return None
+
+    def clear(self) -> None:
+        """Clear the cache."""
+        self._entries.clear()
+        self._generation += 1
+        self._generations.clear()
+
+    def generation(self, endpoint: str) -> tuple[int, int]:
+        """Get the invalidation generation of an endpoint.
+
+        Capture this before fetching a response and pass it to set(); the response
+        won't be cached if the endpoint has been invalidated in the meantime.
+
+        Args:
+            endpoint: An API URL endpoint.
+
+        Returns:
+            An opaque generation.
+        """
+        return (self._generation, self._generations.get(endpoint, 0))
+
+    def get(self, endpoint: str, params: Mapping[str, Any] | None = None) -> Any:
+        """Get a cached response payload.
+
+        Args:
+            endpoint: An API URL endpoint.
+            params: Optional query parameters.
+
+        Returns:
+            The cached payload, or None if there isn't a fresh one.
+        """
+        key = _generate_key(endpoint, params)
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+
+        expires_at, data = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def invalidate(self, endpoint: str) -> None:
+        """Evict the cached responses made stale by a POST to an endpoint.
+
+        Args:
+            endpoint: The API URL endpoint that was POSTed to.
+        """
+        for pattern, targets in self._invalidations:
+            if match := pattern.fullmatch(endpoint):
+                stale = {target.format(**match.groupdict()) for target in targets}
+                for key in [key for key in self._entries if key[0] in stale]:
+                    self._entries.pop(key)
+                for target in stale:
+                    self._generations[target] = self._generations.get(target, 0) + 1
+                return
+
+        # We don't know what this POST changes, so err on the side of caution:
+        self.clear()
+
+    def set(
+        self,
+        endpoint: str,
+        params: Mapping[str, Any] | None,
+        data: Any,
+        *,
+        generation: tuple[int, int] | None = None,
+    ) -> None:
+        """Cache a response payload (if its endpoint is cacheable).
+
+        Args:
+            endpoint: An API URL endpoint.
+            params: Optional query parameters.
+            data: The response payload.
+            generation: The endpoint's generation from before the response was
+                fetched; if the endpoint has since been invalidated, the (possibly
+                stale) payload isn't cached.
+        """
+        if (ttl := self._get_ttl(endpoint)) is None:
+            return
+        if generation is not None and generation != self.generation(endpoint):
+            return
+        self._entries[_generate_key(endpoint, params)] = (time.monotonic() + ttl, data)
@@ -1,22 +1,56 @@
 """Define a client to interact with a RainMachine unit."""
+# pylint: disable=too-many-lines
 
 from __future__ import annotations
 
 import asyncio
-import json
-import ssl
+import time
+from collections.abc import Awaitable, Coroutine, Iterable
 from datetime import datetime
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import ClientResponse, ClientSession, ClientTimeout, TCPConnector
 from aiohttp.client_exceptions import ClientOSError, ServerDisconnectedError
+from typing_extensions import Self
 from yarl import URL
 
-from .const import LOGGER
-from .controller import Controller, LocalController, RemoteController
-from .errors import RequestError, TokenExpiredError, raise_for_error
-
-DEFAULT_LOCAL_PORT = 8080
+from .auth import Credentials
+from .cache import ResponseCache
+from .const import DEFAULT_LOCAL_PORT, LOGGER
+from .controller import (
+    URL_BASE_LOCAL,
+    Controller,
+    LocalController,
+    RemoteController,
+    async_get_sprinklers,
+)
+from .errors import (
+    ConnectionFailedError,
+    RequestError,
+    RequestTimeoutError,
+    TokenExpiredError,
+    raise_for_error,
+)
+from .fleet import LoadReport, LoadResult, LocalTarget, RemoteTarget
+from .hashing import (
+    HashKey,
+    ResponseHashes,
+    async_track_isolated,
+    get_hash_key,
+    record_response,
+    replay_responses,
+)
+from .instrumentation import RequestInstrumentation, RequestTiming
+from .limiter import RequestLimiter, RequestLimits
+from .options import ClientOptions
+from .retry import RetryState
+from .streaming import ItemStream
+from .tls import HandshakeStats, get_ssl_context
+
+_ControllerT = TypeVar("_ControllerT", bound=Controller)
+
+DEFAULT_LOAD_CONCURRENCY = 10
+DEFAULT_LOAD_TIMEOUT = 60
 DEFAULT_TIMEOUT = 30
 
 
@@ -28,34 +62,168 @@ class Client:
         *,
         request_timeout: int = DEFAULT_TIMEOUT,
         session: ClientSession | None = None,
+        options: ClientOptions | None = None,
     ) -> None:
         """Initialize.
 
         Args:
             request_timeout: The number of seconds before a request times out.
             session: An optional aiohttp ClientSession.
+            options: Optional ClientOptions (for the connection pool, caching,
+                retries, limits, etc.).
         """
+        self._account_limiters: dict[str, RequestLimiter] = {}
+        self._background_tasks: set[asyncio.Task[None]] = set()
+        self._in_flight_requests: dict[tuple[Any, ...], asyncio.Task[Any]] = {}
+        self._options = options = options or ClientOptions()
+        self._owned_session: ClientSession | None = None
         self._request_timeout = request_timeout
         self._session = session
 
-        self._ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-
-        # The local API on Gen 1 controllers uses outdated RSA ciphers (and there isn't
-        # any indication that they'll be updated). Python 3.10+ enforces minimum TLS
-        # standards that the Gen 1 can't support, so to keep compatibility, we loosen
-        # things up:
-        #   1. We set a minimum TLS version of SSLv3
-        #   2. We utilize the "DEFAULT" cipher suite (which includes old RSA ciphers).
-        #   3. We don't validate the hostname.
-        #   4. We allow self-signed certificates.
-        #   5. We allow legacy server connections.
-        self._ssl_context.minimum_version = ssl.TLSVersion.SSLv3
-        self._ssl_context.set_ciphers("DEFAULT:@SECLEVEL=0")
-        self._ssl_context.check_hostname = False
-        self._ssl_context.verify_mode = ssl.CERT_NONE
-        self._ssl_context.options |= getattr(ssl, "OP_LEGACY_SERVER_CONNECT", 0x4)
+        self._ssl_context = get_ssl_context()
 
         self.controllers: dict[str, Controller] = {}
+        self.response_hashes = ResponseHashes() if options.hash_responses else None
+        self.instrumentation = RequestInstrumentation()
+        self.metrics = options.metrics
+
+    async def __aenter__(self) -> Self:
+        """Enter the client's async context.
+
+        Returns:
+            This client.
+        """
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Exit the client's async context (closing the connection pool).
+
+        Args:
+            *exc_info: Exception info (if any) that caused the context to exit.
+        """
+        await self.close()
+
+    @property
+    def tls_stats(self) -> dict[str, HandshakeStats]:
+        """Return TLS handshake statistics, keyed by controller host.
+
+        Note that the SSL context (and these statistics) are shared by every Client in
+        the process.
+
+        Returns:
+            A dictionary of HandshakeStats objects.
+        """
+        return dict(self._ssl_context.handshake_stats)
+
+    def _configure_controller(
+        self, controller: _ControllerT, email: str | None = None
+    ) -> _ControllerT:
+        """Attach client-level features to a newly created controller.
+
+        Args:
+            controller: A Controller subclass.
+            email: The email address of the account that owns the controller (if it's
+                remote).
+
+        Returns:
+            The configured controller.
+        """
+        controller.metrics = self.metrics
+        if self._options.cache_responses:
+            controller.cache = ResponseCache(self._options.cache_ttls)
+        if self._options.refresh_tokens:
+            controller.enable_token_refresh()
+        if self._options.circuit_breakers:
+            controller.enable_circuit_breaker(
+                on_state_change=self._options.on_circuit_breaker_state_change
+            )
+
+        account_limiter = None
+        if (
+            email
+            and self._options.account_limits
+            and (account_limiter := self._account_limiters.get(email)) is None
+        ):
+            account_limiter = self._account_limiters[email] = RequestLimiter(
+                self._options.account_limits
+            )
+        if self._options.controller_limits or account_limiter:
+            controller.enable_rate_limit(
+                self._options.controller_limits or RequestLimits(),
+                account_limiter=account_limiter,
+                on_queue_wait=self._on_queue_wait,
+            )
+
+        return controller
+
+    def _on_queue_wait(
+        self, controller: Controller, endpoint: str, wait: float
+    ) -> None:
+        """Record how long a request waited for a controller's rate limiter.
+
+        Args:
+            controller: The controller.
+            endpoint: The API endpoint being requested.
+            wait: The number of seconds the request waited.
+        """
+        if self.metrics is not None:
+            self.metrics.observe_queue_wait(controller.mac or None, endpoint, wait)
+
+    def _create_background_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a coroutine in the background (until it finishes or the client closes).
+
+        Args:
+            coro: The coroutine to run.
+        """
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _get_session(self) -> ClientSession:
+        """Get the session to make requests with.
+
+        If the caller provided an open ClientSession, it is used as-is; otherwise, the
+        client lazily creates (and owns) a long-lived session whose connector keeps
+        connections to each controller alive between requests.
+
+        Returns:
+            An aiohttp ClientSession.
+        """
+        if self._session and not self._session.closed:
+            return self._session
+
+        if self._owned_session is None or self._owned_session.closed:
+            self._owned_session = ClientSession(
+                connector=TCPConnector(
+                    limit=self._options.connection_limit,
+                    limit_per_host=self._options.connection_limit_per_host,
+                    keepalive_timeout=self._options.keepalive_timeout,
+                ),
+                timeout=ClientTimeout(total=self._request_timeout),
+                trace_configs=[self.instrumentation.trace_config],
+            )
+
+        return self._owned_session
+
+    async def close(self) -> None:
+        """Close the client-owned connection pool (if one exists).
+
+        A session provided by the caller is left untouched; closing it remains the
+        caller's responsibility.
+
+        Pending background revalidations are cancelled and, if the client has a store,
+        the current state of its controllers (e.g., refreshed access tokens) is saved.
+        """
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+        if self._options.store is not None:
+            await self._async_store_controllers(*self.controllers.values())
+
+        if self._owned_session is not None and not self._owned_session.closed:
+            await self._owned_session.close()
+        self._owned_session = None
 
     async def _request(  # pylint: disable=too-many-arguments
         self,
@@ -65,8 +233,12 @@ class Client:
         access_token: str | None = None,
         access_token_expiration: datetime | None = None,
         use_ssl: bool = True,
+        raw: bool = False,
+        mac: str | None = None,
+        endpoint: str | None = None,
+        stream: ItemStream | None = None,
         **kwargs: dict[str, Any],
-    ) -> dict[str, Any]:
+    ) -> Any:
         """Make an API request.
 
         Args:
@@ -75,14 +247,18 @@ class Client:
             access_token: An optional API access token.
             access_token_expiration: An optional API token expiration datetime.
             use_ssl: Whether to use SSL/TLS on the request.
+            raw: Whether to return the undecoded response body.
+            mac: The MAC address of the controller being requested (if known).
+            endpoint: The API endpoint being requested (if known).
+            stream: An optional ItemStream to hand the response body to (as it
+                arrives) instead of decoding it all at once.
             **kwargs: Additional kwargs to send with the request.
 
         Returns:
-            An API response payload.
+            An API response payload (or, if raw, the response body bytes; or, if
+            streamed, None).
 
         Raises:
-            AssertionError: To handle mypy strangeness.
-            RequestError: Raised upon an underlying HTTP error.
             TokenExpiredError: Raised upon an expired access token
         """
         if access_token_expiration and datetime.now() >= access_token_expiration:
@@ -91,63 +267,203 @@ class Client:
         kwargs.setdefault("headers", {})
         kwargs["headers"]["Content-Type"] = "application/json"
 
-        kwargs.setdefault("params", {})
+        # Copy the query parameters so that adding the access token doesn't change the
+        # caller's dictionary:
+        kwargs["params"] = dict(kwargs.get("params", {}))
         if access_token:
             kwargs["params"]["access_token"] = access_token
 
-        if use_running_session := self._session and not self._session.closed:
-            session = self._session
-        else:
-            session = ClientSession(timeout=ClientTimeout(total=DEFAULT_TIMEOUT))
-
-        try:
-            # Only try 2x for ServerDisconnectedError to comply with the RFC:
-            # https://datatracker.ietf.org/doc/html/rfc2616#section-8.1.4
-            for attempt in range(2):
-                try:
-                    return await self._request_with_session(
-                        session, method, url, use_ssl, **kwargs
+        endpoint = endpoint or url.path
+
+        if (
+            not self._options.coalesce_requests
+            or method.lower() != "get"
+            or "json" in kwargs
+            or "data" in kwargs
+            or stream is not None
+        ):
+            return await self._request_with_retry(
+                method, url, use_ssl, raw, mac, endpoint, stream=stream, **kwargs
+            )
+
+        # Identical GETs that are already in flight share a single round trip to the
+        # controller (and a single response payload):
+        key = (
+            str(url),
+            use_ssl,
+            raw,
+            tuple(sorted((k, str(v)) for k, v in kwargs["params"].items())),
+        )
+        if (task := self._in_flight_requests.get(key)) is None:
+            # The shared task tracks its responses on its own, so that every caller
+            # (not just the first) can see whether they were unchanged:
+            task = asyncio.create_task(
+                async_track_isolated(
+                    self._request_with_retry(
+                        method, url, use_ssl, raw, mac, endpoint, stream=None, **kwargs
                     )
-                except ServerDisconnectedError as err:
-                    # The HTTP/1.1 spec allows the device to close the connection
-                    # at any time. aiohttp raises ServerDisconnectedError to let us
-                    # decide what to do. In this case we want to retry as it likely
-                    # means the connection was stale and the server closed it on us:
-                    if attempt == 0:
-                        continue
-                    raise RequestError(
-                        f"Error requesting data from {url}: {err}"
-                    ) from err
-
-        finally:
-            if not use_running_session:
-                await session.close()
-
-        raise AssertionError  # https://github.com/python/mypy/issues/8964
-
-    async def _request_with_session(
+                )
+            )
+            self._in_flight_requests[key] = task
+            task.add_done_callback(
+                lambda done: self._on_in_flight_request_done(key, done)
+            )
+
+        # Shield the shared task so that one cancelled caller doesn't cancel the
+        # request for everyone else waiting on it:
+        data, tracker = await asyncio.shield(task)
+        replay_responses(tracker)
+        return data
+
+    def _on_in_flight_request_done(
+        self, key: tuple[Any, ...], task: asyncio.Task[Any]
+    ) -> None:
+        """Stop tracking an in-flight request once it is done.
+
+        Args:
+            key: The key that identifies the request.
+            task: The finished request task.
+        """
+        if self._in_flight_requests.get(key) is task:
+            self._in_flight_requests.pop(key)
+        if not task.cancelled():
+            # Retrieve the exception (if any) so that asyncio doesn't complain when
+            # every caller waiting on the task has been cancelled:
+            task.exception()
+
+    async def _request_with_retry(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        method: str,
+        url: URL,
+        use_ssl: bool,
+        raw: bool,
+        mac: str | None,
+        endpoint: str,
+        *,
+        stream: ItemStream | None = None,
+        **kwargs: dict[str, Any],
+    ) -> Any:
+        """Make an API request, retrying it according to the client's retry policy.
+
+        Streamed requests aren't retried once any of their items have been handed
+        out (since the items would be handed out again).
+
+        Args:
+            method: An HTTP method.
+            url: An API URL.
+            use_ssl: Whether to use SSL/TLS on the request.
+            raw: Whether to return the undecoded response body.
+            mac: The MAC address of the controller being requested (if known).
+            endpoint: The API endpoint being requested.
+            stream: An optional ItemStream to hand the response body to.
+            **kwargs: Additional kwargs to send with the request.
+
+        Returns:
+            An API response payload (or, if raw, the response body bytes; or, if
+            streamed, None).
+
+        Raises:
+            RequestError: Raised upon an underlying HTTP error.
+        """
+        retry = RetryState(self._options.retry_policy, method, endpoint)
+
+        while True:
+            timing = None
+            if self.instrumentation.enabled:
+                timing = RequestTiming(
+                    method.upper(), endpoint, mac, attempt=retry.tries
+                )
+            retry.tries += 1
+
+            try:
+                return await self.instrumentation.async_time(
+                    timing,
+                    self._send_with_session(
+                        self._get_session(),
+                        method,
+                        url,
+                        use_ssl,
+                        raw,
+                        timing,
+                        stream=stream,
+                        **kwargs,
+                    ),
+                )
+            except ServerDisconnectedError as err:
+                # The HTTP/1.1 spec allows the device to close the connection
+                # at any time. aiohttp raises ServerDisconnectedError to let us
+                # decide what to do. In this case we want to retry (once, and right
+                # away, to comply with the RFC) as it likely means the connection
+                # was stale and the server closed it on us:
+                # https://datatracker.ietf.org/doc/html/rfc2616#section-8.1.4
+                if not retry.stale_connection_retried and not (stream and stream.items):
+                    retry.stale_connection_retried = True
+                    if self.metrics is not None:
+                        self.metrics.observe_retry(mac, endpoint)
+                    continue
+                last_error: RequestError = ConnectionFailedError(
+                    f"Error requesting data from {url}: {err}"
+                )
+                last_error.__cause__ = err
+            except RequestError as err:
+                last_error = err
+
+            if (stream is not None and stream.items) or (
+                delay := retry.get_retry_delay(last_error)
+            ) is None:
+                raise last_error
+
+            LOGGER.debug(
+                "Retrying %s %s in %.2f seconds: %s", method, url, delay, last_error
+            )
+            if self.metrics is not None:
+                self.metrics.observe_retry(mac, endpoint)
+            await asyncio.sleep(delay)
+
+    async def _send_with_session(  # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
         session: ClientSession,
         method: str,
         url: URL,
         use_ssl: bool,
+        raw: bool,
+        timing: RequestTiming | None,
+        *,
+        stream: ItemStream | None = None,
         **kwargs: dict[str, Any],
-    ) -> dict[str, Any]:
-        """Make a request with a session.
+    ) -> Any:
+        """Send a request with a session and decode its response.
 
         Args:
             session: An aiohttp ClientSession.
             method: An HTTP method.
             url: An API URL.
             use_ssl: Whether to use SSL/TLS on the request.
+            raw: Whether to return the undecoded response body.
+            timing: An optional RequestTiming to fill in (if the request is timed).
+            stream: An optional ItemStream to hand the response body to (as it
+                arrives) instead of decoding it all at once.
             **kwargs: Additional kwargs to send with the request.
 
         Returns:
-            An API response payload.
+            An API response payload (or, if raw, the response body bytes; or, if
+            streamed, None).
 
         Raises:
             RequestError: Raised upon an underlying HTTP error.
         """
+        if timing is not None:
+            kwargs["trace_request_ctx"] = timing  # type: ignore[assignment]
+
+        # (Only decoded responses are hashed.)
+        hash_key = (
+            get_hash_key(url, kwargs.get("params"))
+            if self.response_hashes is not None and method.upper() == "GET"
+            else None
+        )
+        data: Any = None
+        unchanged = False
+
         try:
             async with session.request(
                 method,
@@ -156,30 +472,314 @@ class Client:
                 timeout=self._request_timeout,
                 **kwargs,
             ) as resp:
-                data = await resp.json(content_type=None)
-        except json.decoder.JSONDecodeError as err:
+                if raw:
+                    data = await resp.read()
+                elif stream is not None:
+                    await stream.async_read(resp, self._options.json_decoder)
+                else:
+                    data, unchanged = await self._async_decode(resp, hash_key, timing)
+        except ValueError as err:
             raise RequestError("Unable to parse response as JSON") from err
         except ClientOSError as err:
-            raise RequestError(
+            raise ConnectionFailedError(
                 f"Connection error while requesting data from {url}"
             ) from err
         except asyncio.TimeoutError as err:
-            raise RequestError(f"Timed out while requesting data from {url}") from err
+            raise RequestTimeoutError(
+                f"Timed out while requesting data from {url}"
+            ) from err
+
+        if raw:
+            LOGGER.debug("Data received for %s: %s bytes", url, len(data))
+            # The body isn't decoded, so only the HTTP status can signal an error:
+            raise_for_error(resp, None)
+            return data
+
+        if stream is not None:
+            LOGGER.debug("Data streamed for %s: %s items", url, stream.items)
+            stream.raise_for_error(resp, url)
+            return None
 
         LOGGER.debug("Data received for %s: %s", url, data)
-        raise_for_error(resp, data)
+        try:
+            raise_for_error(resp, data)
+        except RequestError:
+            if hash_key is not None and self.response_hashes is not None:
+                # Don't let an error response pass as "unchanged" next time:
+                self.response_hashes.discard(hash_key)
+            raise
+
+        if hash_key is not None:
+            record_response(unchanged=unchanged)
+        return data
+
+    async def _async_decode(
+        self,
+        resp: ClientResponse,
+        hash_key: HashKey | None,
+        timing: RequestTiming | None,
+    ) -> tuple[Any, bool]:
+        """Decode a JSON response body (unless its hash shows that it's unchanged).
 
-        return cast(dict[str, Any], data)
+        Args:
+            resp: An aiohttp ClientResponse.
+            hash_key: The key to hash the body under (or None to not hash it).
+            timing: An optional RequestTiming to fill in (if the request is timed).
 
-    async def load_local(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        Returns:
+            The decoded object and whether the body was unchanged.
+        """
+        decode_start = time.monotonic()
+        if hash_key is None or self.response_hashes is None:
+            data = await resp.json(content_type=None, loads=self._options.json_decoder)
+            unchanged = False
+        else:
+            data, unchanged = self.response_hashes.decode(
+                hash_key,
+                await resp.read(),
+                self._options.json_decoder,
+                resp.get_encoding(),
+            )
+        if timing is not None:
+            timing.decode = time.monotonic() - decode_start
+        return data, unchanged
+
+    async def _async_store_controllers(
+        self, *controllers: Controller, email: str | None = None
+    ) -> None:
+        """Save the state of controllers to the store.
+
+        Args:
+            *controllers: The controllers to save.
+            email: The email address of the account that owns the controllers (if they
+                are remote).
+        """
+        if TYPE_CHECKING:
+            assert self._options.store is not None
+
+        for controller in controllers:
+            if controller.metadata_deferred:
+                # A partial record would be restored as if it were complete:
+                continue
+            record = controller.to_record()
+            if email:
+                record.email = email
+            elif existing := self._options.store.get(controller.mac):
+                record.email = existing.email
+            self._options.store.set(record)
+
+        try:
+            await self._options.store.async_save()
+        except OSError as err:
+            LOGGER.warning("Unable to save the controller store: %s", err)
+
+    async def _async_restore_local(  # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
         host: str,
         password: str,
-        port: int = DEFAULT_LOCAL_PORT,
-        use_ssl: bool = True,
-        skip_existing: bool = True,
+        port: int,
+        use_ssl: bool,
+        skip_existing: bool,
+    ) -> list[str] | None:
+        """Load a local controller from the store.
+
+        Args:
+            host: The IP address or hostname of the controller.
+            password: The controller password.
+            port: The port that serves the controller's API.
+            use_ssl: Whether to use SSL/TLS on the request.
+            skip_existing: Don't load the controller if it's already loaded.
+
+        Returns:
+            The MAC address of the loaded controller (if it was loaded), or None if the
+            store can't be used.
+        """
+        if TYPE_CHECKING:
+            assert self._options.store is not None
+
+        await self._options.store.async_load()
+        record = self._options.store.find_local(
+            URL_BASE_LOCAL.format("https" if use_ssl else "http", host, port)
+        )
+        if record is None or not record.has_valid_token:
+            return None
+        if skip_existing and record.mac in self.controllers:
+            return []
+
+        controller = self._configure_controller(
+            LocalController(self._request, host, port, use_ssl)
+        )
+        controller.restore(record, Credentials(password))
+        self.controllers[controller.mac] = controller
+        self._create_background_task(self._async_revalidate_local(controller, password))
+        return [controller.mac]
+
+    async def _async_restore_remote(
+        self, email: str, password: str, skip_existing: bool, lazy: bool
+    ) -> list[str] | None:
+        """Load the remote controllers owned by an account from the store.
+
+        Args:
+            email: A RainMachine account email address.
+            password: The account password.
+            skip_existing: Don't load a controller if it's already loaded.
+            lazy: Whether to defer fetching the versions of controllers that were
+                added to the account since the store was saved.
+
+        Returns:
+            The MAC addresses of the loaded controllers, or None if the store can't be
+            used.
+        """
+        if TYPE_CHECKING:
+            assert self._options.store is not None
+
+        await self._options.store.async_load()
+        records = self._options.store.find_remote(email)
+        if not records or not all(record.has_valid_token for record in records):
+            return None
+
+        controllers = []
+        for record in records:
+            if skip_existing and record.mac in self.controllers:
+                continue
+            controller = self._configure_controller(
+                RemoteController(self._request), email=email
+            )
+            controller.restore(record, Credentials(password, email=email))
+            self.controllers[controller.mac] = controller
+            controllers.append(controller)
+
+        if controllers:
+            self._create_background_task(
+                self._async_revalidate_remote(email, password, controllers, lazy)
+            )
+        return [controller.mac for controller in controllers]
+
+    async def _async_revalidate_local(
+        self, controller: LocalController, password: str
     ) -> None:
-        """Create a local client.
+        """Refresh a restored local controller's metadata (logging in if needed).
+
+        Args:
+            controller: The restored controller.
+            password: The controller password.
+        """
+        stored_mac = controller.mac
+
+        try:
+            controller.mac = await controller.async_revalidate(password)
+        except RequestError as err:
+            LOGGER.warning("Unable to revalidate controller %s: %s", stored_mac, err)
+            return
+
+        if controller.mac != stored_mac:
+            # The host now belongs to a different controller:
+            if TYPE_CHECKING:
+                assert self._options.store is not None
+            self._options.store.remove(stored_mac)
+            if self.controllers.get(stored_mac) is controller:
+                self.controllers.pop(stored_mac)
+            self.controllers[controller.mac] = controller
+
+        await self._async_store_controllers(controller)
+
+    async def _async_revalidate_remote(
+        self,
+        email: str,
+        password: str,
+        controllers: list[RemoteController],
+        lazy: bool,
+    ) -> None:
+        """Sync restored remote controllers with their account.
+
+        The account's controllers are fetched again: restored controllers that were
+        removed from the account are dropped, controllers that were added to it (and
+        aren't loaded already) are loaded, and the rest have their metadata refreshed
+        (logging in again if needed).
+
+        Args:
+            email: A RainMachine account email address.
+            password: The account password.
+            controllers: The restored controllers.
+            lazy: Whether to defer fetching the versions of added controllers.
+        """
+        if TYPE_CHECKING:
+            assert self._options.store is not None
+
+        try:
+            access_token, sprinklers = await async_get_sprinklers(
+                self._request, email, password
+            )
+        except RequestError as err:
+            LOGGER.warning("Unable to revalidate the controllers of %s: %s", email, err)
+            return
+
+        macs = {sprinkler["mac"] for sprinkler in sprinklers}
+        for record in self._options.store.find_remote(email):
+            if record.mac not in macs:
+                self._options.store.remove(record.mac)
+        for controller in controllers:
+            if controller.mac not in macs and (
+                self.controllers.get(controller.mac) is controller
+            ):
+                self.controllers.pop(controller.mac)
+
+        # Refresh the controllers that are still on the account, and load the ones
+        # that were added to it:
+        synced = await asyncio.gather(
+            *(
+                self._async_sync_controller(
+                    controller.mac,
+                    controller.async_revalidate(access_token, password, email=email),
+                )
+                for controller in controllers
+                if controller.mac in macs
+            ),
+            *(
+                self._async_sync_controller(
+                    sprinkler["mac"],
+                    self._async_load_sprinkler(
+                        email, password, access_token, sprinkler, lazy
+                    ),
+                )
+                for sprinkler in sprinklers
+                if sprinkler["mac"] not in self.controllers
+            ),
+        )
+        await self._async_store_controllers(
+            *(controller for controller in synced if controller is not None),
+            email=email,
+        )
+
+    async def _async_sync_controller(
+        self, mac: str, sync: Awaitable[Any]
+    ) -> Controller | None:
+        """Revalidate (or load) a controller, logging (rather than raising) errors.
+
+        Args:
+            mac: The MAC address of the controller.
+            sync: The awaitable that revalidates or loads the controller.
+
+        Returns:
+            The controller, or None if it couldn't be synced.
+        """
+        try:
+            await sync
+        except RequestError as err:
+            LOGGER.warning("Unable to revalidate controller %s: %s", mac, err)
+            return None
+        return self.controllers.get(mac)
+
+    async def _async_load_local(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        host: str,
+        password: str,
+        port: int,
+        use_ssl: bool,
+        skip_existing: bool,
+        lazy: bool,
+    ) -> list[str]:
+        """Load a local controller.
 
         Args:
             host: The IP address or hostname of the controller.
@@ -187,62 +787,237 @@ class Client:
             port: The port that serves the controller's API.
             use_ssl: Whether to use SSL/TLS on the request.
             skip_existing: Don't load the controller if it's already loaded.
+            lazy: Whether to defer fetching the controller's name and versions.
+
+        Returns:
+            The MAC address of the loaded controller (if it was loaded).
         """
-        controller = LocalController(self._request, host, port, use_ssl)
+        if (
+            self._options.store is not None
+            and (
+                macs := await self._async_restore_local(
+                    host, password, port, use_ssl, skip_existing
+                )
+            )
+            is not None
+        ):
+            return macs
+
+        controller = self._configure_controller(
+            LocalController(self._request, host, port, use_ssl)
+        )
         await controller.login(password)
 
-        wifi_data = await controller.provisioning.wifi()
-        if skip_existing and wifi_data["macAddress"] in self.controllers:
-            return
+        if lazy or (skip_existing and self.controllers):
+            # Check whether the controller is already loaded before spending any more
+            # requests on it:
+            wifi_data = await controller.provisioning.wifi()
+            if skip_existing and wifi_data["macAddress"] in self.controllers:
+                return []
+            if lazy:
+                controller.metadata_deferred = True
+            else:
+                await controller.async_update_metadata()
+        else:
+            # Nothing can be skipped, so the metadata is fetched alongside the MAC
+            # address:
+            wifi_data, _ = await asyncio.gather(
+                controller.provisioning.wifi(), controller.async_update_metadata()
+            )
 
-        version_data = await controller.api.versions()
-        controller.api_version = version_data["apiVer"]
-        controller.hardware_version = str(version_data["hwVer"])
         controller.mac = wifi_data["macAddress"]
-        controller.software_version = version_data["swVer"]
+        self.controllers[controller.mac] = controller
 
-        name = await controller.provisioning.device_name
-        controller.name = str(name)
+        if self._options.store is not None:
+            await self._async_store_controllers(controller)
 
-        self.controllers[controller.mac] = controller
+        return [controller.mac]
 
-    async def load_remote(
-        self, email: str, password: str, skip_existing: bool = True
-    ) -> None:
-        """Create a remote client.
+    async def _async_load_sprinkler(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        email: str,
+        password: str,
+        access_token: str,
+        sprinkler: dict[str, Any],
+        lazy: bool,
+    ) -> str:
+        """Load a single remote controller.
 
         Args:
             email: A RainMachine account email address.
             password: The account password.
-            skip_existing: Don't load the controller if it's already loaded.
+            access_token: A first-stage access token from the cloud.
+            sprinkler: Sprinkler info from the cloud.
+            lazy: Whether to defer fetching the controller's versions.
+
+        Returns:
+            The MAC address of the controller.
         """
-        auth_resp = await self._request(
-            "post",
-            URL("https://my.rainmachine.com/login/auth"),
-            json={"user": {"email": email, "pwd": password, "remember": 1}},
+        controller = self._configure_controller(
+            RemoteController(self._request), email=email
+        )
+        await controller.login(
+            access_token, sprinkler["sprinklerId"], password, email=email
         )
 
-        access_token: str = auth_resp["access_token"]
+        if lazy:
+            controller.metadata_deferred = True
+        else:
+            await controller.async_update_metadata()
+        controller.mac = sprinkler["mac"]
+        controller.name = str(sprinkler["name"])
+
+        self.controllers[controller.mac] = controller
+        return controller.mac
+
+    async def _async_load_remote(
+        self, email: str, password: str, skip_existing: bool, lazy: bool
+    ) -> list[str]:
+        """Load all remote controllers owned by an account.
+
+        Args:
+            email: A RainMachine account email address.
+            password: The account password.
+            skip_existing: Don't load a controller if it's already loaded.
+            lazy: Whether to defer fetching the controllers' versions.
 
-        sprinklers_resp = await self._request(
-            "post",
-            URL("https://my.rainmachine.com/devices/get-sprinklers"),
-            access_token=access_token,
-            json={"user": {"email": email, "pwd": password, "remember": 1}},
+        Returns:
+            The MAC addresses of the loaded controllers.
+        """
+        if (
+            self._options.store is not None
+            and (
+                macs := await self._async_restore_remote(
+                    email, password, skip_existing, lazy
+                )
+            )
+            is not None
+        ):
+            return macs
+
+        access_token, sprinklers = await async_get_sprinklers(
+            self._request, email, password
+        )
+        macs = list(
+            await asyncio.gather(
+                *(
+                    self._async_load_sprinkler(
+                        email, password, access_token, sprinkler, lazy
+                    )
+                    for sprinkler in sprinklers
+                    if not skip_existing or sprinkler["mac"] not in self.controllers
+                )
+            )
         )
 
-        for sprinkler in sprinklers_resp["sprinklers"]:
-            if skip_existing and sprinkler["mac"] in self.controllers:
-                continue
+        if self._options.store is not None:
+            await self._async_store_controllers(
+                *(self.controllers[mac] for mac in macs), email=email
+            )
 
-            controller: RemoteController = RemoteController(self._request)
-            await controller.login(access_token, sprinkler["sprinklerId"], password)
+        return macs
 
-            version_data = await controller.api.versions()
-            controller.api_version = version_data["apiVer"]
-            controller.hardware_version = str(version_data["hwVer"])
-            controller.mac = sprinkler["mac"]
-            controller.name = str(sprinkler["name"])
-            controller.software_version = version_data["swVer"]
+    async def load_local(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        host: str,
+        password: str,
+        port: int = DEFAULT_LOCAL_PORT,
+        use_ssl: bool = True,
+        skip_existing: bool = True,
+        lazy: bool = False,
+    ) -> None:
+        """Create a local client.
+
+        Args:
+            host: The IP address or hostname of the controller.
+            password: The controller password.
+            port: The port that serves the controller's API.
+            use_ssl: Whether to use SSL/TLS on the request.
+            skip_existing: Don't load the controller if it's already loaded.
+            lazy: Whether to defer fetching the controller's name and versions until
+                controller.async_ensure_metadata() is called (or a method that needs
+                the hardware version is).
+        """
+        await self._async_load_local(host, password, port, use_ssl, skip_existing, lazy)
 
-            self.controllers[sprinkler["mac"]] = controller
+    async def load_many(
+        self,
+        targets: Iterable[LocalTarget | RemoteTarget],
+        *,
+        max_concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+        timeout: float = DEFAULT_LOAD_TIMEOUT,
+        skip_existing: bool = True,
+        lazy: bool = False,
+    ) -> LoadReport:
+        """Load many local controllers and/or remote accounts concurrently.
+
+        A target that fails (or doesn't finish within the timeout) doesn't stop the
+        others from loading; instead, its error is included in the returned report.
+
+        Args:
+            targets: LocalTarget and/or RemoteTarget objects to load.
+            max_concurrency: The maximum number of targets to load at once.
+            timeout: The number of seconds each target has to finish loading.
+            skip_existing: Don't load a controller if it's already loaded.
+            lazy: Whether to defer fetching controller names and versions.
+
+        Returns:
+            A LoadReport with a LoadResult per target (in the order provided).
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def load(target: LocalTarget | RemoteTarget) -> LoadResult:
+            """Load a single target.
+
+            Args:
+                target: A LocalTarget or RemoteTarget.
+
+            Returns:
+                A LoadResult.
+            """
+            async with semaphore:
+                start = time.monotonic()
+                if isinstance(target, LocalTarget):
+                    coro = self._async_load_local(
+                        target.host,
+                        target.password,
+                        target.port,
+                        target.use_ssl,
+                        skip_existing,
+                        lazy,
+                    )
+                else:
+                    coro = self._async_load_remote(
+                        target.email, target.password, skip_existing, lazy
+                    )
+
+                try:
+                    macs = await asyncio.wait_for(coro, timeout)
+                except Exception as err:  # noqa: BLE001  # pylint: disable=broad-except
+                    # One misbehaving controller shouldn't prevent the rest of the
+                    # fleet from loading, so record whatever went wrong:
+                    LOGGER.debug("Unable to load %s: %s", target.label, err)
+                    return LoadResult(target, time.monotonic() - start, error=err)
+
+                return LoadResult(target, time.monotonic() - start, macs=macs)
+
+        return LoadReport(list(await asyncio.gather(*(load(t) for t in targets))))
+
+    async def load_remote(
+        self,
+        email: str,
+        password: str,
+        skip_existing: bool = True,
+        lazy: bool = False,
+    ) -> None:
+        """Create a remote client.
+
+        Args:
+            email: A RainMachine account email address.
+            password: The account password.
+            skip_existing: Don't load the controller if it's already loaded.
+            lazy: Whether to defer fetching the controllers' versions until
+                controller.async_ensure_metadata() is called (or a method that needs
+                the hardware version is).
+        """
+        await self._async_load_remote(email, password, skip_existing, lazy)
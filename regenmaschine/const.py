@@ -3,3 +3,5 @@
 import logging
 
 LOGGER = logging.getLogger(__package__)
+
+DEFAULT_LOCAL_PORT = 8080
@@ -2,12 +2,29 @@
 
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections.abc import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Sequence,
+)
 from datetime import datetime, timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any, cast
 
 from yarl import URL
 
+from regenmaschine.auth import DEFAULT_REFRESH_MARGIN, Credentials, TokenManager
+from regenmaschine.breaker import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_RESET_TIMEOUT,
+    BreakerState,
+    CircuitBreaker,
+)
+from regenmaschine.cache import ResponseCache
 from regenmaschine.endpoints.api import API
 from regenmaschine.endpoints.diagnostics import Diagnostics
 from regenmaschine.endpoints.machine import Machine
@@ -18,12 +35,67 @@ from regenmaschine.endpoints.restriction import Restriction
 from regenmaschine.endpoints.stats import Stats
 from regenmaschine.endpoints.watering import Watering
 from regenmaschine.endpoints.zone import Zone
+from regenmaschine.errors import RequestError, TokenExpiredError
+from regenmaschine.limiter import RequestLimiter, RequestLimits
+from regenmaschine.metrics import MetricsRegistry
+from regenmaschine.snapshot import ControllerSnapshot, SnapshotPart, async_take_snapshot
+from regenmaschine.store import ControllerRecord
+from regenmaschine.streaming import DEFAULT_STREAM_BUFFER, ItemStream
 
 URL_BASE_LOCAL = "{0}://{1}:{2}/api/4"
 URL_BASE_REMOTE = "https://api.rainmachine.com/{0}/api/4"
+URL_CLOUD_AUTH = "https://my.rainmachine.com/login/auth"
+URL_CLOUD_SPRINKLERS = "https://my.rainmachine.com/devices/get-sprinklers"
 
+# Marks the end of a streamed response:
+_STREAM_DONE = object()
 
-class Controller:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+async def async_get_cloud_access_token(
+    request: Callable[..., Awaitable[dict[str, Any]]], email: str, password: str
+) -> str:
+    """Get a first-stage access token from the RainMachine cloud.
+
+    Args:
+        request: The request method from the Client object.
+        email: A RainMachine account email address.
+        password: The account password.
+
+    Returns:
+        An access token.
+    """
+    auth_resp = await request(
+        "post",
+        URL(URL_CLOUD_AUTH),
+        json={"user": {"email": email, "pwd": password, "remember": 1}},
+    )
+    return cast(str, auth_resp["access_token"])
+
+
+async def async_get_sprinklers(
+    request: Callable[..., Awaitable[dict[str, Any]]], email: str, password: str
+) -> tuple[str, list[dict[str, Any]]]:
+    """Get the controllers owned by a RainMachine account.
+
+    Args:
+        request: The request method from the Client object.
+        email: A RainMachine account email address.
+        password: The account password.
+
+    Returns:
+        A first-stage access token and the account's sprinkler info.
+    """
+    access_token = await async_get_cloud_access_token(request, email, password)
+    sprinklers_resp = await request(
+        "post",
+        URL(URL_CLOUD_SPRINKLERS),
+        access_token=access_token,
+        json={"user": {"email": email, "pwd": password, "remember": 1}},
+    )
+    return access_token, sprinklers_resp["sprinklers"]
+
+
+class Controller(ABC):  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """Define the controller."""
 
     def __init__(self, request: Callable[..., Awaitable[dict[str, Any]]]) -> None:
@@ -35,14 +107,23 @@ class Controller:  # pylint: disable=too-few-public-methods,too-many-instance-at
         self._access_token: str | None = None
         self._access_token_expiration: datetime | None = None
         self._client_request = request
+        self._credentials: Credentials | None = None
         self._host: str = ""
+        self._on_queue_wait: Callable[[Controller, str, float], None] | None = None
         self._base_url: URL = URL("")
+        self._metadata_lock = asyncio.Lock()
         self._use_ssl = True
         self.api_version: str = ""
+        self.cache: ResponseCache | None = None
+        self.circuit_breaker: CircuitBreaker | None = None
         self.hardware_version: str = ""
+        self.limiter: RequestLimiter | None = None
         self.mac: str = ""
+        self.metadata_deferred = False
+        self.metrics: MetricsRegistry | None = None
         self.name: str = ""
         self.software_version: str = ""
+        self.token_manager: TokenManager | None = None
 
         # API endpoints:
         self.api = API(self)
@@ -56,6 +137,117 @@ class Controller:  # pylint: disable=too-few-public-methods,too-many-instance-at
         self.watering = Watering(self)
         self.zones = Zone(self)
 
+    def _set_versions(self, version_data: dict[str, Any]) -> None:
+        """Set the controller's versions from an API response payload.
+
+        Args:
+            version_data: An API response payload.
+        """
+        self.api_version = version_data["apiVer"]
+        self.hardware_version = str(version_data["hwVer"])
+        self.software_version = version_data["swVer"]
+
+    async def async_ensure_metadata(self) -> None:
+        """Fetch the controller's name and versions if they were deferred.
+
+        Controllers that are loaded lazily don't fetch their metadata until it's first
+        needed; concurrent callers share a single fetch.
+        """
+        if not self.metadata_deferred:
+            return
+
+        async with self._metadata_lock:
+            # Another caller may have fetched the metadata while we waited:
+            if self.metadata_deferred:
+                await self.async_update_metadata()
+                self.metadata_deferred = False
+
+    async def async_update_metadata(self) -> None:
+        """Fetch the controller's name and versions (concurrently)."""
+        version_data, name = await asyncio.gather(
+            self.api.versions(), self.provisioning.device_name
+        )
+        self._set_versions(version_data)
+        self.name = str(name)
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL of the controller's API.
+
+        Returns:
+            The base URL.
+        """
+        return self._host
+
+    def restore(
+        self, record: ControllerRecord, credentials: Credentials | None = None
+    ) -> None:
+        """Restore the controller's metadata and access token from a stored record.
+
+        Args:
+            record: A ControllerRecord.
+            credentials: Optional credentials to log in again with (only kept when
+                automatic token refreshing is enabled).
+        """
+        if self.token_manager and credentials:
+            self._credentials = credentials
+            self.token_manager.set_expiration(
+                None
+                if record.access_token_expiration is None
+                else record.access_token_expiration - time.time()
+            )
+
+        self._access_token = record.access_token
+        if record.access_token_expiration is None:
+            self._access_token_expiration = None
+        else:
+            self._access_token_expiration = datetime.fromtimestamp(
+                record.access_token_expiration
+            )
+        self.api_version = record.api_version
+        self.hardware_version = record.hardware_version
+        self.mac = record.mac
+        self.name = record.name
+        self.software_version = record.software_version
+
+    async def snapshot(
+        self, parts: Iterable[SnapshotPart] | None = None
+    ) -> ControllerSnapshot:
+        """Fetch several sections of the controller's state concurrently.
+
+        Sections that can't be fetched (e.g., those a 1st generation controller doesn't
+        support) don't fail the snapshot; their errors are recorded instead.
+
+        Args:
+            parts: The SnapshotParts to fetch (all of them, if None).
+
+        Returns:
+            A ControllerSnapshot.
+        """
+        return await async_take_snapshot(self, parts)
+
+    def to_record(self) -> ControllerRecord:
+        """Return a record of the controller's metadata and access token.
+
+        Returns:
+            A ControllerRecord.
+        """
+        return ControllerRecord(
+            mac=self.mac,
+            base_url=self._host,
+            use_ssl=self._use_ssl,
+            name=self.name,
+            api_version=self.api_version,
+            hardware_version=self.hardware_version,
+            software_version=self.software_version,
+            access_token=self._access_token,
+            access_token_expiration=(
+                self._access_token_expiration.timestamp()
+                if self._access_token_expiration
+                else None
+            ),
+        )
+
     async def request(
         self, method: str, endpoint: str, **kwargs: dict[str, Any]
     ) -> dict[str, Any]:
@@ -66,6 +258,251 @@ class Controller:  # pylint: disable=too-few-public-methods,too-many-instance-at
             endpoint: An API URL endpoint.
             **kwargs: Additional kwargs to send with the request.
 
+        Returns:
+            An API response payload.
+        """
+        if self.cache is None:
+            return cast(dict[str, Any], await self._request(method, endpoint, kwargs))
+
+        params = kwargs.get("params")
+
+        if method.lower() != "get":
+            try:
+                return cast(
+                    dict[str, Any], await self._request(method, endpoint, kwargs)
+                )
+            finally:
+                self.cache.invalidate(endpoint)
+
+        if (data := self.cache.get(endpoint, params)) is not None:
+            return cast(dict[str, Any], data)
+
+        generation = self.cache.generation(endpoint)
+        data = await self._request(method, endpoint, kwargs)
+        self.cache.set(endpoint, params, data, generation=generation)
+        return cast(dict[str, Any], data)
+
+    async def request_raw(
+        self, method: str, endpoint: str, **kwargs: dict[str, Any]
+    ) -> bytes:
+        """Make a request and return the undecoded response body.
+
+        This is useful for consumers that pass responses along without inspecting
+        them; note that errors are only detected via the HTTP status code (since the
+        body isn't decoded) and that responses aren't served from (or stored in) the
+        response cache.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            **kwargs: Additional kwargs to send with the request.
+
+        Returns:
+            The raw response body.
+        """
+        try:
+            return cast(bytes, await self._request(method, endpoint, kwargs, raw=True))
+        finally:
+            if self.cache is not None and method.lower() != "get":
+                self.cache.invalidate(endpoint)
+
+    async def request_stream(
+        self,
+        method: str,
+        endpoint: str,
+        path: Sequence[str],
+        *,
+        max_buffered: int = DEFAULT_STREAM_BUFFER,
+        **kwargs: dict[str, Any],
+    ) -> AsyncGenerator[Any]:
+        """Make a request and yield the items of a JSON array in it as they arrive.
+
+        The response body is parsed incrementally, so memory scales with a single item
+        (plus up to max_buffered items that the caller hasn't consumed yet) rather than
+        with the whole response. Streamed responses aren't served from (or stored in)
+        the response cache, aren't coalesced, and aren't retried once any item has been
+        yielded. The request (and its connection) stays open until every item has been
+        consumed, so a slow consumer counts against the request timeout.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            path: The object keys that lead to the array (e.g., ("waterLog", "days")).
+            max_buffered: The maximum number of items to receive ahead of the caller.
+            **kwargs: Additional kwargs to send with the request.
+
+        Yields:
+            The items of the array.
+        """
+        queue: asyncio.Queue[Any] = asyncio.Queue(max_buffered)
+
+        async def stream() -> None:
+            """Make the request, handing each item (and then the end) to the queue."""
+            cancelled = False
+            try:
+                await self._request(
+                    method, endpoint, {**kwargs, "stream": ItemStream(path, queue.put)}
+                )
+            except asyncio.CancelledError:
+                # The caller stopped early, so nobody will take the end marker (and
+                # waiting for room in a full queue would never finish):
+                cancelled = True
+                raise
+            finally:
+                if not cancelled:
+                    await queue.put(_STREAM_DONE)
+
+        task = asyncio.create_task(stream())
+        try:
+            while (item := await queue.get()) is not _STREAM_DONE:
+                yield item
+            # Raise any error that ended the stream:
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            if self.cache is not None and method.lower() != "get":
+                self.cache.invalidate(endpoint)
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        kwargs: dict[str, Any],
+        *,
+        raw: bool = False,
+    ) -> Any:
+        """Make a request to the controller via the Client.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            kwargs: Additional kwargs to send with the request.
+            raw: Whether to return the undecoded response body.
+
+        Returns:
+            An API response payload.
+        """
+        if self.circuit_breaker is None:
+            return await self._async_observe(
+                method,
+                endpoint,
+                self._request_with_limiter(method, endpoint, kwargs, raw),
+            )
+        return await self._async_observe(
+            method,
+            endpoint,
+            self.circuit_breaker.async_call(
+                lambda: self._request_with_limiter(method, endpoint, kwargs, raw)
+            ),
+        )
+
+    async def _async_observe(
+        self, method: str, endpoint: str, request: Awaitable[Any]
+    ) -> Any:
+        """Await a request, recording its latency (and error, if any) in the metrics.
+
+        The latency is what the caller sees (including any time spent waiting for the
+        rate limiter or a token refresh). Every RequestError is counted, even if the
+        request was never sent (e.g., because the circuit breaker is open); cancelled
+        requests aren't recorded at all.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            request: The awaitable request.
+
+        Returns:
+            An API response payload.
+        """
+        if self.metrics is None:
+            return await request
+
+        start = time.monotonic()
+        try:
+            data = await request
+        except RequestError as err:
+            self.metrics.observe_request(
+                self.mac or None, endpoint, method, time.monotonic() - start, err
+            )
+            raise
+        self.metrics.observe_request(
+            self.mac or None, endpoint, method, time.monotonic() - start
+        )
+        return data
+
+    async def _request_with_limiter(
+        self, method: str, endpoint: str, kwargs: dict[str, Any], raw: bool
+    ) -> Any:
+        """Make a request once the controller's rate limiter allows it.
+
+        Waiting requests are sent in priority order (e.g., stopping a zone jumps ahead
+        of a detailed watering log).
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            kwargs: Additional kwargs to send with the request.
+            raw: Whether to return the undecoded response body.
+
+        Returns:
+            An API response payload.
+        """
+        if self.limiter is None:
+            return await self._request_with_token(method, endpoint, kwargs, raw)
+
+        priority = self.limiter.limits.prioritizer.get_priority(method, endpoint)
+        async with self.limiter.async_slot(priority) as wait:
+            if self._on_queue_wait is not None:
+                self._on_queue_wait(self, endpoint, wait)
+            return await self._request_with_token(method, endpoint, kwargs, raw)
+
+    async def _request_with_token(
+        self, method: str, endpoint: str, kwargs: dict[str, Any], raw: bool
+    ) -> Any:
+        """Make a request, refreshing the access token first (if needed).
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            kwargs: Additional kwargs to send with the request.
+            raw: Whether to return the undecoded response body.
+
+        Returns:
+            An API response payload.
+        """
+        if self.token_manager is None:
+            return await self._send_request(method, endpoint, kwargs, raw)
+
+        await self.token_manager.async_ensure_valid()
+        generation = self.token_manager.generation
+
+        try:
+            return await self._send_request(method, endpoint, kwargs, raw)
+        except TokenExpiredError:
+            if self._credentials is None:
+                raise
+            # The token expired before we expected it to (or the controller was
+            # rebooted, etc.), so log in again and replay the request once:
+            await self.token_manager.async_refresh(generation)
+            return await self._send_request(method, endpoint, kwargs, raw)
+
+    @abstractmethod
+    async def _async_reauthenticate(self) -> None:
+        """Log in again using the stored credentials."""
+
+    async def _send_request(
+        self, method: str, endpoint: str, kwargs: dict[str, Any], raw: bool
+    ) -> Any:
+        """Send a request to the controller via the Client.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            kwargs: Additional kwargs to send with the request.
+            raw: Whether to return the undecoded response body.
+
         Returns:
             An API response payload.
         """
@@ -75,9 +512,82 @@ class Controller:  # pylint: disable=too-few-public-methods,too-many-instance-at
             access_token=self._access_token,
             access_token_expiration=self._access_token_expiration,
             use_ssl=self._use_ssl,
+            raw=raw,
+            mac=self.mac or None,
+            endpoint=endpoint,
             **kwargs,
         )
 
+    def enable_circuit_breaker(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        on_state_change: (
+            Callable[[Controller, BreakerState, BreakerState], None] | None
+        ) = None,
+    ) -> None:
+        """Fail fast (rather than waiting out timeouts) while the controller is offline.
+
+        Args:
+            failure_threshold: The number of consecutive connection (or timeout)
+                failures that open the breaker.
+            reset_timeout: The number of seconds the breaker stays open before a probe
+                (of the API version endpoint) is sent.
+            on_state_change: An optional callback that is called with the controller
+                and the old and new BreakerState whenever the breaker changes state.
+        """
+
+        def handle_state_change(old_state: BreakerState, state: BreakerState) -> None:
+            """Pass a state change (and this controller) to the callback.
+
+            Args:
+                old_state: The old state.
+                state: The new state.
+            """
+            if on_state_change is not None:
+                on_state_change(self, old_state, state)
+
+        self.circuit_breaker = CircuitBreaker(
+            lambda: self._send_request("get", "apiVer", {}, False),
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+            on_state_change=handle_state_change,
+        )
+
+    def enable_rate_limit(
+        self,
+        limits: RequestLimits,
+        *,
+        account_limiter: RequestLimiter | None = None,
+        on_queue_wait: Callable[[Controller, str, float], None] | None = None,
+    ) -> None:
+        """Limit the rate (and concurrency) of requests sent to the controller.
+
+        Args:
+            limits: The RequestLimits to enforce.
+            account_limiter: An optional RequestLimiter shared by every controller on
+                the same account (which requests must also get through).
+            on_queue_wait: An optional callback that is called with the controller, the
+                endpoint, and the number of seconds each request waited.
+        """
+        self.limiter = RequestLimiter(limits, account_limiter)
+        self._on_queue_wait = on_queue_wait
+
+    def enable_token_refresh(
+        self, refresh_margin: float = DEFAULT_REFRESH_MARGIN
+    ) -> None:
+        """Automatically refresh the access token (and retry requests it fails).
+
+        Once enabled, the credentials passed to the next login are kept in memory so
+        that the controller can log in again on its own.
+
+        Args:
+            refresh_margin: How many seconds before expiration a token is refreshed.
+        """
+        self.token_manager = TokenManager(
+            self._async_reauthenticate, refresh_margin=refresh_margin
+        )
+
 
 class LocalController(Controller):
     """Define a controller accessed over the LAN."""
@@ -113,10 +623,16 @@ class LocalController(Controller):
         Args:
             password: The controller password.
         """
-        auth_resp = await self._client_request(
+        auth_resp = await self._async_observe(
             "post",
-            self._base_url.joinpath("auth/login"),
-            json={"pwd": password, "remember": 1},
+            "auth/login",
+            self._client_request(
+                "post",
+                self._base_url.joinpath("auth/login"),
+                mac=self.mac or None,
+                endpoint="auth/login",
+                json={"pwd": password, "remember": 1},
+            ),
         )
 
         self._access_token: str = auth_resp["access_token"]
@@ -124,12 +640,90 @@ class LocalController(Controller):
             seconds=int(auth_resp["expires_in"]) - 10
         )
 
+        if self.token_manager:
+            self._credentials = Credentials(password)
+            self.token_manager.set_expiration(int(auth_resp["expires_in"]) - 10)
+
+    async def async_revalidate(self, password: str) -> str:
+        """Refresh restored metadata (logging in again if the access token expired).
+
+        Args:
+            password: The controller password.
+
+        Returns:
+            The MAC address that the controller reports.
+        """
+        try:
+            wifi_data, _ = await asyncio.gather(
+                self.provisioning.wifi(), self.async_update_metadata()
+            )
+        except TokenExpiredError:
+            await self.login(password)
+            wifi_data, _ = await asyncio.gather(
+                self.provisioning.wifi(), self.async_update_metadata()
+            )
+        return cast(str, wifi_data["macAddress"])
+
+    async def _async_reauthenticate(self) -> None:
+        """Log in again using the stored credentials."""
+        if TYPE_CHECKING:
+            assert self._credentials is not None
+        await self.login(self._credentials.password)
+
 
 class RemoteController(Controller):
     """Define a controller accessed over RainMachine's cloud."""
 
+    def __init__(self, request: Callable[..., Awaitable[dict[str, Any]]]) -> None:
+        """Initialize.
+
+        Args:
+            request: The request method from the Client object.
+        """
+        super().__init__(request)
+        self._sprinkler_id: str = ""
+
+    async def async_update_metadata(self) -> None:
+        """Fetch the controller's versions.
+
+        The RainMachine cloud provides the name of remote controllers when they're
+        loaded, so only the versions need to be fetched.
+        """
+        self._set_versions(await self.api.versions())
+
+    def restore(
+        self, record: ControllerRecord, credentials: Credentials | None = None
+    ) -> None:
+        """Restore the controller's metadata and access token from a stored record.
+
+        Args:
+            record: A ControllerRecord.
+            credentials: Optional credentials to log in again with (only kept when
+                automatic token refreshing is enabled).
+        """
+        super().restore(record, credentials)
+        if record.sprinkler_id:
+            self._sprinkler_id = record.sprinkler_id
+            self._host = URL_BASE_REMOTE.format(record.sprinkler_id)
+            self._base_url = URL(self._host)
+
+    def to_record(self) -> ControllerRecord:
+        """Return a record of the controller's metadata and access token.
+
+        Returns:
+            A ControllerRecord.
+        """
+        record = super().to_record()
+        record.sprinkler_id = self._sprinkler_id
+        return record
+
     async def login(
-        self, stage_1_access_token: str, sprinkler_id: str, password: str
+        self,
+        stage_1_access_token: str,
+        sprinkler_id: str,
+        password: str,
+        *,
+        email: str | None = None,
     ) -> None:
         """Authenticate against the device (remotely).
 
@@ -137,6 +731,8 @@ class RemoteController(Controller):
             stage_1_access_token: The first-stage access token from the remote cloud.
             sprinkler_id: A unique ID for the controller.
             password: The account password.
+            email: The account email address (needed to log in again when automatic
+                token refreshing is enabled).
         """
         auth_resp: dict = await self._client_request(
             "post",
@@ -148,3 +744,43 @@ class RemoteController(Controller):
         self._access_token = auth_resp["access_token"]
         self._host = URL_BASE_REMOTE.format(sprinkler_id)
         self._base_url = URL(self._host)
+        self._sprinkler_id = sprinkler_id
+
+        if self.token_manager and email:
+            self._credentials = Credentials(password, email=email)
+            # The cloud doesn't tell us when the token expires, so it is only
+            # refreshed when the API says it has expired:
+            self.token_manager.set_expiration(None)
+
+    async def async_revalidate(
+        self, stage_1_access_token: str, password: str, *, email: str
+    ) -> None:
+        """Refresh restored metadata (logging in again if the access token expired).
+
+        Args:
+            stage_1_access_token: A first-stage access token from the remote cloud.
+            password: The account password.
+            email: The account email address.
+        """
+        try:
+            await self.async_update_metadata()
+        except TokenExpiredError:
+            await self.login(
+                stage_1_access_token, self._sprinkler_id, password, email=email
+            )
+            await self.async_update_metadata()
+
+    async def _async_reauthenticate(self) -> None:
+        """Log in again (through both cloud stages) using the stored credentials."""
+        if TYPE_CHECKING:
+            assert self._credentials is not None
+            assert self._credentials.email is not None
+        stage_1_access_token = await async_get_cloud_access_token(
+            self._client_request, self._credentials.email, self._credentials.password
+        )
+        await self.login(
+            stage_1_access_token,
+            self._sprinkler_id,
+            self._credentials.password,
+            email=self._credentials.email,
+        )
@@ -0,0 +1,410 @@
+"""Define a diff engine that turns refreshed controller state into change events."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from .const import LOGGER
+from .snapshot import SnapshotPart, SnapshotSection
+
+if TYPE_CHECKING:
+    from .controller import Controller
+
+# The fields that identify a record within a list payload (in order of preference):
+RECORD_KEY_FIELDS = ("uid", "pid", "id")
+
+ZONE_STATE_RUNNING = 1
+
+
+class ChangeType(str, Enum):
+    """Define the types of change events."""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    UPDATED = "updated"
+    PROGRAM_ACTIVATED = "program_activated"
+    PROGRAM_DEACTIVATED = "program_deactivated"
+    PROGRAM_STARTED = "program_started"
+    PROGRAM_STOPPED = "program_stopped"
+    RESTRICTION_ENGAGED = "restriction_engaged"
+    RESTRICTION_LIFTED = "restriction_lifted"
+    ZONE_STARTED = "zone_started"
+    ZONE_STOPPED = "zone_stopped"
+
+
+@dataclass(frozen=True)
+class FieldChange:
+    """Define a change to a single field of a record."""
+
+    old: Any
+    new: Any
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Define a change to a record in a controller's state.
+
+    Records are keyed by uid (or a similar identifier); sections that hold a single
+    record (e.g., the current restrictions) use a uid of None.
+    """
+
+    mac: str
+    part: SnapshotPart
+    uid: Any
+    type: ChangeType
+    changes: dict[str, FieldChange] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """Define a rule that turns a field change into a semantic event."""
+
+    field: str | None
+    matches: Callable[[Any, Any], bool]
+    type: ChangeType
+
+
+def _is_starting(old: Any, new: Any) -> bool:
+    """Return whether a zone state moves to running.
+
+    Args:
+        old: The old state.
+        new: The new state.
+
+    Returns:
+        Whether the zone started.
+    """
+    return bool(new == ZONE_STATE_RUNNING and old != ZONE_STATE_RUNNING)
+
+
+def _is_stopping(old: Any, new: Any) -> bool:
+    """Return whether a zone state moves away from running.
+
+    Args:
+        old: The old state.
+        new: The new state.
+
+    Returns:
+        Whether the zone stopped.
+    """
+    return bool(old == ZONE_STATE_RUNNING and new != ZONE_STATE_RUNNING)
+
+
+def _turns_on(old: Any, new: Any) -> bool:
+    """Return whether a field becomes truthy.
+
+    Args:
+        old: The old value.
+        new: The new value.
+
+    Returns:
+        Whether the field turned on.
+    """
+    return bool(new) and not bool(old)
+
+
+def _turns_off(old: Any, new: Any) -> bool:
+    """Return whether a field becomes falsy.
+
+    Args:
+        old: The old value.
+        new: The new value.
+
+    Returns:
+        Whether the field turned off.
+    """
+    return bool(old) and not bool(new)
+
+
+_ZONE_RULES = (
+    _Rule("state", _is_starting, ChangeType.ZONE_STARTED),
+    _Rule("state", _is_stopping, ChangeType.ZONE_STOPPED),
+)
+
+_PROGRAM_RULES = (
+    _Rule("active", _turns_on, ChangeType.PROGRAM_ACTIVATED),
+    _Rule("active", _turns_off, ChangeType.PROGRAM_DEACTIVATED),
+    _Rule("status", _turns_on, ChangeType.PROGRAM_STARTED),
+    _Rule("status", _turns_off, ChangeType.PROGRAM_STOPPED),
+)
+
+# Rules with a field of None apply to every boolean field of the record:
+_RESTRICTION_RULES = (
+    _Rule(None, _turns_on, ChangeType.RESTRICTION_ENGAGED),
+    _Rule(None, _turns_off, ChangeType.RESTRICTION_LIFTED),
+)
+
+SEMANTIC_RULES: dict[SnapshotPart, tuple[_Rule, ...]] = {
+    SnapshotPart.CURRENT_RESTRICTIONS: _RESTRICTION_RULES,
+    SnapshotPart.PROGRAMS: _PROGRAM_RULES,
+    SnapshotPart.RUNNING_PROGRAMS: _PROGRAM_RULES,
+    SnapshotPart.RUNNING_ZONES: _ZONE_RULES,
+    SnapshotPart.ZONES: _ZONE_RULES,
+}
+
+# Records that appear in (or disappear from) these lists are themselves semantic
+# events:
+MEMBERSHIP_EVENTS: dict[SnapshotPart, tuple[ChangeType, ChangeType]] = {
+    SnapshotPart.RUNNING_PROGRAMS: (
+        ChangeType.PROGRAM_STARTED,
+        ChangeType.PROGRAM_STOPPED,
+    ),
+}
+
+ChangeListener = Callable[[ChangeEvent], None]
+
+
+def get_records(data: Any) -> dict[Any, dict[str, Any]]:
+    """Get the records in an API response payload, keyed by uid.
+
+    Args:
+        data: An API response payload (e.g., from Zone.all() or Watering.queue()).
+
+    Returns:
+        A dictionary of uid to record.
+    """
+    if isinstance(data, dict):
+        if data and all(isinstance(value, dict) for value in data.values()):
+            # A payload that's already keyed by uid (e.g., from Zone.all()):
+            return data
+        return {None: data}
+
+    if isinstance(data, list):
+        records: dict[Any, dict[str, Any]] = {}
+        for index, record in enumerate(data):
+            if not isinstance(record, dict):
+                records[index] = {"value": record}
+                continue
+            key = next(
+                (record[key] for key in RECORD_KEY_FIELDS if key in record), index
+            )
+            records[key] = record
+        return records
+
+    return {None: {"value": data}}
+
+
+def get_field_changes(
+    old: dict[str, Any], new: dict[str, Any]
+) -> dict[str, FieldChange]:
+    """Get the fields that differ between two versions of a record.
+
+    Args:
+        old: The old record.
+        new: The new record.
+
+    Returns:
+        A dictionary of field name to FieldChange.
+    """
+    return {
+        key: FieldChange(old.get(key), new.get(key))
+        for key in {**old, **new}
+        if old.get(key) != new.get(key)
+    }
+
+
+def _get_membership_events(
+    mac: str,
+    part: SnapshotPart,
+    old_records: dict[Any, dict[str, Any]],
+    new_records: dict[Any, dict[str, Any]],
+) -> list[ChangeEvent]:
+    """Get the events for records that were removed from (or added to) a section.
+
+    Args:
+        mac: The MAC address of a controller.
+        part: The SnapshotPart the records are from.
+        old_records: The last records, keyed by uid.
+        new_records: The new records, keyed by uid.
+
+    Returns:
+        The ChangeEvents (removals first).
+    """
+    added_type, removed_type = MEMBERSHIP_EVENTS.get(
+        part, (ChangeType.ADDED, ChangeType.REMOVED)
+    )
+    events: list[ChangeEvent] = []
+
+    for uid in [uid for uid in old_records if uid not in new_records]:
+        events.append(ChangeEvent(mac, part, uid, ChangeType.REMOVED))
+        if removed_type is not ChangeType.REMOVED:
+            events.append(ChangeEvent(mac, part, uid, removed_type))
+
+    for uid in [uid for uid in new_records if uid not in old_records]:
+        events.append(ChangeEvent(mac, part, uid, ChangeType.ADDED))
+        if added_type is not ChangeType.ADDED:
+            events.append(ChangeEvent(mac, part, uid, added_type))
+
+    return events
+
+
+def _get_semantic_events(
+    mac: str, part: SnapshotPart, uid: Any, changes: dict[str, FieldChange]
+) -> list[ChangeEvent]:
+    """Get the semantic events (e.g., a zone starting) for a record's field changes.
+
+    Args:
+        mac: The MAC address of a controller.
+        part: The SnapshotPart the record is from.
+        uid: The record's uid.
+        changes: The record's field changes.
+
+    Returns:
+        The ChangeEvents.
+    """
+    events: list[ChangeEvent] = []
+    for rule in SEMANTIC_RULES.get(part, ()):
+        for name, change in changes.items():
+            if rule.field is None and not isinstance(change.new, bool):
+                continue
+            if rule.field not in (None, name):
+                continue
+            if rule.matches(change.old, change.new):
+                events.append(ChangeEvent(mac, part, uid, rule.type, {name: change}))
+    return events
+
+
+class DiffEngine:
+    """Define an engine that tracks controller state and emits changes to it.
+
+    The engine keeps the last state of each (controller, SnapshotPart) it's given,
+    keyed by record uid; each new state is compared field-by-field with the last, and
+    subscribers are only called when something actually changed. The first state of
+    a (controller, SnapshotPart) is a baseline and doesn't emit events.
+
+    Only a shallow copy of each record is kept (nested values are compared, but not
+    copied).
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # The last payload of each (controller, SnapshotPart), by identity:
+        self._last_data: dict[tuple[str, SnapshotPart], Any] = {}
+        self._state: dict[tuple[str, SnapshotPart], dict[Any, dict[str, Any]]] = {}
+        self._subscribers: list[
+            tuple[ChangeListener, frozenset[ChangeType] | None]
+        ] = []
+
+    def _emit(self, event: ChangeEvent) -> None:
+        """Hand an event to every interested subscriber.
+
+        Args:
+            event: A ChangeEvent.
+        """
+        for listener, types in list(self._subscribers):
+            if types is not None and event.type not in types:
+                continue
+            try:
+                listener(event)
+            except Exception as err:  # noqa: BLE001  # pylint: disable=broad-except
+                # A broken subscriber shouldn't keep the others from being notified:
+                LOGGER.exception("Error in change listener: %s", err)
+
+    def clear(self, mac: str | None = None) -> None:
+        """Forget the last state (of one controller, or of all of them).
+
+        Args:
+            mac: The MAC address of a controller (or None for all controllers).
+        """
+        if mac is None:
+            self._last_data.clear()
+            self._state.clear()
+            return
+        for key in [key for key in self._state if key[0] == mac]:
+            self._last_data.pop(key, None)
+            del self._state[key]
+
+    def get_state(self, mac: str, part: SnapshotPart) -> dict[Any, dict[str, Any]]:
+        """Get the last state of part of a controller.
+
+        Args:
+            mac: The MAC address of a controller.
+            part: A SnapshotPart.
+
+        Returns:
+            A dictionary of uid to record.
+        """
+        return self._state.get((mac, part), {})
+
+    def process_section(
+        self, controller: Controller, section: SnapshotSection[Any]
+    ) -> None:
+        """Update from a refreshed SnapshotSection.
+
+        This has the signature of a PollingCoordinator listener, so the engine can be
+        fed by a coordinator directly. Sections that couldn't be fetched are ignored.
+
+        A section flagged as unchanged is only skipped if its data is the very object
+        the engine last saw: the flag means the responses matched the client's last
+        ones from the same URLs, which may have come from someone else's request (so
+        the engine may not have seen them).
+
+        Args:
+            controller: The Controller that was refreshed.
+            section: The refreshed SnapshotSection.
+        """
+        if not section.success:
+            return
+        if (
+            section.unchanged
+            and self._last_data.get((controller.mac, section.part)) is section.data
+        ):
+            return
+        self.update(controller.mac, section.part, section.data)
+
+    def subscribe(
+        self, listener: ChangeListener, types: Collection[ChangeType] | None = None
+    ) -> Callable[[], None]:
+        """Add a subscriber that is called with change events.
+
+        Subscribers run in the event loop, so they should be quick.
+
+        Args:
+            listener: A callable that accepts a ChangeEvent.
+            types: The ChangeTypes to be notified of (or None for all of them).
+
+        Returns:
+            A callable that removes the subscriber.
+        """
+        subscriber = (listener, None if types is None else frozenset(types))
+        self._subscribers.append(subscriber)
+
+        def remove() -> None:
+            """Remove the subscriber."""
+            self._subscribers.remove(subscriber)
+
+        return remove
+
+    def update(self, mac: str, part: SnapshotPart, data: Any) -> list[ChangeEvent]:
+        """Update the state of part of a controller (and emit any changes).
+
+        Args:
+            mac: The MAC address of a controller.
+            part: The SnapshotPart the data is from.
+            data: An API response payload.
+
+        Returns:
+            The emitted ChangeEvents.
+        """
+        self._last_data[(mac, part)] = data
+        new_records = {uid: dict(record) for uid, record in get_records(data).items()}
+        old_records = self._state.get((mac, part))
+        self._state[(mac, part)] = new_records
+
+        if old_records is None:
+            return []
+
+        events = _get_membership_events(mac, part, old_records, new_records)
+        for uid, record in new_records.items():
+            if (old_record := old_records.get(uid)) is None:
+                continue
+            if changes := get_field_changes(old_record, record):
+                events.append(ChangeEvent(mac, part, uid, ChangeType.UPDATED, changes))
+                events.extend(_get_semantic_events(mac, part, uid, changes))
+
+        for event in events:
+            self._emit(event)
+        return events
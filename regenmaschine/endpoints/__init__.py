@@ -41,13 +41,28 @@ class EndpointManager:  # pylint: disable=too-few-public-methods
             The decorated callable.
         """
 
-        def decorator(
-            inst: _ManagerT, *args: _P.args, **kwargs: _P.kwargs
-        ) -> Coroutine[Any, Any, _T]:
-            if inst.controller.hardware_version == "1":
-                raise UnknownAPICallError(
-                    f"Can't call {func.__name__} on a 1st generation controller"
-                )
-            return func(inst, *args, **kwargs)
+        async def decorator(inst: _ManagerT, *args: _P.args, **kwargs: _P.kwargs) -> _T:
+            await inst.async_raise_on_gen1_controller(func.__name__)
+            return await func(inst, *args, **kwargs)
 
         return decorator
+
+    async def async_raise_on_gen1_controller(self, name: str) -> None:
+        """Raise an error if the controller is a 1st generation controller.
+
+        This is for methods that can't be decorated with raise_on_gen1_controller
+        (e.g., async generators).
+
+        Args:
+            name: The name of the method being called.
+
+        Raises:
+            UnknownAPICallError: Raised on a 1st generation controller.
+        """
+        # The hardware version of a lazily loaded controller isn't known until its
+        # metadata is fetched:
+        await self.controller.async_ensure_metadata()
+        if self.controller.hardware_version == "1":
+            raise UnknownAPICallError(
+                f"Can't call {name} on a 1st generation controller"
+            )
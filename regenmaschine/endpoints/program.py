@@ -2,29 +2,48 @@
 
 from __future__ import annotations
 
-from typing import Any, cast
+from typing import Any, Literal, cast, overload
 
 from regenmaschine.endpoints import EndpointManager
+from regenmaschine.models import ProgramData
 
 
 class Program(EndpointManager):
     """Define a program object."""
 
-    async def all(self, include_inactive: bool = False) -> dict[int, dict[str, Any]]:
+    @overload
+    async def all(
+        self, include_inactive: bool = False, *, typed: Literal[False] = False
+    ) -> dict[int, dict[str, Any]]: ...
+
+    @overload
+    async def all(
+        self, include_inactive: bool = False, *, typed: Literal[True]
+    ) -> dict[int, ProgramData]: ...
+
+    async def all(
+        self, include_inactive: bool = False, *, typed: bool = False
+    ) -> dict[int, dict[str, Any]] | dict[int, ProgramData]:
         """Return all programs.
 
         Args:
             include_inactive: Whether to include inactive programs.
+            typed: Whether to return ProgramData models instead of dictionaries.
 
         Returns:
             An API response payload.
         """
         data = await self.controller.request("get", "program")
-        return {
-            program["uid"]: program
+        programs = [
+            program
             for program in data["programs"]
             if include_inactive or program["active"]
-        }
+        ]
+        if typed:
+            return {
+                program["uid"]: ProgramData.from_dict(program) for program in programs
+            }
+        return {program["uid"]: program for program in programs}
 
     async def disable(self, program_id: int) -> dict[str, Any]:
         """Disable a program.
@@ -52,16 +71,28 @@ class Program(EndpointManager):
             "post", f"program/{program_id}", json={"active": True}
         )
 
-    async def get(self, program_id: int) -> dict[str, Any]:
+    @overload
+    async def get(
+        self, program_id: int, *, typed: Literal[False] = False
+    ) -> dict[str, Any]: ...
+
+    @overload
+    async def get(self, program_id: int, *, typed: Literal[True]) -> ProgramData: ...
+
+    async def get(
+        self, program_id: int, *, typed: bool = False
+    ) -> dict[str, Any] | ProgramData:
         """Return a specific program.
 
         Args:
             program_id: The ID of a program.
+            typed: Whether to return a ProgramData model instead of a dictionary.
 
         Returns:
             An API response payload.
         """
-        return await self.controller.request("get", f"program/{program_id}")
+        program = await self.controller.request("get", f"program/{program_id}")
+        return ProgramData.from_dict(program) if typed else program
 
     async def next(self) -> list[dict[str, Any]]:
         """Return the next run date/time for all programs.
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import datetime
+from collections.abc import AsyncIterator
 from typing import Any, cast
 
 from regenmaschine.endpoints import EndpointManager
@@ -40,3 +41,25 @@ class Stats(EndpointManager):
             data_key = "DailyStatsDetails"
         data = await self.controller.request("get", endpoint)
         return cast(list[dict[str, Any]], data[data_key])
+
+    async def upcoming_stream(
+        self, details: bool = False
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield watering statistics for the next 6 days as they arrive.
+
+        Unlike upcoming(), the response is parsed incrementally (one day at a time),
+        which keeps memory down for large detailed statistics.
+
+        Args:
+            details: Whether extra details should be included.
+
+        Yields:
+            The statistics of a single day.
+        """
+        endpoint = "dailystats"
+        data_key = "DailyStats"
+        if details:
+            endpoint += "/details"
+            data_key = "DailyStatsDetails"
+        async for day in self.controller.request_stream("get", endpoint, (data_key,)):
+            yield day
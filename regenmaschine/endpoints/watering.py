@@ -2,14 +2,43 @@
 
 from __future__ import annotations
 
+import asyncio
 import datetime
-from typing import Any, cast
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any, Literal, cast, overload
 
 from regenmaschine.endpoints import EndpointManager
+from regenmaschine.models import QueueEntry
 
+DEFAULT_LOG_CHUNK_DAYS = 7
+DEFAULT_LOG_CONCURRENCY = 2
 MAX_PAUSE_DURATION = 43200
 
 
+def get_log_endpoint(
+    date: datetime.date | None, days: int | None, details: bool
+) -> str:
+    """Get the endpoint of the watering log.
+
+    Args:
+        date: The date to examine.
+        days: The number of days' worth of logs to retrieve.
+        details: Whether to include extra details.
+
+    Returns:
+        An API URL endpoint.
+    """
+    endpoint = "watering/log"
+    if details:
+        endpoint += "/details"
+
+    if date and days:
+        endpoint = f"{endpoint}/{date.strftime('%Y-%m-%d')}/{days}"
+
+    return endpoint
+
+
 class Watering(EndpointManager):
     """Define a watering object."""
 
@@ -30,15 +59,102 @@ class Watering(EndpointManager):
         Returns:
             An API response payload.
         """
-        endpoint = "watering/log"
-        if details:
-            endpoint += "/details"
+        data = await self.controller.request(
+            "get", get_log_endpoint(date, days, details)
+        )
+        return cast(list[dict[str, Any]], data["waterLog"]["days"])
 
-        if date and days:
-            endpoint = f"{endpoint}/{date.strftime('%Y-%m-%d')}/{days}"
+    async def log_stream(
+        self,
+        date: datetime.date | None = None,
+        days: int | None = None,
+        details: bool = False,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield watering information for X days from Y date as it arrives.
 
-        data = await self.controller.request("get", endpoint)
-        return cast(list[dict[str, Any]], data["waterLog"]["days"])
+        Unlike log(), the response is parsed incrementally (one day at a time), which
+        keeps memory down for large detailed logs.
+
+        Args:
+            date: The date to examine.
+            days: The number of days' worth of logs to retrieve.
+            details: Whether to include extra details.
+
+        Yields:
+            The log of a single day.
+        """
+        await self.async_raise_on_gen1_controller("log_stream")
+        async for day in self.controller.request_stream(
+            "get", get_log_endpoint(date, days, details), ("waterLog", "days")
+        ):
+            yield day
+
+    async def log_range(  # pylint: disable=too-many-arguments
+        self,
+        date: datetime.date,
+        days: int,
+        *,
+        details: bool = False,
+        chunk_days: int = DEFAULT_LOG_CHUNK_DAYS,
+        max_concurrency: int = DEFAULT_LOG_CONCURRENCY,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield watering information for X days from Y date, one day at a time.
+
+        Rather than requesting the whole range at once (which, for long ranges, is
+        slow and strains the controller), the range is split into windows of
+        chunk_days, up to max_concurrency of which are fetched at once. Days are
+        yielded in order (and only once, even if windows overlap) as soon as their
+        window arrives, so the whole range is never held in memory.
+
+        Args:
+            date: The first date to examine.
+            days: The number of days' worth of logs to retrieve.
+            details: Whether to include extra details.
+            chunk_days: The number of days to request at a time.
+            max_concurrency: The maximum number of windows to request at once.
+
+        Yields:
+            The log of a single day.
+
+        Raises:
+            ValueError: Raised when chunk_days or max_concurrency is less than 1.
+        """
+        if chunk_days < 1:
+            raise ValueError(f"chunk_days must be at least 1 (got {chunk_days})")
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1 (got {max_concurrency})"
+            )
+
+        windows = iter(
+            (date + datetime.timedelta(days=offset), min(chunk_days, days - offset))
+            for offset in range(0, days, chunk_days)
+        )
+        pending: deque[asyncio.Task[list[dict[str, Any]]]] = deque()
+
+        def fetch_next_window() -> None:
+            """Start fetching the next window (if there is one)."""
+            if (window := next(windows, None)) is not None:
+                pending.append(asyncio.create_task(self.log(*window, details=details)))
+
+        for _ in range(max_concurrency):
+            fetch_next_window()
+
+        last_date: str | None = None
+        try:
+            while pending:
+                window_days = await pending.popleft()
+                # Keep the pipeline full while the caller processes this window:
+                fetch_next_window()
+                for day in sorted(window_days, key=lambda day: str(day["date"])):
+                    if last_date is not None and day["date"] <= last_date:
+                        continue
+                    last_date = day["date"]
+                    yield day
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
     @EndpointManager.raise_on_gen1_controller
     async def flowmeter(self) -> dict[str, Any]:
@@ -88,15 +204,30 @@ class Watering(EndpointManager):
             "post", "watering/pauseall", json={"duration": seconds}
         )
 
-    @EndpointManager.raise_on_gen1_controller
-    async def queue(self) -> list[dict[str, Any]]:
+    @overload
+    async def queue(self, *, typed: Literal[False] = False) -> list[dict[str, Any]]: ...
+
+    @overload
+    async def queue(self, *, typed: Literal[True]) -> list[QueueEntry]: ...
+
+    async def queue(
+        self, *, typed: bool = False
+    ) -> list[dict[str, Any]] | list[QueueEntry]:
         """Return the queue of active watering activities.
 
+        Args:
+            typed: Whether to return QueueEntry models instead of dictionaries.
+
         Returns:
             An API response payload.
         """
+        # The decorator can't preserve this method's overloads:
+        await self.async_raise_on_gen1_controller("queue")
         data = await self.controller.request("get", "watering/queue")
-        return cast(list[dict[str, Any]], data["queue"])
+        entries = cast(list[dict[str, Any]], data["queue"])
+        if typed:
+            return [QueueEntry.from_dict(entry) for entry in entries]
+        return entries
 
     @EndpointManager.raise_on_gen1_controller
     async def runs(
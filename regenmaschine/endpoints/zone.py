@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, Literal, cast, overload
 
 from regenmaschine.endpoints import EndpointManager
+from regenmaschine.models import ZoneData
 
 
 class Zone(EndpointManager):
@@ -24,14 +25,37 @@ class Zone(EndpointManager):
             "post", f"zone/{zone_id}/properties", json=json
         )
 
+    @overload
     async def all(
-        self, *, details: bool = False, include_inactive: bool = False
-    ) -> dict[int, dict[str, Any]]:
+        self,
+        *,
+        details: bool = False,
+        include_inactive: bool = False,
+        typed: Literal[False] = False,
+    ) -> dict[int, dict[str, Any]]: ...
+
+    @overload
+    async def all(
+        self,
+        *,
+        details: bool = False,
+        include_inactive: bool = False,
+        typed: Literal[True],
+    ) -> dict[int, ZoneData]: ...
+
+    async def all(
+        self,
+        *,
+        details: bool = False,
+        include_inactive: bool = False,
+        typed: bool = False,
+    ) -> dict[int, dict[str, Any]] | dict[int, ZoneData]:
         """Return all zones (with optional advanced properties).
 
         Args:
             details: Whether extra details should be included.
             include_inactive: Whether to include inactive programs.
+            typed: Whether to return ZoneData models instead of dictionaries.
 
         Returns:
             An API response payload.
@@ -57,6 +81,8 @@ class Zone(EndpointManager):
             if zone_data["active"] or include_inactive:
                 zones[zone_data["uid"]] = zone_data
 
+        if typed:
+            return {uid: ZoneData.from_dict(zone) for uid, zone in zones.items()}
         return zones
 
     async def disable(self, zone_id: int) -> dict[str, Any]:
@@ -81,32 +107,61 @@ class Zone(EndpointManager):
         """
         return await self._post(zone_id, {"active": True})
 
-    async def get(self, zone_id: int, *, details: bool = False) -> dict[str, Any]:
+    @overload
+    async def get(
+        self, zone_id: int, *, details: bool = False, typed: Literal[False] = False
+    ) -> dict[str, Any]: ...
+
+    @overload
+    async def get(
+        self, zone_id: int, *, details: bool = False, typed: Literal[True]
+    ) -> ZoneData: ...
+
+    async def get(
+        self, zone_id: int, *, details: bool = False, typed: bool = False
+    ) -> dict[str, Any] | ZoneData:
         """Return a specific zone.
 
         Args:
             zone_id: A zone ID.
             details: Whether extra details should be included.
+            typed: Whether to return a ZoneData model instead of a dictionary.
 
         Returns:
             An API response payload.
         """
         zone = await self.controller.request("get", f"zone/{zone_id}")
-        if not details:
-            return zone
-        zone_details = await self.controller.request(
-            "get", f"zone/{zone_id}/properties"
-        )
-        return {**zone, **zone_details}
-
-    async def running(self) -> list[dict[str, Any]]:
+        if details:
+            zone_details = await self.controller.request(
+                "get", f"zone/{zone_id}/properties"
+            )
+            zone = {**zone, **zone_details}
+        return ZoneData.from_dict(zone) if typed else zone
+
+    @overload
+    async def running(
+        self, *, typed: Literal[False] = False
+    ) -> list[dict[str, Any]]: ...
+
+    @overload
+    async def running(self, *, typed: Literal[True]) -> list[ZoneData]: ...
+
+    async def running(
+        self, *, typed: bool = False
+    ) -> list[dict[str, Any]] | list[ZoneData]:
         """Return all running zones.
 
+        Args:
+            typed: Whether to return ZoneData models instead of dictionaries.
+
         Returns:
             An API response payload.
         """
         data = await self.controller.request("get", "watering/zone")
-        return cast(list[dict[str, Any]], data["zones"])
+        zones = cast(list[dict[str, Any]], data["zones"])
+        if typed:
+            return [ZoneData.from_dict(zone) for zone in zones]
+        return zones
 
     async def start(self, zone_id: int, time: int) -> dict[str, Any]:
         """Start a zone.
@@ -21,6 +21,30 @@ class RequestError(RainMachineError):
     pass
 
 
+class CircuitOpenError(RequestError):
+    """Define an error for requests to a controller that is (probably) offline."""
+
+    pass
+
+
+class ConnectionFailedError(RequestError):
+    """Define an error for connections to a controller that fail (or drop)."""
+
+    pass
+
+
+class RequestTimeoutError(RequestError):
+    """Define an error for requests that time out."""
+
+    pass
+
+
+class ServerError(RequestError):
+    """Define an error for 5xx responses from a controller (or the cloud)."""
+
+    pass
+
+
 class TokenExpiredError(RequestError):
     """Define an error for expired access tokens that can't be refreshed."""
 
@@ -113,4 +137,6 @@ def raise_for_error(resp: ClientResponse, data: dict[str, Any] | None) -> None:
         try:
             resp.raise_for_status()
         except ClientError as err:
+            if resp.status >= 500:
+                raise ServerError(f"Error while requesting {resp.url}: {err}") from err
             raise RequestError(f"Error while requesting {resp.url}: {err}") from err
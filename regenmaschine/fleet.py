@@ -0,0 +1,87 @@
+"""Define objects to describe loading many controllers at once."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .const import DEFAULT_LOCAL_PORT
+
+
+@dataclass(frozen=True)
+class LocalTarget:
+    """Define a controller to load over the LAN."""
+
+    host: str
+    password: str = field(repr=False)
+    port: int = DEFAULT_LOCAL_PORT
+    use_ssl: bool = True
+
+    @property
+    def label(self) -> str:
+        """Return a label that identifies the target.
+
+        Returns:
+            The target's host and port.
+        """
+        return f"{self.host}:{self.port}"
+
+
+@dataclass(frozen=True)
+class RemoteTarget:
+    """Define a RainMachine account whose controllers should be loaded."""
+
+    email: str
+    password: str = field(repr=False)
+
+    @property
+    def label(self) -> str:
+        """Return a label that identifies the target.
+
+        Returns:
+            The account email address.
+        """
+        return self.email
+
+
+@dataclass
+class LoadResult:
+    """Define the result of loading a single target."""
+
+    target: LocalTarget | RemoteTarget
+    duration: float
+    macs: list[str] = field(default_factory=list)
+    error: BaseException | None = None
+
+    @property
+    def success(self) -> bool:
+        """Return whether the target was loaded successfully.
+
+        Returns:
+            Whether the target was loaded.
+        """
+        return self.error is None
+
+
+@dataclass
+class LoadReport:
+    """Define a report of loading many targets."""
+
+    results: list[LoadResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> list[LoadResult]:
+        """Return the results for targets that couldn't be loaded.
+
+        Returns:
+            A list of LoadResult objects.
+        """
+        return [result for result in self.results if not result.success]
+
+    @property
+    def succeeded(self) -> list[LoadResult]:
+        """Return the results for targets that were loaded.
+
+        Returns:
+            A list of LoadResult objects.
+        """
+        return [result for result in self.results if result.success]
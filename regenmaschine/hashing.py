@@ -0,0 +1,203 @@
+"""Define content hashing that skips decoding of unchanged responses."""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from yarl import URL
+
+_T = TypeVar("_T")
+
+DEFAULT_MAX_ENTRIES = 4096
+
+HashKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class ResponseTracker:
+    """Define a tracker that counts responses (and how many were unchanged)."""
+
+    responses: int = 0
+    unchanged: int = 0
+
+    @property
+    def all_unchanged(self) -> bool:
+        """Return whether every tracked response was unchanged.
+
+        Returns:
+            Whether at least one response was tracked and none of them changed.
+        """
+        return 0 < self.responses == self.unchanged
+
+
+# The trackers that are recording responses in the current context:
+_TRACKERS: ContextVar[tuple[ResponseTracker, ...]] = ContextVar(
+    "regenmaschine_response_trackers", default=()
+)
+
+
+def get_hash_key(url: URL, params: Mapping[str, Any] | None) -> HashKey:
+    """Get the key that identifies a URL (ignoring its access token).
+
+    Args:
+        url: An API URL.
+        params: The request's query parameters.
+
+    Returns:
+        The key.
+    """
+    return (
+        str(url),
+        tuple(
+            sorted(
+                (key, str(value))
+                for key, value in (params or {}).items()
+                if key != "access_token"
+            )
+        ),
+    )
+
+
+@contextmanager
+def track_responses() -> Iterator[ResponseTracker]:
+    """Track the responses to the requests made within the context.
+
+    Yields:
+        A ResponseTracker.
+    """
+    tracker = ResponseTracker()
+    token = _TRACKERS.set((*_TRACKERS.get(), tracker))
+    try:
+        yield tracker
+    finally:
+        _TRACKERS.reset(token)
+
+
+def record_response(*, unchanged: bool, count: int = 1) -> None:
+    """Record responses with every tracker in the current context.
+
+    Args:
+        unchanged: Whether the responses were unchanged.
+        count: The number of responses.
+    """
+    for tracker in _TRACKERS.get():
+        tracker.responses += count
+        if unchanged:
+            tracker.unchanged += count
+
+
+def replay_responses(tracker: ResponseTracker) -> None:
+    """Record the responses counted by another tracker in the current context.
+
+    Args:
+        tracker: A ResponseTracker.
+    """
+    if tracker.unchanged:
+        record_response(unchanged=True, count=tracker.unchanged)
+    if changed := tracker.responses - tracker.unchanged:
+        record_response(unchanged=False, count=changed)
+
+
+async def async_track_isolated(
+    awaitable: Awaitable[_T],
+) -> tuple[_T, ResponseTracker]:
+    """Await something, tracking its responses apart from the current context.
+
+    This is meant for work that is shared between callers (e.g., a coalesced request
+    that runs in its own task), so that each caller can replay the responses into its
+    own trackers.
+
+    Args:
+        awaitable: The awaitable to await.
+
+    Returns:
+        The result and a ResponseTracker.
+    """
+    token = _TRACKERS.set(())
+    try:
+        with track_responses() as tracker:
+            return await awaitable, tracker
+    finally:
+        _TRACKERS.reset(token)
+
+
+class ResponseHashes:
+    """Define a store of response body hashes (and the objects they decoded to).
+
+    When a response body hashes the same as the last one for the same URL, the object
+    it decoded to is returned as-is (rather than decoding the body again); callers
+    should treat such objects as read-only.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Initialize.
+
+        Args:
+            max_entries: The maximum number of URLs to remember (least recently used
+                URLs are forgotten first).
+        """
+        self._entries: OrderedDict[HashKey, tuple[bytes, Any]] = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of remembered URLs.
+
+        Returns:
+            The number of URLs.
+        """
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Forget every URL."""
+        self._entries.clear()
+
+    def decode(
+        self,
+        key: HashKey,
+        body: bytes,
+        decoder: Callable[[str], Any],
+        encoding: str = "utf-8",
+    ) -> tuple[Any, bool]:
+        """Decode a JSON response body (unless it's unchanged).
+
+        Args:
+            key: The key that identifies the URL.
+            body: The response body.
+            decoder: The callable used to decode JSON.
+            encoding: The response body's encoding.
+
+        Returns:
+            The decoded object and whether the body was unchanged.
+        """
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+
+        if (entry := self._entries.get(key)) is not None and entry[0] == digest:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], True
+
+        self.misses += 1
+        stripped = body.strip()
+        data = decoder(stripped.decode(encoding)) if stripped else None
+
+        self._entries[key] = (digest, data)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return data, False
+
+    def discard(self, key: HashKey) -> None:
+        """Forget a URL (e.g., because its response was an error).
+
+        Args:
+            key: The key that identifies the URL.
+        """
+        self._entries.pop(key, None)
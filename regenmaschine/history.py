@@ -0,0 +1,447 @@
+"""Define an incremental sync of watering history into a local SQLite database."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from enum import Enum
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .const import LOGGER
+from .errors import RequestError
+
+if TYPE_CHECKING:
+    from .controller import Controller
+
+_T = TypeVar("_T")
+
+DEFAULT_DAILY_STATS_CONCURRENCY = 2
+DEFAULT_INITIAL_DAYS = 30
+DEFAULT_OVERLAP_DAYS = 2
+DEFAULT_WINDOW_DAYS = 7
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    mac TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (mac, kind, day, record_key)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    mac TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (mac, kind)
+);
+"""
+
+
+class HistoryKind(str, Enum):
+    """Define the kinds of watering history that can be synced."""
+
+    DAILY_STATS = "daily_stats"
+    PAST_VALUES = "past_values"
+    WATER_LOG = "water_log"
+
+
+@dataclass
+class HistorySyncResult:
+    """Define the result of syncing a controller's history.
+
+    A kind that was only partly synced (e.g., daily stats for some days) appears in
+    both synced and errors.
+    """
+
+    mac: str
+    synced: dict[HistoryKind, int] = field(default_factory=dict)
+    errors: dict[HistoryKind, RequestError] = field(default_factory=dict)
+
+
+def _get_record_day_and_key(
+    kind: HistoryKind, record: dict[str, Any]
+) -> tuple[str, str]:
+    """Get the day a history record belongs to (and its key within that day).
+
+    Args:
+        kind: The HistoryKind of the record.
+        record: The record.
+
+    Returns:
+        The day (YYYY-MM-DD) and the key.
+    """
+    if kind is HistoryKind.PAST_VALUES:
+        return record["dateTime"][:10], str(record["pid"])
+    if kind is HistoryKind.WATER_LOG:
+        return record["date"], ""
+    return record["day"], ""
+
+
+class WateringHistory:
+    """Define a local store of watering history, synced incrementally.
+
+    Each sync fetches only the days after the last synced day (the watermark), plus a
+    few days of overlap to catch late corrections; everything else is queried locally.
+    The days are fetched in fixed-size windows, and the watermark advances after each
+    one. Records are kept per controller MAC address.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        path: str | os.PathLike[str],
+        *,
+        initial_days: int = DEFAULT_INITIAL_DAYS,
+        overlap_days: int = DEFAULT_OVERLAP_DAYS,
+        water_log_details: bool = False,
+        daily_stats_concurrency: int = DEFAULT_DAILY_STATS_CONCURRENCY,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            path: The path to the SQLite database (it's created if it doesn't exist).
+            initial_days: The number of days (up to and including today) to fetch the
+                first time a controller is synced.
+            overlap_days: The number of already-synced days to fetch again.
+            water_log_details: Whether to sync the detailed watering log.
+            daily_stats_concurrency: The maximum number of days of daily stats (which
+                are fetched one day per request) to fetch at once.
+            window_days: The maximum number of days to fetch at a time.
+
+        Raises:
+            ValueError: Raised when window_days is less than 1.
+        """
+        if window_days < 1:
+            raise ValueError(f"window_days must be at least 1 (got {window_days})")
+
+        self._connection: sqlite3.Connection | None = None
+        self._daily_stats_concurrency = daily_stats_concurrency
+        self._initial_days = initial_days
+        self._lock = asyncio.Lock()
+        self._overlap_days = overlap_days
+        self._path = path
+        self._water_log_details = water_log_details
+        self._window_days = window_days
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the database connection (opening it, if needed).
+
+        Returns:
+            A SQLite connection.
+        """
+        if self._connection is None:
+            # Every call runs in the executor (one at a time, guarded by the lock), so
+            # the connection is used from more than one thread:
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    async def _async_run(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run a database function in the executor.
+
+        Args:
+            func: The function to run.
+            *args: The function's arguments.
+
+        Returns:
+            The function's result.
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, func, *args)
+
+    def _close(self) -> None:
+        """Close the database connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _get_watermark(self, mac: str, kind: HistoryKind) -> date | None:
+        """Get the last synced day.
+
+        Args:
+            mac: The MAC address of a controller.
+            kind: A HistoryKind.
+
+        Returns:
+            The last synced day (or None if the kind was never synced).
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT day FROM watermarks WHERE mac = ? AND kind = ?",
+                (mac, kind.value),
+            )
+            .fetchone()
+        )
+        return date.fromisoformat(row[0]) if row else None
+
+    def _query(
+        self, mac: str, kind: HistoryKind, start: date, end: date
+    ) -> list[dict[str, Any]]:
+        """Query records.
+
+        Args:
+            mac: The MAC address of a controller.
+            kind: A HistoryKind.
+            start: The first day to include.
+            end: The last day to include.
+
+        Returns:
+            The records (ordered by day).
+        """
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT record FROM records WHERE mac = ? AND kind = ? "
+                "AND day BETWEEN ? AND ? ORDER BY day, record_key",
+                (mac, kind.value, start.isoformat(), end.isoformat()),
+            )
+            .fetchall()
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def _write(
+        self,
+        mac: str,
+        kind: HistoryKind,
+        records: Iterable[dict[str, Any]],
+        watermark: date | None,
+    ) -> int:
+        """Write records (replacing any already stored) and advance the watermark.
+
+        Args:
+            mac: The MAC address of a controller.
+            kind: A HistoryKind.
+            records: The records to write.
+            watermark: The new last synced day (or None to leave it as-is).
+
+        Returns:
+            The number of records written.
+        """
+        rows = [
+            (
+                mac,
+                kind.value,
+                *_get_record_day_and_key(kind, record),
+                json.dumps(record),
+            )
+            for record in records
+        ]
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if watermark is not None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                    (mac, kind.value, watermark.isoformat()),
+                )
+        return len(rows)
+
+    async def _async_fetch(
+        self, controller: Controller, kind: HistoryKind, start: date, days: int
+    ) -> tuple[list[dict[str, Any]], date | None, RequestError | None]:
+        """Fetch a window of history from a controller.
+
+        Args:
+            controller: The Controller to fetch from.
+            kind: A HistoryKind.
+            start: The first day of the window.
+            days: The number of days in the window.
+
+        Returns:
+            The records that were fetched, the last day up to which every day was
+            fetched (or None if not even the first day was), and the error that kept
+            the rest from being fetched (if any).
+        """
+        last_day = start + timedelta(days=days - 1)
+        if kind is HistoryKind.WATER_LOG:
+            records = await controller.watering.log(
+                start, days, details=self._water_log_details
+            )
+            return records, last_day, None
+        if kind is HistoryKind.PAST_VALUES:
+            return await controller.watering.runs(start, days), last_day, None
+        return await self._async_fetch_daily_stats(controller, start, days)
+
+    async def _async_fetch_daily_stats(
+        self, controller: Controller, start: date, days: int
+    ) -> tuple[list[dict[str, Any]], date | None, RequestError | None]:
+        """Fetch a window of daily stats (which can only be fetched one day at a time).
+
+        A day that fails doesn't discard the others.
+
+        Args:
+            controller: The Controller to fetch from.
+            start: The first day of the window.
+            days: The number of days in the window.
+
+        Returns:
+            The records that were fetched, the last day up to which every day was
+            fetched (or None if not even the first day was), and the first error (if
+            any).
+
+        Raises:
+            BaseException: Raised when fetching a day fails with anything other than
+                a RequestError.
+        """
+        semaphore = asyncio.Semaphore(self._daily_stats_concurrency)
+
+        async def fetch(day: date) -> dict[str, Any]:
+            """Fetch the stats of a single day.
+
+            Args:
+                day: The day.
+
+            Returns:
+                The day's stats.
+            """
+            async with semaphore:
+                return await controller.stats.on_date(day)
+
+        results = await asyncio.gather(
+            *(fetch(start + timedelta(days=offset)) for offset in range(days)),
+            return_exceptions=True,
+        )
+
+        records: list[dict[str, Any]] = []
+        last_day: date | None = None
+        error: RequestError | None = None
+        for offset, day_result in enumerate(results):
+            if isinstance(day_result, RequestError):
+                error = error or day_result
+            elif isinstance(day_result, BaseException):
+                raise day_result
+            else:
+                records.append(day_result)
+                if error is None:
+                    last_day = start + timedelta(days=offset)
+        return records, last_day, error
+
+    async def _async_sync_kind(
+        self, controller: Controller, kind: HistoryKind, today: date
+    ) -> tuple[int, RequestError | None]:
+        """Sync one kind of history.
+
+        The days are fetched one window at a time, writing each window (and advancing
+        the watermark) before fetching the next one. The watermark only advances
+        through the last day before any day that couldn't be fetched, so that the next
+        sync fetches that day again.
+
+        Args:
+            controller: The Controller to sync.
+            kind: A HistoryKind.
+            today: The last day to sync.
+
+        Returns:
+            The number of records written and the error that kept some days from being
+            synced (if any).
+        """
+        watermark = await self._async_run(self._get_watermark, controller.mac, kind)
+        if watermark is None:
+            start = today - timedelta(days=self._initial_days - 1)
+        else:
+            start = min(watermark - timedelta(days=self._overlap_days), today)
+        days = (today - start).days + 1
+
+        LOGGER.debug(
+            "Syncing %s for %s: %s days from %s",
+            kind.value,
+            controller.mac,
+            days,
+            start,
+        )
+        count = 0
+        for offset in range(0, days, self._window_days):
+            try:
+                records, last_day, error = await self._async_fetch(
+                    controller,
+                    kind,
+                    start + timedelta(days=offset),
+                    min(self._window_days, days - offset),
+                )
+            except RequestError as err:
+                if offset == 0:
+                    raise
+                # Keep the windows that were already synced:
+                return count, err
+            count += await self._async_run(
+                self._write, controller.mac, kind, records, last_day
+            )
+            if error is not None:
+                return count, error
+        return count, None
+
+    async def async_close(self) -> None:
+        """Close the database."""
+        await self._async_run(self._close)
+
+    async def async_query(
+        self, mac: str, kind: HistoryKind, start: date, end: date
+    ) -> list[dict[str, Any]]:
+        """Query synced records (without making any requests).
+
+        Args:
+            mac: The MAC address of a controller.
+            kind: A HistoryKind.
+            start: The first day to include.
+            end: The last day to include.
+
+        Returns:
+            The records (ordered by day).
+        """
+        return await self._async_run(self._query, mac, kind, start, end)
+
+    async def async_sync(
+        self,
+        controller: Controller,
+        kinds: Iterable[HistoryKind] | None = None,
+        *,
+        today: date | None = None,
+    ) -> HistorySyncResult:
+        """Sync a controller's history.
+
+        Kinds that can't be synced (e.g., those a 1st generation controller doesn't
+        support) don't fail the others; their errors are recorded instead (and their
+        watermarks aren't advanced). Likewise, daily stats that are synced for only
+        some days keep the days that were fetched.
+
+        Args:
+            controller: The Controller to sync.
+            kinds: The HistoryKinds to sync (all of them, if None).
+            today: The last day to sync (defaults to today).
+
+        Returns:
+            A HistorySyncResult.
+        """
+        kinds = list(dict.fromkeys(HistoryKind if kinds is None else kinds))
+        today = today or date.today()
+        result = HistorySyncResult(controller.mac)
+
+        results = await asyncio.gather(
+            *(self._async_sync_kind(controller, kind, today) for kind in kinds),
+            return_exceptions=True,
+        )
+        for kind, kind_result in zip(kinds, results):
+            error: RequestError | None
+            if isinstance(kind_result, RequestError):
+                error = kind_result
+            elif isinstance(kind_result, BaseException):
+                raise kind_result
+            else:
+                result.synced[kind], error = kind_result
+            if error is not None:
+                LOGGER.debug(
+                    "Unable to sync %s for %s: %s", kind.value, controller.mac, error
+                )
+                result.errors[kind] = error
+
+        return result
@@ -0,0 +1,344 @@
+"""Define per-request timing instrumentation (built on aiohttp trace hooks)."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, TypeVar
+
+from aiohttp import (
+    ClientResponse,
+    ClientSession,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceConnectionQueuedEndParams,
+    TraceConnectionQueuedStartParams,
+    TraceConnectionReuseconnParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
+    TraceRequestEndParams,
+    TraceRequestHeadersSentParams,
+)
+
+from .const import LOGGER
+from .tls import ResumingSSLObject
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class RequestTiming:  # pylint: disable=too-many-instance-attributes
+    """Define the timing breakdown (in seconds) of a single request attempt.
+
+    Phases that didn't happen (e.g., DNS resolution and connecting when a pooled
+    connection was reused) are None.
+    """
+
+    method: str
+    endpoint: str
+    mac: str | None = None
+    attempt: int = 0
+    status: int | None = None
+    queued: float | None = None
+    dns: float | None = None
+    connect: float | None = None
+    tls: float | None = None
+    ttfb: float | None = None
+    decode: float | None = None
+    total: float | None = None
+    reused_connection: bool = False
+    error: BaseException | None = None
+
+
+TimingListener = Callable[[RequestTiming], None]
+
+
+class RequestInstrumentation:
+    """Define an object that collects request timings and hands them to listeners.
+
+    Timings are only collected while at least one listener is registered. The DNS,
+    connect, TLS, and time-to-first-byte phases come from aiohttp trace hooks, so they
+    require the session to use this object's trace config (the session a Client
+    creates for itself does; a session passed to the Client must be created with
+    ClientSession(trace_configs=[client.instrumentation.trace_config])). The TLS phase
+    is read from the new connection's own ResumingSSLObject, so concurrent handshakes
+    to the same host don't skew each other.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._listeners: list[TimingListener] = []
+
+        self.trace_config = TraceConfig()
+        self.trace_config.on_connection_queued_start.append(self._on_queued_start)
+        self.trace_config.on_connection_queued_end.append(self._on_queued_end)
+        self.trace_config.on_connection_create_start.append(self._on_create_start)
+        self.trace_config.on_connection_create_end.append(self._on_create_end)
+        self.trace_config.on_connection_reuseconn.append(self._on_reuseconn)
+        self.trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        self.trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        self.trace_config.on_request_headers_sent.append(self._on_headers_sent)
+        self.trace_config.on_request_end.append(self._on_request_end)
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether any listener wants timings.
+
+        Returns:
+            Whether timings should be collected.
+        """
+        return bool(self._listeners)
+
+    def add_listener(self, listener: TimingListener) -> Callable[[], None]:
+        """Add a listener that is called with the timing of every request attempt.
+
+        Listeners run in the event loop, so they should be quick (e.g., recording the
+        timing in a metrics sink).
+
+        Args:
+            listener: A callable that accepts a RequestTiming.
+
+        Returns:
+            A callable that removes the listener.
+        """
+        self._listeners.append(listener)
+
+        def remove() -> None:
+            """Remove the listener."""
+            self._listeners.remove(listener)
+
+        return remove
+
+    async def async_time(
+        self, timing: RequestTiming | None, request: Awaitable[_T]
+    ) -> _T:
+        """Time a request (and hand the finished timing to every listener).
+
+        Args:
+            timing: The RequestTiming that the request fills in (or None if the
+                request isn't being timed).
+            request: The request to await.
+
+        Returns:
+            The request's result.
+        """
+        if timing is None:
+            return await request
+
+        start = time.monotonic()
+        try:
+            return await request
+        except BaseException as err:
+            timing.error = err
+            raise
+        finally:
+            timing.total = time.monotonic() - start
+            self.emit(timing)
+
+    def emit(self, timing: RequestTiming) -> None:
+        """Hand a finished timing to every listener.
+
+        Args:
+            timing: A RequestTiming.
+        """
+        for listener in list(self._listeners):
+            try:
+                listener(timing)
+            except Exception as err:  # noqa: BLE001  # pylint: disable=broad-except
+                # A broken listener shouldn't break requests:
+                LOGGER.exception("Error in request timing listener: %s", err)
+
+    @staticmethod
+    def _get_handshake_duration(resp: ClientResponse) -> float | None:
+        """Get the TLS handshake duration of the connection a response arrived on.
+
+        Args:
+            resp: An aiohttp ClientResponse.
+
+        Returns:
+            The handshake duration (or None if the connection doesn't use TLS).
+        """
+        if (connection := resp.connection) is None or (
+            transport := connection.transport
+        ) is None:
+            return None
+        ssl_object = transport.get_extra_info("ssl_object")
+        if not isinstance(ssl_object, ResumingSSLObject):
+            return None
+        return ssl_object.handshake_duration
+
+    @staticmethod
+    def _get_timing(ctx: SimpleNamespace) -> RequestTiming | None:
+        """Get the timing object passed to the request (if any).
+
+        Args:
+            ctx: The per-request trace context.
+
+        Returns:
+            A RequestTiming (or None if the request isn't being timed).
+        """
+        timing: Any = ctx.trace_request_ctx
+        return timing if isinstance(timing, RequestTiming) else None
+
+    async def _on_queued_start(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceConnectionQueuedStartParams,
+    ) -> None:
+        """Handle the start of waiting for a free connection in the pool.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        ctx.queued_start = time.monotonic()
+
+    async def _on_queued_end(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceConnectionQueuedEndParams,
+    ) -> None:
+        """Handle the end of waiting for a free connection in the pool.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        if timing := self._get_timing(ctx):
+            timing.queued = time.monotonic() - ctx.queued_start
+
+    async def _on_create_start(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceConnectionCreateStartParams,
+    ) -> None:
+        """Handle the start of opening a new connection.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        ctx.create_start = time.monotonic()
+
+    async def _on_create_end(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceConnectionCreateEndParams,
+    ) -> None:
+        """Handle a new connection being opened (including DNS and TLS).
+
+        The TLS handshake is subtracted once the response arrives (see
+        _on_request_end), since that's when the connection's SSL object is reachable.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        if not (timing := self._get_timing(ctx)):
+            return
+
+        connect = time.monotonic() - ctx.create_start
+        if timing.dns is not None:
+            connect -= timing.dns
+        timing.connect = max(connect, 0.0)
+
+    async def _on_reuseconn(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceConnectionReuseconnParams,
+    ) -> None:
+        """Handle a pooled connection being reused.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        if timing := self._get_timing(ctx):
+            timing.reused_connection = True
+
+    async def _on_dns_start(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceDnsResolveHostStartParams,
+    ) -> None:
+        """Handle the start of resolving a hostname.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        ctx.dns_start = time.monotonic()
+
+    async def _on_dns_end(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceDnsResolveHostEndParams,
+    ) -> None:
+        """Handle the end of resolving a hostname.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        if timing := self._get_timing(ctx):
+            timing.dns = time.monotonic() - ctx.dns_start
+
+    async def _on_headers_sent(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        _params: TraceRequestHeadersSentParams,
+    ) -> None:
+        """Handle the request headers being sent.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            _params: The trace parameters.
+        """
+        ctx.headers_sent = time.monotonic()
+
+    async def _on_request_end(
+        self,
+        _session: ClientSession,
+        ctx: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ) -> None:
+        """Handle the response headers being received.
+
+        Args:
+            _session: The aiohttp ClientSession.
+            ctx: The per-request trace context.
+            params: The trace parameters.
+        """
+        if not (timing := self._get_timing(ctx)):
+            return
+        timing.status = params.response.status
+        if (headers_sent := getattr(ctx, "headers_sent", None)) is not None:
+            timing.ttfb = time.monotonic() - headers_sent
+
+        # aiohttp doesn't trace the TLS handshake on its own, so when this attempt
+        # opened a new connection, use the duration its SSL object recorded:
+        if (
+            timing.connect is not None
+            and (tls := self._get_handshake_duration(params.response)) is not None
+        ):
+            timing.tls = tls
+            timing.connect = max(timing.connect - tls, 0.0)
@@ -0,0 +1,351 @@
+"""Define rate limiting for requests to controllers."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import re
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+# The number of seconds a waiting request must wait to be bumped up one priority
+# level (so that low-priority requests are never starved):
+DEFAULT_AGING_INTERVAL = 5.0
+
+
+class RequestPriority(IntEnum):
+    """Define the priorities of requests (lower values are sent first)."""
+
+    CRITICAL = 0
+    CONTROL = 1
+    NORMAL = 2
+    BULK = 3
+
+
+# POST endpoints that stop (or pause) watering jump ahead of everything else:
+DEFAULT_CRITICAL_ENDPOINTS = (
+    "zone/[0-9]+/stop",
+    "program/[0-9]+/stop",
+    "watering/stopall",
+    "watering/pauseall",
+)
+
+# GET endpoints that return large, detailed payloads wait behind everything else:
+DEFAULT_BULK_ENDPOINTS = (
+    "watering/log/details",
+    "dailystats/details",
+    "diag/log",
+)
+
+
+@dataclass(frozen=True)
+class RequestPrioritizer:
+    """Define how requests are prioritized.
+
+    Attributes:
+        critical_endpoints: Patterns of POST endpoints that are sent first.
+        bulk_endpoints: Patterns of GET endpoints that are sent last.
+    """
+
+    critical_endpoints: tuple[str, ...] = DEFAULT_CRITICAL_ENDPOINTS
+    bulk_endpoints: tuple[str, ...] = DEFAULT_BULK_ENDPOINTS
+    _critical_patterns: tuple[re.Pattern[str], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    _bulk_patterns: tuple[re.Pattern[str], ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Compile the endpoint patterns."""
+        object.__setattr__(
+            self,
+            "_critical_patterns",
+            tuple(re.compile(pattern) for pattern in self.critical_endpoints),
+        )
+        object.__setattr__(
+            self,
+            "_bulk_patterns",
+            tuple(re.compile(pattern) for pattern in self.bulk_endpoints),
+        )
+
+    def get_priority(self, method: str, endpoint: str) -> RequestPriority:
+        """Get the priority of a request.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+
+        Returns:
+            The request's priority.
+        """
+        if method.upper() != "GET":
+            if any(pattern.match(endpoint) for pattern in self._critical_patterns):
+                return RequestPriority.CRITICAL
+            return RequestPriority.CONTROL
+        if any(pattern.match(endpoint) for pattern in self._bulk_patterns):
+            return RequestPriority.BULK
+        return RequestPriority.NORMAL
+
+
+@dataclass(frozen=True)
+class RequestLimits:
+    """Define how many requests may be sent to a controller (or an account).
+
+    Requests are limited before identical GETs are coalesced (see
+    ClientOptions.coalesce_requests), so each coalesced caller still uses up a token
+    and an in-flight slot, even though only one of them reaches the controller. This
+    keeps a request's priority (and queue wait) the same whether or not it ends up
+    sharing a round trip, at the cost of limiting a little more than necessary.
+
+    Attributes:
+        rate: The sustained number of requests per second (or None for no limit).
+        burst: The number of requests that may be sent back-to-back before the rate
+            applies.
+        max_in_flight: The maximum number of concurrent requests (or None for no
+            limit).
+        aging_interval: The number of seconds after which a waiting request's
+            priority improves by one level.
+        prioritizer: The RequestPrioritizer that determines the order in which
+            waiting requests are sent.
+    """
+
+    rate: float | None = None
+    burst: int = 1
+    max_in_flight: int | None = None
+    aging_interval: float = DEFAULT_AGING_INTERVAL
+    prioritizer: RequestPrioritizer = field(default_factory=RequestPrioritizer)
+
+
+@dataclass
+class _Waiter:
+    """Define a request waiting at a PriorityGate."""
+
+    future: asyncio.Future[None]
+    priority: int
+    queued_at: float
+    sequence: int
+
+
+class PriorityGate:  # pylint: disable=too-few-public-methods
+    """Define a semaphore that admits waiters by priority.
+
+    Waiters of equal priority are admitted in the order they arrived. To prevent
+    starvation, a waiter's priority improves by one level for every aging interval it
+    has spent waiting.
+    """
+
+    def __init__(
+        self, capacity: int | None, aging_interval: float = DEFAULT_AGING_INTERVAL
+    ) -> None:
+        """Initialize.
+
+        Args:
+            capacity: The number of waiters that may hold the gate at once (or None
+                for no limit).
+            aging_interval: The number of seconds after which a waiter's priority
+                improves by one level.
+        """
+        self._aging_interval = aging_interval
+        self._capacity = capacity
+        self._in_use = 0
+        self._sequence = itertools.count()
+        self._waiters: list[_Waiter] = []
+
+    def _get_sort_key(self, waiter: _Waiter, now: float) -> tuple[float, int]:
+        """Get the key that determines the order in which waiters are admitted.
+
+        Args:
+            waiter: A waiter.
+            now: The current monotonic time.
+
+        Returns:
+            The sort key.
+        """
+        if self._aging_interval <= 0:
+            return (waiter.priority, waiter.sequence)
+        levels = (now - waiter.queued_at) // self._aging_interval
+        return (waiter.priority - levels, waiter.sequence)
+
+    def _has_capacity(self) -> bool:
+        """Return whether another waiter can be admitted.
+
+        Returns:
+            Whether the gate has a free slot.
+        """
+        return self._capacity is None or self._in_use < self._capacity
+
+    def _release(self) -> None:
+        """Release a slot (and admit the next waiter(s))."""
+        self._in_use -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """Admit the best waiter(s) while there's capacity.
+
+        Waiters are few (one per queued request to a single controller), so the best
+        one is found with a linear scan; a heap wouldn't account for aging.
+        """
+        now = time.monotonic()
+        while self._waiters and self._has_capacity():
+            waiter = min(
+                self._waiters, key=lambda waiter: self._get_sort_key(waiter, now)
+            )
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._in_use += 1
+            waiter.future.set_result(None)
+
+    async def _async_acquire(self, priority: int) -> None:
+        """Wait for a slot.
+
+        Args:
+            priority: The waiter's priority.
+        """
+        if self._has_capacity() and not self._waiters:
+            self._in_use += 1
+            return
+
+        waiter = _Waiter(
+            asyncio.get_running_loop().create_future(),
+            priority,
+            time.monotonic(),
+            next(self._sequence),
+        )
+        self._waiters.append(waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just before the cancellation, so give it back:
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def async_slot(self, priority: int) -> AsyncIterator[None]:
+        """Wait for a slot (holding it until the context exits).
+
+        Args:
+            priority: The waiter's priority.
+
+        Yields:
+            Nothing.
+        """
+        await self._async_acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """Define a token bucket.
+
+    Waiters are served in priority order (and, within a priority, in the order they
+    arrive).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        aging_interval: float = DEFAULT_AGING_INTERVAL,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            rate: The number of tokens added per second.
+            burst: The maximum number of tokens the bucket holds.
+            aging_interval: The number of seconds after which a waiter's priority
+                improves by one level.
+        """
+        self._capacity = float(max(burst, 1))
+        self._gate = PriorityGate(1, aging_interval)
+        self._rate = rate
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens that accrued since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    async def async_acquire(
+        self, priority: RequestPriority = RequestPriority.NORMAL
+    ) -> None:
+        """Take a token (waiting for one to accrue, if necessary).
+
+        Args:
+            priority: The waiter's priority.
+        """
+        async with self._gate.async_slot(priority):
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class RequestLimiter:  # pylint: disable=too-few-public-methods
+    """Define a limiter that combines a token bucket and a cap on in-flight requests.
+
+    Waiters are admitted in priority order, so that (e.g.) a command to stop watering
+    doesn't wait behind a backlog of polling requests.
+
+    A limiter can have a parent (e.g., an account-level limiter shared by all remote
+    controllers owned by an account); a request must get through both.
+    """
+
+    def __init__(
+        self, limits: RequestLimits, parent: RequestLimiter | None = None
+    ) -> None:
+        """Initialize.
+
+        Args:
+            limits: The RequestLimits to enforce.
+            parent: An optional parent RequestLimiter.
+        """
+        self._bucket = (
+            TokenBucket(limits.rate, limits.burst, limits.aging_interval)
+            if limits.rate is not None
+            else None
+        )
+        self._gate = (
+            PriorityGate(limits.max_in_flight, limits.aging_interval)
+            if limits.max_in_flight is not None
+            else None
+        )
+        self._parent = parent
+        self.limits = limits
+
+    @asynccontextmanager
+    async def async_slot(
+        self, priority: RequestPriority = RequestPriority.NORMAL
+    ) -> AsyncIterator[float]:
+        """Wait for a slot to send a request in (holding it until the context exits).
+
+        Args:
+            priority: The request's priority.
+
+        Yields:
+            The number of seconds spent waiting.
+        """
+        start = time.monotonic()
+        async with AsyncExitStack() as stack:
+            if self._gate is not None:
+                await stack.enter_async_context(self._gate.async_slot(priority))
+            if self._bucket is not None:
+                await self._bucket.async_acquire(priority)
+            if self._parent is not None:
+                await stack.enter_async_context(self._parent.async_slot(priority))
+            yield time.monotonic() - start
@@ -0,0 +1,322 @@
+"""Define a registry of request metrics (with Prometheus text export)."""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Request durations (in seconds) span from quick LAN calls to slow cloud round trips:
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+UNKNOWN_CONTROLLER = "unknown"
+
+_DATE_SEGMENT = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+
+
+@lru_cache(maxsize=1024)
+def normalize_endpoint(endpoint: str) -> str:
+    """Normalize an endpoint into a template (so IDs don't explode label cardinality).
+
+    For example, "zone/3/start" becomes "zone/{id}/start" and "dailystats/2023-06-01"
+    becomes "dailystats/{date}".
+
+    Args:
+        endpoint: An API URL endpoint.
+
+    Returns:
+        The endpoint template.
+    """
+    segments = []
+    for segment in endpoint.split("/"):
+        if segment.isdigit():
+            segments.append("{id}")
+        elif _DATE_SEGMENT.match(segment):
+            segments.append("{date}")
+        else:
+            segments.append(segment)
+    return "/".join(segments)
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text format.
+
+    Args:
+        value: A label value.
+
+    Returns:
+        The escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Format labels for the Prometheus text format.
+
+    Args:
+        labels: A dictionary of label names and values.
+
+    Returns:
+        The formatted labels.
+    """
+    pairs = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _render_histogram(
+    name: str, labels: dict[str, str], histogram: Histogram
+) -> list[str]:
+    """Render a histogram's samples in the Prometheus text format.
+
+    Args:
+        name: The metric name.
+        labels: A dictionary of label names and values.
+        histogram: The histogram.
+
+    Returns:
+        The rendered lines.
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip(
+        (*(repr(b) for b in histogram.buckets), "+Inf"), histogram.counts
+    ):
+        cumulative += count
+        lines.append(
+            f"{name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}"
+        )
+    formatted = _format_labels(labels)
+    lines.append(f"{name}_sum{formatted} {histogram.sum!r}")
+    lines.append(f"{name}_count{formatted} {histogram.count}")
+    return lines
+
+
+@dataclass
+class Histogram:
+    """Define a latency histogram."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+
+    def __post_init__(self) -> None:
+        """Initialize a (non-cumulative) count for each bucket (plus +Inf)."""
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Observe a value.
+
+        Args:
+            value: The value to observe.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+RequestKey = tuple[str, str, str]
+
+
+class MetricsRegistry:
+    """Define a registry of request latencies, counts, retries, errors, and waits.
+
+    Metrics are labeled by controller (MAC address) and normalized endpoint template.
+    A single registry can be shared by several Client objects.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initialize.
+
+        Args:
+            buckets: The upper bounds (in seconds) of the latency histogram buckets.
+        """
+        self._buckets = tuple(sorted(buckets))
+        self._durations: dict[RequestKey, Histogram] = {}
+        self._errors: Counter[tuple[str, str, str]] = Counter()
+        self._queue_waits: dict[tuple[str, str], Histogram] = {}
+        self._requests: Counter[RequestKey] = Counter()
+        self._retries: Counter[tuple[str, str]] = Counter()
+
+    @staticmethod
+    def _labels(controller: str | None, endpoint: str) -> tuple[str, str]:
+        """Get the controller and endpoint labels for a request.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint.
+
+        Returns:
+            The controller and endpoint template labels.
+        """
+        return controller or UNKNOWN_CONTROLLER, normalize_endpoint(endpoint)
+
+    def observe_request(
+        self,
+        controller: str | None,
+        endpoint: str,
+        method: str,
+        duration: float,
+        error: BaseException | None = None,
+    ) -> None:
+        """Observe a finished request.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint.
+            method: An HTTP method.
+            duration: The number of seconds the request took.
+            error: The error the request raised (if any).
+        """
+        controller, endpoint = self._labels(controller, endpoint)
+        key = (controller, endpoint, method.upper())
+
+        if (histogram := self._durations.get(key)) is None:
+            histogram = self._durations[key] = Histogram(self._buckets)
+        histogram.observe(duration)
+        self._requests[key] += 1
+
+        if error is not None:
+            self._errors[(controller, endpoint, type(error).__name__)] += 1
+
+    def observe_queue_wait(
+        self, controller: str | None, endpoint: str, duration: float
+    ) -> None:
+        """Observe how long a request waited for the controller's rate limiter.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint.
+            duration: The number of seconds the request waited.
+        """
+        key = self._labels(controller, endpoint)
+        if (histogram := self._queue_waits.get(key)) is None:
+            histogram = self._queue_waits[key] = Histogram(self._buckets)
+        histogram.observe(duration)
+
+    def observe_retry(self, controller: str | None, endpoint: str) -> None:
+        """Observe a request being retried.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint.
+        """
+        self._retries[self._labels(controller, endpoint)] += 1
+
+    def error_count(
+        self, controller: str | None, endpoint: str, error_type: type[BaseException]
+    ) -> int:
+        """Get the number of errors of a type that requests to an endpoint raised.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint (or endpoint template).
+            error_type: The error type.
+
+        Returns:
+            The error count.
+        """
+        controller, endpoint = self._labels(controller, endpoint)
+        return self._errors[(controller, endpoint, error_type.__name__)]
+
+    def request_count(self, controller: str | None, endpoint: str, method: str) -> int:
+        """Get the number of requests made to an endpoint.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint (or endpoint template).
+            method: An HTTP method.
+
+        Returns:
+            The request count.
+        """
+        controller, endpoint = self._labels(controller, endpoint)
+        return self._requests[(controller, endpoint, method.upper())]
+
+    def retry_count(self, controller: str | None, endpoint: str) -> int:
+        """Get the number of times requests to an endpoint were retried.
+
+        Args:
+            controller: The controller's MAC address (if known).
+            endpoint: An API URL endpoint (or endpoint template).
+
+        Returns:
+            The retry count.
+        """
+        return self._retries[self._labels(controller, endpoint)]
+
+    def render_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The rendered metrics.
+        """
+        lines = [
+            "# HELP regenmaschine_request_duration_seconds Request latency.",
+            "# TYPE regenmaschine_request_duration_seconds histogram",
+        ]
+        for key in sorted(self._durations):
+            controller, endpoint, method = key
+            lines.extend(
+                _render_histogram(
+                    "regenmaschine_request_duration_seconds",
+                    {"controller": controller, "endpoint": endpoint, "method": method},
+                    self._durations[key],
+                )
+            )
+
+        lines.extend(
+            [
+                "# HELP regenmaschine_request_queue_wait_seconds Rate limiter waits.",
+                "# TYPE regenmaschine_request_queue_wait_seconds histogram",
+            ]
+        )
+        for (controller, endpoint), histogram in sorted(
+            self._queue_waits.items(), key=lambda item: item[0]
+        ):
+            lines.extend(
+                _render_histogram(
+                    "regenmaschine_request_queue_wait_seconds",
+                    {"controller": controller, "endpoint": endpoint},
+                    histogram,
+                )
+            )
+
+        lines.extend(
+            [
+                "# HELP regenmaschine_requests_total Requests made.",
+                "# TYPE regenmaschine_requests_total counter",
+            ]
+        )
+        for (controller, endpoint, method), count in sorted(self._requests.items()):
+            formatted = _format_labels(
+                {"controller": controller, "endpoint": endpoint, "method": method}
+            )
+            lines.append(f"regenmaschine_requests_total{formatted} {count}")
+
+        lines.extend(
+            [
+                "# HELP regenmaschine_request_retries_total Requests retried.",
+                "# TYPE regenmaschine_request_retries_total counter",
+            ]
+        )
+        for (controller, endpoint), count in sorted(self._retries.items()):
+            formatted = _format_labels({"controller": controller, "endpoint": endpoint})
+            lines.append(f"regenmaschine_request_retries_total{formatted} {count}")
+
+        lines.extend(
+            [
+                "# HELP regenmaschine_request_errors_total Request errors by type.",
+                "# TYPE regenmaschine_request_errors_total counter",
+            ]
+        )
+        for (controller, endpoint, error), count in sorted(self._errors.items()):
+            formatted = _format_labels(
+                {"controller": controller, "endpoint": endpoint, "error": error}
+            )
+            lines.append(f"regenmaschine_request_errors_total{formatted} {count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,201 @@
+"""Define typed, slotted models of zones, programs, and watering queue entries."""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, TypeVar
+
+_ModelT = TypeVar("_ModelT", bound="_Model")
+
+# The key tuples of unknown fields, keyed by themselves (so that models with the same
+# unknown fields share a single tuple):
+_EXTRA_KEYS: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+class _Model:
+    """Define shared behavior for models.
+
+    Each model maps the API fields it knows about to attributes. Every other field is
+    split into extra_keys (a tuple shared by every model with the same unknown fields)
+    and extra_values, which together take less memory than the original dictionary;
+    a dictionary is only rebuilt from them when it's asked for.
+    """
+
+    __slots__ = ()
+
+    # A mapping of API field name to attribute name:
+    API_FIELDS: ClassVar[dict[str, str]] = {}
+
+    extra_keys: tuple[str, ...]
+    extra_values: tuple[Any, ...]
+
+    # typing.Self needs Python 3.11 (and this package supports 3.10):
+    @classmethod
+    def from_dict(cls: type[_ModelT], data: dict[str, Any]) -> _ModelT:  # noqa: PYI019
+        """Create a model from an API response payload.
+
+        Args:
+            data: An API response payload.
+
+        Returns:
+            A model.
+        """
+        fields = cls.API_FIELDS
+        kwargs: dict[str, Any] = {}
+        extra_keys: list[str] = []
+        extra_values: list[Any] = []
+        for key, value in data.items():
+            if (name := fields.get(key)) is not None:
+                kwargs[name] = value
+            else:
+                extra_keys.append(key)
+                extra_values.append(value)
+        if extra_keys:
+            keys = tuple(sys.intern(key) for key in extra_keys)
+            kwargs["extra_keys"] = _EXTRA_KEYS.setdefault(keys, keys)
+            kwargs["extra_values"] = tuple(extra_values)
+        return cls(**kwargs)
+
+    @property
+    def extras(self) -> dict[str, Any]:
+        """Return the fields that don't have attributes.
+
+        Returns:
+            A dictionary of API field name to value.
+        """
+        return dict(zip(self.extra_keys, self.extra_values))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a field by its API name (whether or not it has an attribute).
+
+        Args:
+            key: An API field name.
+            default: The value to return if the field doesn't exist.
+
+        Returns:
+            The field's value.
+        """
+        if (name := self.API_FIELDS.get(key)) is not None:
+            return getattr(self, name)
+        try:
+            return self.extra_values[self.extra_keys.index(key)]
+        except ValueError:
+            return default
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the model as an API response payload.
+
+        Fields that have attributes are always included (with their defaults, if the
+        API didn't return them).
+
+        Returns:
+            An API response payload.
+        """
+        return {
+            **{key: getattr(self, name) for key, name in self.API_FIELDS.items()},
+            **self.extras,
+        }
+
+
+@dataclass(slots=True)
+class ZoneData(_Model):  # pylint: disable=too-many-instance-attributes
+    """Define a zone (from Zone.all(), Zone.get(), or Zone.running())."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "uid": "uid",
+        "name": "name",
+        "active": "active",
+        "state": "state",
+        "type": "type",
+        "master": "master",
+        "restriction": "restriction",
+        "cycle": "cycle",
+        "noOfCycles": "no_of_cycles",
+        "remaining": "remaining",
+        "userDuration": "user_duration",
+        "machineDuration": "machine_duration",
+    }
+
+    uid: int
+    name: str = ""
+    active: bool = True
+    state: int = 0
+    type: int | None = None
+    master: bool = False
+    restriction: bool = False
+    cycle: int = 0
+    no_of_cycles: int = 0
+    remaining: int = 0
+    user_duration: int = 0
+    machine_duration: int = 0
+    extra_keys: tuple[str, ...] = field(default=(), repr=False)
+    extra_values: tuple[Any, ...] = field(default=(), repr=False)
+
+
+@dataclass(slots=True)
+class ProgramData(_Model):  # pylint: disable=too-many-instance-attributes
+    """Define a program (from Program.all() or Program.get())."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "uid": "uid",
+        "name": "name",
+        "active": "active",
+        "status": "status",
+        "startTime": "start_time",
+        "startDate": "start_date",
+        "endDate": "end_date",
+        "nextRun": "next_run",
+        "cycles": "cycles",
+        "soak": "soak",
+        "delay": "delay",
+        "wateringTimes": "watering_times",
+    }
+
+    uid: int
+    name: str = ""
+    active: bool = True
+    status: int = 0
+    start_time: str | None = None
+    start_date: str | None = None
+    end_date: str | None = None
+    next_run: str | None = None
+    cycles: int = 0
+    soak: int = 0
+    delay: int = 0
+    watering_times: list[dict[str, Any]] = field(default_factory=list)
+    extra_keys: tuple[str, ...] = field(default=(), repr=False)
+    extra_values: tuple[Any, ...] = field(default=(), repr=False)
+
+
+@dataclass(slots=True)
+class QueueEntry(_Model):  # pylint: disable=too-many-instance-attributes
+    """Define an entry in the watering queue (from Watering.queue())."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "zid": "zone_id",
+        "pid": "program_id",
+        "name": "name",
+        "running": "running",
+        "manual": "manual",
+        "cycle": "cycle",
+        "cycles": "cycles",
+        "remaining": "remaining",
+        "userDuration": "user_duration",
+        "machineDuration": "machine_duration",
+        "realDuration": "real_duration",
+    }
+
+    zone_id: int | None = None
+    program_id: int | None = None
+    name: str = ""
+    running: bool = False
+    manual: bool = False
+    cycle: int = 0
+    cycles: int = 0
+    remaining: int = 0
+    user_duration: int = 0
+    machine_duration: int = 0
+    real_duration: int = 0
+    extra_keys: tuple[str, ...] = field(default=(), repr=False)
+    extra_values: tuple[Any, ...] = field(default=(), repr=False)
@@ -0,0 +1,95 @@
+"""Define the options that configure a client."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .retry import RetryPolicy
+
+if TYPE_CHECKING:
+    from .breaker import BreakerState
+    from .controller import Controller
+    from .limiter import RequestLimits
+    from .metrics import MetricsRegistry
+    from .store import ControllerStore
+
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 4
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+
+
+@dataclass(frozen=True)
+class ClientOptions:  # pylint: disable=too-many-instance-attributes
+    """Define the options of a client's connection pool, requests, and controllers.
+
+    Attributes:
+        connection_limit: The total number of simultaneous connections in the
+            client-owned connection pool.
+        connection_limit_per_host: The number of simultaneous connections to a single
+            controller in the client-owned connection pool.
+        keepalive_timeout: The number of seconds an idle connection in the client-owned
+            connection pool is kept alive.
+        coalesce_requests: Whether concurrent, identical GET requests should share a
+            single in-flight request (and response payload, which callers therefore
+            shouldn't modify).
+        cache_responses: Whether each controller should cache GET responses (and evict
+            them when a POST makes them stale).
+        cache_ttls: An optional mapping of endpoint patterns to cache TTLs (in
+            seconds); defaults to regenmaschine.cache.DEFAULT_TTLS.
+        hash_responses: Whether GET response bodies should be hashed, so that a body
+            identical to the last one from the same URL isn't decoded again (the
+            previously decoded object is returned, and the response is flagged as
+            unchanged).
+        json_decoder: The callable used to decode JSON response bodies (e.g.,
+            orjson.loads); it should raise a ValueError on invalid JSON.
+        refresh_tokens: Whether controllers should keep their credentials in memory and
+            automatically log in again when their access token expires.
+        store: An optional ControllerStore; controllers found in it (with unexpired
+            access tokens) are loaded without any requests and revalidated in the
+            background.
+        metrics: An optional MetricsRegistry to record request latencies, counts,
+            retries, and errors in (it can be shared by several clients).
+        retry_policy: The RetryPolicy that determines which failed requests are retried
+            (and how); by default, only requests on connections that the controller
+            closed while idle are retried.
+        circuit_breakers: Whether each controller should fail fast (rather than waiting
+            out timeouts) after consecutive connection failures.
+        on_circuit_breaker_state_change: An optional callback that is called with the
+            controller and the old and new BreakerState whenever a controller's circuit
+            breaker changes state.
+        controller_limits: Optional RequestLimits for the rate (and concurrency) of
+            requests to each controller.
+        account_limits: Optional RequestLimits shared by all remote controllers on the
+            same RainMachine account (since they all go through the cloud).
+    """
+
+    # The connection pool:
+    connection_limit: int = DEFAULT_CONNECTION_LIMIT
+    connection_limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT
+
+    # Responses:
+    coalesce_requests: bool = False
+    cache_responses: bool = False
+    cache_ttls: Mapping[str, float] | None = None
+    hash_responses: bool = False
+    json_decoder: Callable[[str], Any] = json.loads
+
+    # Controllers:
+    refresh_tokens: bool = False
+    store: ControllerStore | None = None
+
+    # Instrumentation:
+    metrics: MetricsRegistry | None = None
+
+    # Resilience and limits:
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    circuit_breakers: bool = False
+    on_circuit_breaker_state_change: (
+        Callable[[Controller, BreakerState, BreakerState], None] | None
+    ) = None
+    controller_limits: RequestLimits | None = None
+    account_limits: RequestLimits | None = None
@@ -0,0 +1,498 @@
+"""Define a coordinator that polls many controllers on a shared schedule."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from .const import LOGGER
+from .snapshot import (
+    SnapshotPart,
+    SnapshotSection,
+    async_fetch_section,
+    get_part_fetchers,
+)
+
+if TYPE_CHECKING:
+    from .controller import Controller
+
+_T = TypeVar("_T")
+
+DEFAULT_ACTIVE_INTERVAL = 5.0
+DEFAULT_BACKOFF_FACTOR = 2.0
+DEFAULT_IDLE_INTERVAL = 300.0
+DEFAULT_LOOKAHEAD = 600.0
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_TICK = 1.0
+DEFAULT_WHEEL_SIZE = 512
+
+# The parts whose data says whether a controller is (or is about to start) watering:
+ACTIVITY_PARTS = frozenset(
+    {
+        SnapshotPart.NEXT_RUNS,
+        SnapshotPart.RUNNING_PROGRAMS,
+        SnapshotPart.RUNNING_ZONES,
+        SnapshotPart.WATERING_QUEUE,
+    }
+)
+
+PollListener = Callable[["Controller", SnapshotSection[Any]], None]
+
+
+@dataclass(frozen=True)
+class AdaptiveInterval:
+    """Define a polling interval that adapts to a controller's activity.
+
+    While the controller is watering (or a program is about to start), the interval is
+    active_interval; once the controller is idle, the interval grows by backoff_factor
+    after every refresh, up to idle_interval.
+
+    Attributes:
+        active_interval: The interval (in seconds) while the controller is active.
+        idle_interval: The maximum interval (in seconds) while the controller is idle.
+        backoff_factor: The factor the interval grows by while the controller is idle.
+        lookahead: The number of seconds before a program's next run during which the
+            controller counts as active.
+    """
+
+    active_interval: float = DEFAULT_ACTIVE_INTERVAL
+    idle_interval: float = DEFAULT_IDLE_INTERVAL
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR
+    lookahead: float = DEFAULT_LOOKAHEAD
+
+    def get_next_interval(self, current: float, active: bool) -> float:
+        """Get the interval to wait before the next refresh.
+
+        Args:
+            current: The current interval (in seconds).
+            active: Whether the controller is active.
+
+        Returns:
+            The next interval (in seconds).
+        """
+        if active:
+            return self.active_interval
+        return min(current * self.backoff_factor, self.idle_interval)
+
+
+def get_seconds_until_next_run(
+    next_runs: list[dict[str, Any]], now: datetime
+) -> float | None:
+    """Get the number of seconds until the soonest of a controller's next program runs.
+
+    The controller reports start times as HH:MM in its own local time, which is assumed
+    to match ours.
+
+    Args:
+        next_runs: The response payload of Program.next().
+        now: The current local time.
+
+    Returns:
+        The number of seconds (or None if no runs are scheduled).
+    """
+    seconds = []
+    for run in next_runs:
+        try:
+            start = datetime.strptime(run["startTime"], "%H:%M")
+        except (KeyError, TypeError, ValueError):
+            continue
+        delta = (start.hour - now.hour) * 3600 + (start.minute - now.minute) * 60
+        seconds.append((delta - now.second) % 86400)
+    return min(seconds, default=None)
+
+
+@dataclass
+class ControllerActivity:
+    """Define what the latest refreshes say about whether a controller is watering."""
+
+    queued: bool = False
+    running_programs: bool = False
+    running_zones: bool = False
+    next_runs: list[dict[str, Any]] = field(default_factory=list)
+
+    def is_active(self, lookahead: float, now: datetime | None = None) -> bool:
+        """Return whether the controller is watering (or is about to start).
+
+        Args:
+            lookahead: The number of seconds before a program's next run during which
+                the controller counts as active.
+            now: The current local time (defaults to now).
+
+        Returns:
+            Whether the controller is active.
+        """
+        if self.queued or self.running_programs or self.running_zones:
+            return True
+        seconds = get_seconds_until_next_run(self.next_runs, now or datetime.now())
+        return seconds is not None and seconds <= lookahead
+
+    def update(self, section: SnapshotSection[Any]) -> None:
+        """Update the activity from a refreshed section.
+
+        Args:
+            section: A SnapshotSection.
+        """
+        if (data := section.data) is None:
+            return
+
+        if section.part is SnapshotPart.NEXT_RUNS:
+            self.next_runs = data
+        elif section.part is SnapshotPart.RUNNING_PROGRAMS:
+            self.running_programs = any(program.get("status") for program in data)
+        elif section.part is SnapshotPart.RUNNING_ZONES:
+            self.running_zones = any(zone.get("state") for zone in data)
+        elif section.part is SnapshotPart.WATERING_QUEUE:
+            self.queued = bool(data)
+
+
+def get_start_offset(
+    controller: Controller, part: SnapshotPart, interval: float
+) -> float:
+    """Get the deterministic delay before a controller's part is first polled.
+
+    Offsets are spread uniformly across the interval (so that polls don't line up into
+    bursts) and are the same from run to run (so that restarts don't reshuffle them).
+
+    Args:
+        controller: A Controller.
+        part: A SnapshotPart.
+        interval: The polling interval (in seconds).
+
+    Returns:
+        The offset (in seconds).
+    """
+    digest = zlib.crc32(f"{controller.mac}:{part.value}".encode())
+    return interval * digest / 2**32
+
+
+@dataclass
+class _WheelEntry(Generic[_T]):
+    """Define an item scheduled on a TimerWheel."""
+
+    item: _T
+    rounds: int
+
+
+class TimerWheel(Generic[_T]):
+    """Define a hashed timer wheel.
+
+    The wheel has a fixed number of slots, each representing one tick; an item
+    scheduled N ticks out goes in the slot N positions past the cursor, along with the
+    number of full rotations to wait first. Scheduling and advancing cost O(1) per item,
+    regardless of how many items are scheduled.
+    """
+
+    def __init__(self, size: int = DEFAULT_WHEEL_SIZE) -> None:
+        """Initialize.
+
+        Args:
+            size: The number of slots.
+        """
+        self._cursor = 0
+        self._size = size
+        self._slots: list[list[_WheelEntry[_T]]] = [[] for _ in range(size)]
+
+    def __len__(self) -> int:
+        """Return the number of scheduled items.
+
+        Returns:
+            The number of items.
+        """
+        return sum(len(slot) for slot in self._slots)
+
+    def advance(self) -> list[_T]:
+        """Advance the wheel by one tick.
+
+        Returns:
+            The items that are due.
+        """
+        self._cursor = (self._cursor + 1) % self._size
+        due: list[_T] = []
+        pending: list[_WheelEntry[_T]] = []
+        for entry in self._slots[self._cursor]:
+            if entry.rounds == 0:
+                due.append(entry.item)
+            else:
+                entry.rounds -= 1
+                pending.append(entry)
+        self._slots[self._cursor] = pending
+        return due
+
+    def schedule(self, item: _T, ticks: int) -> None:
+        """Schedule an item to come due after a number of ticks.
+
+        Args:
+            item: The item to schedule.
+            ticks: The number of ticks (at least 1) until the item is due.
+        """
+        ticks = max(ticks, 1)
+        self._slots[(self._cursor + ticks) % self._size].append(
+            _WheelEntry(item, (ticks - 1) // self._size)
+        )
+
+
+@dataclass(eq=False)
+class PollJob:  # pylint: disable=too-many-instance-attributes
+    """Define the periodic refresh of one part of a controller's state."""
+
+    controller: Controller
+    part: SnapshotPart
+    interval: float | AdaptiveInterval
+    fetch: Callable[[], Awaitable[Any]] = field(repr=False)
+    active: bool = True
+    current_interval: float = field(init=False)
+    # Incremented whenever the job is rescheduled early (so that the entry already on
+    # the wheel is skipped):
+    generation: int = 0
+    in_flight: bool = False
+
+    def __post_init__(self) -> None:
+        """Set the initial interval."""
+        if isinstance(self.interval, AdaptiveInterval):
+            self.current_interval = self.interval.active_interval
+        else:
+            self.current_interval = self.interval
+
+
+class PollingCoordinator:
+    """Define a coordinator that polls many controllers.
+
+    Rather than running a sleep loop per controller, every refresh is scheduled on a
+    single timer wheel that's driven by one task; a refresh runs (in its own task) only
+    once it's due, and the number of refreshes in flight across all controllers is
+    capped. Each refresh's result is handed to every listener as a SnapshotSection.
+
+    Jobs with an AdaptiveInterval are polled often while their controller is watering
+    and back off while it's idle; a controller's activity is tracked from whichever
+    ACTIVITY_PARTS are polled for it, and when it becomes active, its backed-off jobs
+    are rescheduled right away.
+    """
+
+    def __init__(
+        self,
+        *,
+        tick: float = DEFAULT_TICK,
+        wheel_size: int = DEFAULT_WHEEL_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> None:
+        """Initialize.
+
+        Args:
+            tick: The resolution of the schedule (in seconds).
+            wheel_size: The number of slots in the timer wheel.
+            max_in_flight: The maximum number of concurrent refreshes.
+        """
+        self._activity: dict[Controller, ControllerActivity] = {}
+        self._jobs: dict[Controller, list[PollJob]] = {}
+        self._listeners: list[PollListener] = []
+        self._poll_tasks: set[asyncio.Task[None]] = set()
+        self._runner: asyncio.Task[None] | None = None
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._tick = tick
+        self._wheel: TimerWheel[tuple[PollJob, int]] = TimerWheel(wheel_size)
+
+    @property
+    def running(self) -> bool:
+        """Return whether the coordinator is running.
+
+        Returns:
+            Whether the coordinator is running.
+        """
+        return self._runner is not None and not self._runner.done()
+
+    def _get_ticks(self, delay: float) -> int:
+        """Convert a delay to a number of ticks.
+
+        Args:
+            delay: The delay (in seconds).
+
+        Returns:
+            The number of ticks.
+        """
+        return max(math.ceil(delay / self._tick), 1)
+
+    def _schedule(self, job: PollJob, delay: float) -> None:
+        """Schedule a job's next refresh.
+
+        Args:
+            job: The PollJob to schedule.
+            delay: The delay (in seconds).
+        """
+        self._wheel.schedule((job, job.generation), self._get_ticks(delay))
+
+    def add(
+        self,
+        controller: Controller,
+        part: SnapshotPart,
+        interval: float | AdaptiveInterval,
+    ) -> Callable[[], None]:
+        """Poll part of a controller's state at an interval.
+
+        Args:
+            controller: The Controller to poll.
+            part: The SnapshotPart to poll.
+            interval: The polling interval (in seconds) or an AdaptiveInterval.
+
+        Returns:
+            A callable that stops polling.
+        """
+        job = PollJob(controller, part, interval, get_part_fetchers(controller)[part])
+        self._jobs.setdefault(controller, []).append(job)
+        self._schedule(job, get_start_offset(controller, part, job.current_interval))
+
+        def remove() -> None:
+            """Stop polling."""
+            job.active = False
+            jobs = self._jobs.get(controller, [])
+            if job in jobs:
+                jobs.remove(job)
+            if not jobs:
+                self._jobs.pop(controller, None)
+                self._activity.pop(controller, None)
+
+        return remove
+
+    def add_listener(self, listener: PollListener) -> Callable[[], None]:
+        """Add a listener that is called with the result of every refresh.
+
+        Listeners run in the event loop, so they should be quick.
+
+        Args:
+            listener: A callable that accepts a Controller and a SnapshotSection.
+
+        Returns:
+            A callable that removes the listener.
+        """
+        self._listeners.append(listener)
+
+        def remove() -> None:
+            """Remove the listener."""
+            self._listeners.remove(listener)
+
+        return remove
+
+    def get_activity(self, controller: Controller) -> ControllerActivity:
+        """Get what the latest refreshes say about whether a controller is watering.
+
+        Args:
+            controller: A Controller.
+
+        Returns:
+            A ControllerActivity.
+        """
+        return self._activity.get(controller, ControllerActivity())
+
+    def _get_next_interval(self, job: PollJob) -> float:
+        """Get the interval to wait before a job's next refresh.
+
+        Args:
+            job: A PollJob.
+
+        Returns:
+            The interval (in seconds).
+        """
+        if isinstance(adaptive := job.interval, AdaptiveInterval):
+            job.current_interval = adaptive.get_next_interval(
+                job.current_interval,
+                self.get_activity(job.controller).is_active(adaptive.lookahead),
+            )
+        return job.current_interval
+
+    def _update_activity(
+        self, controller: Controller, section: SnapshotSection[Any]
+    ) -> None:
+        """Update a controller's activity (tightening its backed-off jobs if needed).
+
+        Args:
+            controller: The Controller that was polled.
+            section: The refreshed SnapshotSection.
+        """
+        if section.part not in ACTIVITY_PARTS:
+            return
+
+        activity = self._activity.setdefault(controller, ControllerActivity())
+        activity.update(section)
+
+        for job in self._jobs.get(controller, []):
+            if (
+                not isinstance(adaptive := job.interval, AdaptiveInterval)
+                or job.in_flight
+                or job.current_interval <= adaptive.active_interval
+                or not activity.is_active(adaptive.lookahead)
+            ):
+                continue
+            job.current_interval = adaptive.active_interval
+            job.generation += 1
+            self._schedule(job, job.current_interval)
+
+    def _emit(self, controller: Controller, section: SnapshotSection[Any]) -> None:
+        """Hand a refreshed section to every listener.
+
+        Args:
+            controller: The Controller that was polled.
+            section: The refreshed SnapshotSection.
+        """
+        for listener in list(self._listeners):
+            try:
+                listener(controller, section)
+            except Exception as err:  # noqa: BLE001  # pylint: disable=broad-except
+                # A broken listener shouldn't stop polling:
+                LOGGER.exception("Error in polling listener: %s", err)
+
+    async def _async_poll(self, job: PollJob) -> None:
+        """Refresh a job's part of its controller's state (and then reschedule it).
+
+        The next refresh is scheduled once this one finishes, so a slow controller is
+        never polled by more than one refresh at a time.
+
+        Args:
+            job: The PollJob to run.
+        """
+        try:
+            async with self._semaphore:
+                section = await async_fetch_section(job.controller, job.part, job.fetch)
+            if job.active:
+                self._update_activity(job.controller, section)
+                self._emit(job.controller, section)
+        finally:
+            job.in_flight = False
+            if job.active:
+                self._schedule(job, self._get_next_interval(job))
+
+    async def _async_run(self) -> None:
+        """Drive the timer wheel (one tick at a time)."""
+        start = time.monotonic()
+        ticks = 0
+        while True:
+            ticks += 1
+            # Sleep until the next tick's absolute time, so that delays don't
+            # accumulate:
+            await asyncio.sleep(max(start + ticks * self._tick - time.monotonic(), 0))
+            for job, generation in self._wheel.advance():
+                if not job.active or generation != job.generation:
+                    continue
+                job.in_flight = True
+                task = asyncio.create_task(self._async_poll(job))
+                self._poll_tasks.add(task)
+                task.add_done_callback(self._poll_tasks.discard)
+
+    def start(self) -> None:
+        """Start polling."""
+        if not self.running:
+            self._runner = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop polling (and cancel any refreshes in flight)."""
+        tasks: list[asyncio.Task[None]] = list(self._poll_tasks)
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,163 @@
+"""Define a policy for retrying failed requests."""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+
+from .errors import (
+    ConnectionFailedError,
+    RequestError,
+    RequestTimeoutError,
+    ServerError,
+)
+
+DEFAULT_RETRYABLE_ERRORS: tuple[type[RequestError], ...] = (
+    ConnectionFailedError,
+    RequestTimeoutError,
+    ServerError,
+)
+
+# Methods that can always be replayed without side effects:
+DEFAULT_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# POST endpoints that can be replayed without side effects (e.g., setters and stops);
+# anything else (starting a zone or program, rebooting, posting parser data, etc.) is
+# never retried, since the controller may have acted on the first attempt:
+DEFAULT_IDEMPOTENT_POST_ENDPOINTS = (
+    "auth/login",
+    "zone/[0-9]+/properties",
+    "zone/[0-9]+/stop",
+    "program/[0-9]+",
+    "program/[0-9]+/stop",
+    "restrictions/global",
+    "restrictions/raindelay",
+    "watering/stopall",
+    "/login/auth",
+    "/devices/(get-sprinklers|login-sprinkler)",
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:  # pylint: disable=too-many-instance-attributes
+    """Define how (and which) failed requests are retried.
+
+    The delay before retry N (starting at 0) is drawn uniformly from
+    [0, min(backoff_cap, backoff_base * 2 ** N)] ("full jitter"), so that many clients
+    recovering from the same outage don't retry in lockstep.
+    """
+
+    max_attempts: int = 1
+    backoff_base: float = 0.5
+    backoff_cap: float = 10.0
+    deadline: float | None = None
+    retryable_errors: tuple[type[RequestError], ...] = DEFAULT_RETRYABLE_ERRORS
+    idempotent_methods: frozenset[str] = DEFAULT_IDEMPOTENT_METHODS
+    idempotent_post_endpoints: tuple[str, ...] = DEFAULT_IDEMPOTENT_POST_ENDPOINTS
+    _idempotent_post_patterns: tuple[re.Pattern[str], ...] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Compile the idempotent POST endpoint patterns."""
+        object.__setattr__(
+            self,
+            "_idempotent_post_patterns",
+            tuple(re.compile(pattern) for pattern in self.idempotent_post_endpoints),
+        )
+
+    def get_backoff(self, retry: int) -> float:
+        """Get the number of seconds to wait before a retry.
+
+        Args:
+            retry: The retry number (starting at 0).
+
+        Returns:
+            The delay (in seconds).
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2**retry))
+
+    def is_idempotent(self, method: str, endpoint: str) -> bool:
+        """Return whether a request can be replayed safely.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+
+        Returns:
+            Whether the request is idempotent.
+        """
+        if method.upper() in self.idempotent_methods:
+            return True
+        return any(
+            pattern.fullmatch(endpoint) for pattern in self._idempotent_post_patterns
+        )
+
+    def should_retry(
+        self, method: str, endpoint: str, error: RequestError, attempts: int
+    ) -> bool:
+        """Return whether a failed request should be retried.
+
+        Args:
+            method: An HTTP method.
+            endpoint: An API URL endpoint.
+            error: The error the last attempt raised.
+            attempts: The number of attempts made so far.
+
+        Returns:
+            Whether to retry.
+        """
+        return (
+            attempts < self.max_attempts
+            and isinstance(error, self.retryable_errors)
+            and self.is_idempotent(method, endpoint)
+        )
+
+
+@dataclass
+class RetryState:
+    """Define the state of a request across its attempts."""
+
+    policy: RetryPolicy
+    method: str
+    endpoint: str
+    # The number of failed attempts that count against the policy:
+    attempts: int = 0
+    # The number of attempts sent (including retries on stale connections):
+    tries: int = 0
+    stale_connection_retried: bool = False
+    start: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Return the number of seconds since the first attempt.
+
+        Returns:
+            The elapsed time (in seconds).
+        """
+        return time.monotonic() - self.start
+
+    def get_retry_delay(self, error: RequestError) -> float | None:
+        """Record a failed attempt and get how long to wait before retrying it.
+
+        Args:
+            error: The error the attempt raised.
+
+        Returns:
+            The delay (in seconds), or None if the request shouldn't be retried (or
+            the retry would end after the policy's deadline).
+        """
+        self.attempts += 1
+        if not self.policy.should_retry(
+            self.method, self.endpoint, error, self.attempts
+        ):
+            return None
+
+        delay = self.policy.get_backoff(self.attempts - 1)
+        if self.policy.deadline is not None and (
+            self.elapsed + delay >= self.policy.deadline
+        ):
+            return None
+        return delay
@@ -0,0 +1,203 @@
+"""Define a snapshot of a controller's state, fetched in one call."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from .const import LOGGER
+from .errors import RequestError
+from .hashing import track_responses
+
+if TYPE_CHECKING:
+    from .controller import Controller
+
+_T = TypeVar("_T")
+
+
+class SnapshotPart(str, Enum):
+    """Define the sections of a controller that can be included in a snapshot."""
+
+    CURRENT_RESTRICTIONS = "current_restrictions"
+    DIAGNOSTICS = "diagnostics"
+    FLOWMETER = "flowmeter"
+    NEXT_RUNS = "next_runs"
+    PROGRAMS = "programs"
+    PROVISION_SETTINGS = "provision_settings"
+    RAIN_DELAY = "rain_delay"
+    RUNNING_PROGRAMS = "running_programs"
+    RUNNING_ZONES = "running_zones"
+    UNIVERSAL_RESTRICTIONS = "universal_restrictions"
+    UPCOMING_STATS = "upcoming_stats"
+    WATERING_QUEUE = "watering_queue"
+    ZONES = "zones"
+
+
+def get_part_fetchers(
+    controller: Controller,
+) -> dict[SnapshotPart, Callable[[], Awaitable[Any]]]:
+    """Get the coroutine functions that fetch each part of a controller's state.
+
+    Args:
+        controller: The Controller to fetch from.
+
+    Returns:
+        A dictionary of SnapshotPart to coroutine function.
+    """
+    return {
+        SnapshotPart.CURRENT_RESTRICTIONS: controller.restrictions.current,
+        SnapshotPart.DIAGNOSTICS: controller.diagnostics.current,
+        SnapshotPart.FLOWMETER: controller.watering.flowmeter,
+        SnapshotPart.NEXT_RUNS: controller.programs.next,
+        SnapshotPart.PROGRAMS: partial(controller.programs.all, include_inactive=True),
+        SnapshotPart.PROVISION_SETTINGS: controller.provisioning.settings,
+        SnapshotPart.RAIN_DELAY: controller.restrictions.raindelay,
+        SnapshotPart.RUNNING_PROGRAMS: controller.programs.running,
+        SnapshotPart.RUNNING_ZONES: controller.zones.running,
+        SnapshotPart.UNIVERSAL_RESTRICTIONS: controller.restrictions.universal,
+        SnapshotPart.UPCOMING_STATS: partial(controller.stats.upcoming, details=True),
+        SnapshotPart.WATERING_QUEUE: controller.watering.queue,
+        SnapshotPart.ZONES: partial(
+            controller.zones.all, details=True, include_inactive=True
+        ),
+    }
+
+
+@dataclass
+class SnapshotSection(Generic[_T]):
+    """Define a single section of a snapshot.
+
+    If the client hashes responses, unchanged is True when every response the section
+    was built from was byte-identical to the client's last one from the same URL
+    (whoever requested it, so a consumer that didn't see that response may still have
+    something new to process).
+    """
+
+    part: SnapshotPart
+    fetched_at: datetime
+    data: _T | None = None
+    error: RequestError | None = None
+    unchanged: bool = False
+
+    @property
+    def success(self) -> bool:
+        """Return whether the section was fetched successfully.
+
+        Returns:
+            Whether the section was fetched.
+        """
+        return self.error is None
+
+
+@dataclass
+class ControllerSnapshot:  # pylint: disable=too-many-instance-attributes
+    """Define a snapshot of a controller's state.
+
+    Each attribute is the SnapshotSection for the SnapshotPart of the same name (or
+    None if that part wasn't requested).
+    """
+
+    mac: str
+    taken_at: datetime
+    current_restrictions: SnapshotSection[dict[str, Any]] | None = None
+    diagnostics: SnapshotSection[dict[str, Any]] | None = None
+    flowmeter: SnapshotSection[dict[str, Any]] | None = None
+    next_runs: SnapshotSection[list[dict[str, Any]]] | None = None
+    programs: SnapshotSection[dict[int, dict[str, Any]]] | None = None
+    provision_settings: SnapshotSection[dict[str, Any]] | None = None
+    rain_delay: SnapshotSection[dict[str, Any]] | None = None
+    running_programs: SnapshotSection[list[dict[str, Any]]] | None = None
+    running_zones: SnapshotSection[list[dict[str, Any]]] | None = None
+    universal_restrictions: SnapshotSection[dict[str, Any]] | None = None
+    upcoming_stats: SnapshotSection[list[dict[str, Any]]] | None = None
+    watering_queue: SnapshotSection[list[dict[str, Any]]] | None = None
+    zones: SnapshotSection[dict[int, dict[str, Any]]] | None = None
+    _sections: dict[SnapshotPart, SnapshotSection[Any]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    @property
+    def errors(self) -> dict[SnapshotPart, RequestError]:
+        """Return the errors of sections that couldn't be fetched.
+
+        Returns:
+            A dictionary of SnapshotPart to error.
+        """
+        return {
+            part: section.error
+            for part, section in self._sections.items()
+            if section.error is not None
+        }
+
+    @property
+    def sections(self) -> dict[SnapshotPart, SnapshotSection[Any]]:
+        """Return the sections that were requested.
+
+        Returns:
+            A dictionary of SnapshotPart to SnapshotSection.
+        """
+        return dict(self._sections)
+
+    def add_section(self, section: SnapshotSection[Any]) -> None:
+        """Add a section to the snapshot.
+
+        Args:
+            section: A SnapshotSection.
+        """
+        self._sections[section.part] = section
+        setattr(self, section.part.value, section)
+
+
+async def async_fetch_section(
+    controller: Controller,
+    part: SnapshotPart,
+    fetch: Callable[[], Awaitable[Any]],
+) -> SnapshotSection[Any]:
+    """Fetch a single section of a snapshot.
+
+    Args:
+        controller: The Controller to fetch from.
+        part: The SnapshotPart to fetch.
+        fetch: The coroutine function that fetches the part.
+
+    Returns:
+        A SnapshotSection.
+    """
+    try:
+        with track_responses() as tracker:
+            data = await fetch()
+    except RequestError as err:
+        # Gen 1 controllers don't support every section (and one failing section
+        # shouldn't spoil the rest):
+        LOGGER.debug("Unable to fetch %s for %s: %s", part.value, controller.mac, err)
+        return SnapshotSection(part, datetime.now(), error=err)
+    return SnapshotSection(
+        part, datetime.now(), data=data, unchanged=tracker.all_unchanged
+    )
+
+
+async def async_take_snapshot(
+    controller: Controller, parts: Iterable[SnapshotPart] | None = None
+) -> ControllerSnapshot:
+    """Fetch several sections of a controller's state concurrently.
+
+    Args:
+        controller: The Controller to fetch from.
+        parts: The SnapshotParts to fetch (all of them, if None).
+
+    Returns:
+        A ControllerSnapshot.
+    """
+    fetchers = get_part_fetchers(controller)
+    parts = list(dict.fromkeys(SnapshotPart if parts is None else parts))
+    snapshot = ControllerSnapshot(controller.mac, datetime.now())
+    for section in await asyncio.gather(
+        *(async_fetch_section(controller, part, fetchers[part]) for part in parts)
+    ):
+        snapshot.add_section(section)
+    return snapshot
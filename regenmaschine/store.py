@@ -0,0 +1,198 @@
+"""Define an on-disk store of controller metadata (for warm restarts)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+from .const import LOGGER
+
+STORE_VERSION = 1
+
+# Access tokens are stored in the file, so only the current user may read it:
+STORE_FILE_MODE = 0o600
+
+
+@dataclass
+class ControllerRecord:  # pylint: disable=too-many-instance-attributes
+    """Define the stored state of a single controller."""
+
+    mac: str
+    base_url: str
+    use_ssl: bool
+    name: str
+    api_version: str
+    hardware_version: str
+    software_version: str
+    access_token: str | None = None
+    # A POSIX timestamp (rather than a monotonic one) so that it survives restarts:
+    access_token_expiration: float | None = None
+    # Only set for remote controllers:
+    email: str | None = None
+    sprinkler_id: str | None = None
+
+    @property
+    def has_valid_token(self) -> bool:
+        """Return whether the record holds an access token that hasn't expired.
+
+        Returns:
+            Whether the token can be used.
+        """
+        if not self.access_token:
+            return False
+        if self.access_token_expiration is None:
+            # The RainMachine cloud doesn't say when its tokens expire:
+            return True
+        return time.time() < self.access_token_expiration
+
+
+class ControllerStore:
+    """Define a JSON file of controller records, keyed by MAC address.
+
+    Passwords are never stored; only access tokens (which expire) are.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        """Initialize.
+
+        Args:
+            path: The path to the JSON file.
+        """
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._path = Path(path)
+        self._records: dict[str, ControllerRecord] = {}
+
+    @property
+    def records(self) -> dict[str, ControllerRecord]:
+        """Return the stored records.
+
+        Returns:
+            A dictionary of ControllerRecord objects, keyed by MAC address.
+        """
+        return dict(self._records)
+
+    def _read(self) -> dict[str, ControllerRecord]:
+        """Read the records from disk.
+
+        Returns:
+            A dictionary of ControllerRecord objects, keyed by MAC address.
+        """
+        try:
+            raw = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            LOGGER.warning(
+                "Ignoring unreadable controller store %s: %s", self._path, err
+            )
+            return {}
+
+        if not isinstance(raw, dict) or raw.get("version") != STORE_VERSION:
+            LOGGER.warning(
+                "Ignoring controller store with unknown version: %s", self._path
+            )
+            return {}
+
+        names = {field.name for field in fields(ControllerRecord)}
+        records = {}
+        for data in raw.get("controllers", []):
+            try:
+                record = ControllerRecord(
+                    **{k: v for k, v in data.items() if k in names}
+                )
+            except TypeError as err:
+                LOGGER.debug("Ignoring malformed controller record: %s", err)
+                continue
+            records[record.mac] = record
+        return records
+
+    def _write(self, records: list[ControllerRecord]) -> None:
+        """Atomically write records to disk.
+
+        Args:
+            records: The records to write.
+        """
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, STORE_FILE_MODE)
+        with os.fdopen(fd, "w", encoding="utf-8") as fptr:
+            json.dump(
+                {
+                    "version": STORE_VERSION,
+                    "controllers": [asdict(record) for record in records],
+                },
+                fptr,
+            )
+        os.replace(tmp_path, self._path)
+
+    async def async_load(self) -> None:
+        """Load the records from disk (once)."""
+        async with self._lock:
+            if self._loaded:
+                return
+            loop = asyncio.get_running_loop()
+            self._records = await loop.run_in_executor(None, self._read)
+            self._loaded = True
+
+    async def async_save(self) -> None:
+        """Save the records to disk."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write, list(self._records.values()))
+
+    def find_local(self, base_url: str) -> ControllerRecord | None:
+        """Find the record of a local controller.
+
+        Args:
+            base_url: The controller's API base URL.
+
+        Returns:
+            The matching record (if it exists).
+        """
+        for record in self._records.values():
+            if record.sprinkler_id is None and record.base_url == base_url:
+                return record
+        return None
+
+    def find_remote(self, email: str) -> list[ControllerRecord]:
+        """Find the records of the remote controllers owned by an account.
+
+        Args:
+            email: A RainMachine account email address.
+
+        Returns:
+            The matching records.
+        """
+        return [record for record in self._records.values() if record.email == email]
+
+    def get(self, mac: str) -> ControllerRecord | None:
+        """Get a record.
+
+        Args:
+            mac: The controller's MAC address.
+
+        Returns:
+            The record (if it exists).
+        """
+        return self._records.get(mac)
+
+    def remove(self, mac: str) -> None:
+        """Remove a record.
+
+        Args:
+            mac: The controller's MAC address.
+        """
+        self._records.pop(mac, None)
+
+    def set(self, record: ControllerRecord) -> None:
+        """Add or replace a record.
+
+        Args:
+            record: The record to store.
+        """
+        self._records[record.mac] = record
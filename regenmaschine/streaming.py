@@ -0,0 +1,346 @@
+"""Define incremental parsing of the items of large JSON arrays."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import ClientResponse
+from yarl import URL
+
+from .errors import RequestError, raise_for_error
+
+DEFAULT_STREAM_BUFFER = 64
+DEFAULT_STREAM_CHUNK_SIZE = 65536
+
+# The characters that change the parser's state (everything else is skipped):
+_TOKEN = re.compile(r'[\[\]{}",:]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+@dataclass
+class _Frame:
+    """Define an open container (outside of the items being parsed)."""
+
+    container: str
+    key: str | None = None
+    expecting_key: bool = False
+
+
+class JSONItemParser:  # pylint: disable=too-many-instance-attributes
+    """Define a parser that returns the items of a JSON array as they arrive.
+
+    The array is found by its path of object keys from the root of the document (e.g.,
+    ("waterLog", "days")); only the item currently being received is buffered, so
+    memory scales with the largest item rather than with the whole document. The
+    scalar members of the root object (e.g., "statusCode") are kept, so that error
+    payloads can still be detected.
+
+    Only the structure needed to find the items is checked; each item is then decoded
+    in full.
+    """
+
+    def __init__(
+        self, path: Iterable[str], decoder: Callable[[str], Any] = json.loads
+    ) -> None:
+        """Initialize.
+
+        Args:
+            path: The object keys that lead to the array (empty for a root array).
+            decoder: The callable used to decode each item.
+        """
+        self._buffer = ""
+        self._found = False
+        self._frames: list[_Frame] = []
+        self._item_depth = 0
+        self._item_start: int | None = None
+        self._member_start: int | None = None
+        self._pos = 0
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = decoder
+        self.path = tuple(path)
+        self.scalars: dict[str, Any] = {}
+
+    @property
+    def found(self) -> bool:
+        """Return whether the array was found.
+
+        Returns:
+            Whether the array was found (so far).
+        """
+        return self._found
+
+    def _compact(self) -> None:
+        """Drop the part of the buffer that has already been parsed."""
+        start = min(
+            start
+            for start in (self._pos, self._item_start, self._member_start)
+            if start is not None
+        )
+        if not start:
+            return
+        self._buffer = self._buffer[start:]
+        self._pos -= start
+        if self._item_start is not None:
+            self._item_start -= start
+        if self._member_start is not None:
+            self._member_start -= start
+
+    def _is_target(self) -> bool:
+        """Return whether an array opened now would be the one being parsed.
+
+        Returns:
+            Whether the open containers lead to the array.
+        """
+        return len(self._frames) == len(self.path) and all(
+            frame.container == "{" and frame.key == key
+            for frame, key in zip(self._frames, self.path)
+        )
+
+    def _scan(self, items: list[Any]) -> None:
+        """Parse as much of the buffer as possible.
+
+        Args:
+            items: The list to append complete items to.
+        """
+        buffer = self._buffer
+        pos = self._pos
+
+        while (match := _TOKEN.search(buffer, pos)) is not None:
+            char = match.group()
+            index = match.start()
+
+            if char == '"':
+                if (end := self._scan_string(buffer, index)) is None:
+                    # The string hasn't been fully received yet:
+                    pos = index
+                    break
+                pos = end
+                continue
+
+            pos = index + 1
+            if self._item_depth:
+                self._scan_in_item(char)
+            elif self._item_start is not None:
+                self._scan_item_level(char, buffer, index, items)
+            else:
+                self._scan_structure(char, buffer, index)
+        else:
+            pos = len(buffer)
+
+        self._pos = pos
+
+    def _scan_in_item(self, char: str) -> None:
+        """Handle a token within an item (where only its nesting matters).
+
+        Args:
+            char: The token.
+        """
+        if char in "[{":
+            self._item_depth += 1
+        elif char in "]}":
+            self._item_depth -= 1
+
+    def _scan_item_level(
+        self, char: str, buffer: str, index: int, items: list[Any]
+    ) -> None:
+        """Handle a token at the level of the array's items.
+
+        Args:
+            char: The token.
+            buffer: The buffer.
+            index: The token's index in the buffer.
+            items: The list to append complete items to.
+        """
+        if char in "[{":
+            self._item_depth = 1
+        elif char in ",]":
+            if text := buffer[self._item_start : index].strip():
+                items.append(self.decoder(text))
+            self._item_start = index + 1
+            if char == "]":
+                self._frames.pop()
+                self._item_start = None
+
+    def _scan_string(self, buffer: str, index: int) -> int | None:
+        """Handle a string (keeping track of object keys outside of items).
+
+        Args:
+            buffer: The buffer.
+            index: The index of the string's opening quote in the buffer.
+
+        Returns:
+            The index just past the string (or None if it hasn't been fully received).
+        """
+        if (string := _STRING.match(buffer, index)) is None:
+            return None
+        if not self._item_depth and self._frames and self._frames[-1].expecting_key:
+            self._frames[-1].key = json.loads(string.group())
+            self._frames[-1].expecting_key = False
+        return string.end()
+
+    def _scan_structure(self, char: str, buffer: str, index: int) -> None:
+        """Handle a token in the containers that lead to the array (or around it).
+
+        Args:
+            char: The token.
+            buffer: The buffer.
+            index: The token's index in the buffer.
+        """
+        if char in "[{":
+            if len(self._frames) == 1:
+                # A root member that's a container isn't kept:
+                self._member_start = None
+            if char == "[" and not self._found and self._is_target():
+                self._found = True
+                self._item_start = index + 1
+            self._frames.append(_Frame(char, expecting_key=char == "{"))
+        elif char in "]}":
+            self._store_member(buffer, index)
+            self._frames.pop()
+        elif char == ",":
+            self._store_member(buffer, index)
+            if self._frames[-1].container == "{":
+                self._frames[-1].expecting_key = True
+        elif len(self._frames) == 1:
+            self._member_start = index + 1
+
+    def _store_member(self, buffer: str, end: int) -> None:
+        """Store the root member whose value ends at an index (if it's a scalar).
+
+        Args:
+            buffer: The buffer.
+            end: The index that the member's value ends at.
+        """
+        if len(self._frames) != 1 or self._member_start is None:
+            return
+        if (key := self._frames[0].key) is not None:
+            self.scalars[key] = self.decoder(buffer[self._member_start : end].strip())
+        self._member_start = None
+
+    def close(self) -> list[Any]:
+        """Finish parsing.
+
+        Returns:
+            Any remaining items.
+
+        Raises:
+            ValueError: Raised when the document is incomplete.
+        """
+        items = self.feed(b"", final=True)
+        if self._frames or self._buffer[self._pos :].strip():
+            raise ValueError("Incomplete JSON document")
+        return items
+
+    def feed(self, data: bytes, *, final: bool = False) -> list[Any]:
+        """Parse the next part of the document.
+
+        Args:
+            data: The next part of the (UTF-8 encoded) document.
+            final: Whether this is the last part of the document.
+
+        Returns:
+            The items that were completed by this part.
+        """
+        self._buffer += self._text.decode(data, final)
+        items: list[Any] = []
+        self._scan(items)
+        self._compact()
+        return items
+
+    def reset(self) -> None:
+        """Forget everything that has been parsed (e.g., to parse a new document)."""
+        self._buffer = ""
+        self._found = False
+        self._frames = []
+        self._item_depth = 0
+        self._item_start = None
+        self._member_start = None
+        self._pos = 0
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self.scalars = {}
+
+
+class ItemStream:
+    """Define a stream that hands the items of a JSON array to a sink as they arrive."""
+
+    def __init__(
+        self, path: Iterable[str], sink: Callable[[Any], Awaitable[None]]
+    ) -> None:
+        """Initialize.
+
+        Args:
+            path: The object keys that lead to the array (empty for a root array).
+            sink: A coroutine function that is awaited with each item.
+        """
+        self.items = 0
+        self.parser = JSONItemParser(path)
+        self.sink = sink
+
+    async def _async_deliver(self, items: list[Any]) -> None:
+        """Hand items to the sink.
+
+        Args:
+            items: The items.
+        """
+        for item in items:
+            await self.sink(item)
+            self.items += 1
+
+    async def async_close(self) -> None:
+        """Finish parsing (and hand any remaining items to the sink)."""
+        await self._async_deliver(self.parser.close())
+
+    async def async_read(
+        self, resp: ClientResponse, decoder: Callable[[str], Any]
+    ) -> None:
+        """Parse a response body as it arrives.
+
+        Args:
+            resp: An aiohttp ClientResponse.
+            decoder: The callable used to decode each item.
+        """
+        self.start(decoder)
+        async for chunk in resp.content.iter_chunked(DEFAULT_STREAM_CHUNK_SIZE):
+            await self.async_feed(chunk)
+        await self.async_close()
+
+    async def async_feed(self, data: bytes) -> None:
+        """Parse the next part of the response body.
+
+        Args:
+            data: The next part of the response body.
+        """
+        await self._async_deliver(self.parser.feed(data))
+
+    def start(self, decoder: Callable[[str], Any]) -> None:
+        """Prepare to parse a new response body.
+
+        Args:
+            decoder: The callable used to decode each item.
+        """
+        self.parser.decoder = decoder
+        self.parser.reset()
+
+    def raise_for_error(self, resp: ClientResponse, url: URL) -> None:
+        """Raise if a streamed response was an error (or didn't contain the array).
+
+        Only the scalar members of the root object (e.g., "statusCode") are kept, which
+        is all that errors need.
+
+        Args:
+            resp: An aiohttp ClientResponse.
+            url: The URL that was requested.
+
+        Raises:
+            RequestError: Raised when the array wasn't found.
+        """
+        raise_for_error(resp, self.parser.scalars)
+        if not self.parser.found:
+            raise RequestError(
+                f"No {'.'.join(self.parser.path)} array in response from {url}"
+            )
@@ -0,0 +1,190 @@
+"""Define TLS helpers for connecting to RainMachine controllers."""
+
+from __future__ import annotations
+
+import ssl
+import time
+from dataclasses import dataclass
+from functools import cache
+from typing import TypeVar
+
+_ContextT = TypeVar("_ContextT", bound="ResumingSSLContext")
+
+
+@dataclass
+class HandshakeStats:
+    """Define TLS handshake statistics for a single controller host."""
+
+    full_handshakes: int = 0
+    resumed_handshakes: int = 0
+    total_handshake_time: float = 0.0
+    last_handshake_time: float | None = None
+
+    @property
+    def average_handshake_time(self) -> float | None:
+        """Return the average handshake duration (in seconds).
+
+        Returns:
+            The average duration, or None if no handshake has happened.
+        """
+        if not (handshakes := self.full_handshakes + self.resumed_handshakes):
+            return None
+        return self.total_handshake_time / handshakes
+
+
+class ResumingSSLObject(ssl.SSLObject):
+    """Define an SSLObject that times its handshake and reports its session."""
+
+    handshake_duration: float | None = None
+    _handshake_started: float | None = None
+
+    def do_handshake(self) -> None:
+        """Start (or continue) the SSL/TLS handshake.
+
+        asyncio calls this repeatedly (as data arrives) until the handshake completes,
+        so the duration spans from the first call to the one that succeeds.
+        """
+        if self._handshake_started is None:
+            self._handshake_started = time.monotonic()
+
+        super().do_handshake()
+
+        self.handshake_duration = time.monotonic() - self._handshake_started
+        context = self.context
+        if isinstance(context, ResumingSSLContext) and self.server_hostname:
+            context.record_handshake(
+                self.server_hostname,
+                self.session,
+                self.session_reused,
+                self.handshake_duration,
+            )
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """Define an SSLContext that resumes TLS sessions per controller host.
+
+    Cached sessions and handshake stats are keyed by hostname alone, since that's all
+    the SSL layer is told about a connection. Controllers reached through the same
+    hostname on different ports (e.g., behind port forwarding) therefore share a cached
+    session and stats; a controller that doesn't recognize the offered session simply
+    performs a full handshake.
+    """
+
+    sslobject_class = ResumingSSLObject
+
+    handshake_stats: dict[str, HandshakeStats]
+    _sessions: dict[str, ssl.SSLSession]
+
+    # typing.Self needs Python 3.11 (and this package supports 3.10):
+    def __new__(  # noqa: PYI019
+        cls: type[_ContextT], protocol: int = ssl.PROTOCOL_TLS_CLIENT
+    ) -> _ContextT:
+        """Create the context.
+
+        SSLContext takes its protocol in __new__ (rather than __init__), so it's
+        forwarded from here.
+
+        Args:
+            protocol: The SSL/TLS protocol to use.
+
+        Returns:
+            A ResumingSSLContext.
+        """
+        context = super().__new__(cls, protocol)
+        context.handshake_stats = {}
+        context._sessions = {}  # pylint: disable=protected-access
+        return context
+
+    def forget_session(self, server_hostname: str) -> None:
+        """Drop the cached TLS session for a host (forcing a full handshake).
+
+        Args:
+            server_hostname: The controller host.
+        """
+        self._sessions.pop(server_hostname, None)
+
+    def record_handshake(
+        self,
+        server_hostname: str,
+        session: ssl.SSLSession | None,
+        reused: bool,
+        duration: float,
+    ) -> None:
+        """Record a completed handshake and cache its session for later resumption.
+
+        Args:
+            server_hostname: The controller host.
+            session: The TLS session negotiated by the handshake.
+            reused: Whether the handshake resumed an earlier session.
+            duration: The number of seconds the handshake took.
+        """
+        stats = self.handshake_stats.setdefault(server_hostname, HandshakeStats())
+        if reused:
+            stats.resumed_handshakes += 1
+        else:
+            stats.full_handshakes += 1
+        stats.total_handshake_time += duration
+        stats.last_handshake_time = duration
+
+        if session is not None:
+            self._sessions[server_hostname] = session
+
+    def wrap_bio(  # type: ignore[override]  # pylint: disable=too-many-arguments
+        self,
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,
+        server_hostname: str | None = None,
+        session: ssl.SSLSession | None = None,
+    ) -> ssl.SSLObject:
+        """Wrap BIO objects, offering a cached session for the host (if one exists).
+
+        Args:
+            incoming: The incoming BIO.
+            outgoing: The outgoing BIO.
+            server_side: Whether this is a server-side connection.
+            server_hostname: The host being connected to.
+            session: An optional TLS session to resume.
+
+        Returns:
+            An SSLObject.
+        """
+        if session is None and not server_side and server_hostname:
+            session = self._sessions.get(server_hostname)
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side=server_side,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+
+@cache
+def get_ssl_context() -> ResumingSSLContext:
+    """Get the process-wide SSL context used to connect to controllers.
+
+    Building an SSLContext is not free, so every Client shares this one (which also
+    lets TLS sessions negotiated by one Client be resumed by another).
+
+    Returns:
+        A ResumingSSLContext.
+    """
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+    # The local API on Gen 1 controllers uses outdated RSA ciphers (and there isn't
+    # any indication that they'll be updated). Python 3.10+ enforces minimum TLS
+    # standards that the Gen 1 can't support, so to keep compatibility, we loosen
+    # things up:
+    #   1. We set a minimum TLS version of SSLv3
+    #   2. We utilize the "DEFAULT" cipher suite (which includes old RSA ciphers).
+    #   3. We don't validate the hostname.
+    #   4. We allow self-signed certificates.
+    #   5. We allow legacy server connections.
+    context.minimum_version = ssl.TLSVersion.SSLv3
+    context.set_ciphers("DEFAULT:@SECLEVEL=0")
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    context.options |= getattr(ssl, "OP_LEGACY_SERVER_CONNECT", 0x4)
+
+    return context
@@ -305,3 +305,52 @@ async def test_program_start_and_stop(
             assert data["message"] == "OK"
 
     aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_program_typed(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    program_response: dict[str, Any],
+) -> None:
+    """Test getting programs as typed models.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        program_response: An API response payload.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/program",
+            "get",
+            response=aiohttp.web_response.json_response(program_response, status=200),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/program/1",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("program_id_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            programs = await controller.programs.all(include_inactive=True, typed=True)
+            assert len(programs) == 2
+            assert programs[1].name == "Morning"
+            assert programs[1].start_time == "06:00"
+
+            program = await controller.programs.get(1, typed=True)
+            assert program.uid == 1
+            assert program.watering_times[0]["name"] == "Landscaping"
+            assert program.extras["frequency"] == {"type": 0, "param": "0"}
+
+    aresponses.assert_plan_strictly_followed()
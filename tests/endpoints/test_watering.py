@@ -2,13 +2,16 @@
 
 import datetime
 import json
+from collections.abc import AsyncGenerator
 from typing import Any, cast
+from unittest.mock import AsyncMock
 
 import aiohttp
 import pytest
 from aresponses import ResponsesMockServer
 
 from regenmaschine import Client
+from regenmaschine.controller import LocalController
 from tests.common import TEST_HOST, TEST_PASSWORD, TEST_PORT, load_fixture
 
 
@@ -60,6 +63,129 @@ async def test_watering_log_details(
     aresponses.assert_plan_strictly_followed()
 
 
+@pytest.mark.asyncio
+async def test_watering_log_range(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test getting watering log info for a long range in chunks.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    windows = {
+        "2018-06-01/2": ["2018-06-02", "2018-06-01", "2018-06-03"],
+        "2018-06-03/2": ["2018-06-03", "2018-06-04"],
+        "2018-06-05/1": ["2018-06-05"],
+    }
+
+    async with authenticated_local_client:
+        for window, dates in windows.items():
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/watering/log/{window}",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    {"waterLog": {"days": [{"date": date} for date in dates]}},
+                    status=200,
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            days = [
+                day
+                async for day in controller.watering.log_range(
+                    datetime.date(2018, 6, 1), 5, chunk_days=2, max_concurrency=2
+                )
+            ]
+            assert [day["date"] for day in days] == [
+                "2018-06-01",
+                "2018-06-02",
+                "2018-06-03",
+                "2018-06-04",
+                "2018-06-05",
+            ]
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_watering_log_range_stop(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that windows still being fetched are cancelled when iteration stops.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        for date in ("2018-06-01", "2018-06-02"):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/watering/log/{date}/1",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    {"waterLog": {"days": [{"date": date}]}}, status=200
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            days = cast(
+                AsyncGenerator[dict[str, Any], None],
+                controller.watering.log_range(
+                    datetime.date(2018, 6, 1), 2, chunk_days=1, max_concurrency=2
+                ),
+            )
+            day = await anext(days)
+            assert day["date"] == "2018-06-01"
+            await days.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "chunk_days,max_concurrency,message",
+    [
+        (0, 2, "chunk_days must be at least 1"),
+        (7, 0, "max_concurrency must be at least 1"),
+    ],
+)
+async def test_watering_log_range_invalid(
+    chunk_days: int, max_concurrency: int, message: str
+) -> None:
+    """Test that invalid window settings are rejected before any request is made.
+
+    Args:
+        chunk_days: The number of days to request at a time.
+        max_concurrency: The maximum number of windows to request at once.
+        message: The expected error message.
+    """
+    request = AsyncMock()
+    controller = LocalController(request, TEST_HOST, TEST_PORT)
+
+    with pytest.raises(ValueError, match=message):
+        async for _ in controller.watering.log_range(
+            datetime.date(2018, 6, 1),
+            7,
+            chunk_days=chunk_days,
+            max_concurrency=max_concurrency,
+        ):
+            pass
+    request.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_watering_pause(
     aresponses: ResponsesMockServer,
@@ -143,6 +269,55 @@ async def test_watering_queue(
     aresponses.assert_plan_strictly_followed()
 
 
+@pytest.mark.asyncio
+async def test_watering_queue_typed(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test getting the watering queue as typed models.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                {
+                    "queue": [
+                        {
+                            "zid": 1,
+                            "pid": 2,
+                            "name": "Landscaping",
+                            "running": True,
+                            "remaining": 120,
+                            "availableWater": 0,
+                        }
+                    ]
+                },
+                status=200,
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            entries = await controller.watering.queue(typed=True)
+            assert len(entries) == 1
+            assert entries[0].zone_id == 1
+            assert entries[0].program_id == 2
+            assert entries[0].running
+            assert entries[0].extras == {"availableWater": 0}
+
+    aresponses.assert_plan_strictly_followed()
+
+
 @pytest.mark.asyncio
 async def test_watering_past(
     aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
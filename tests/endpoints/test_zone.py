@@ -332,3 +332,72 @@ async def test_zone_start_stop(
             assert data["message"] == "OK"
 
     aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_zone_typed(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    zone_id_response: dict[str, Any],
+) -> None:
+    """Test getting zones as typed models.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        zone_id_response: An API response payload.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/zone",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("zone_response.json")), status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/zone/properties",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("zone_properties_response.json")), status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/zone/1",
+            "get",
+            response=aiohttp.web_response.json_response(zone_id_response, status=200),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/zone",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_zone_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            zones = await controller.zones.all(details=True, typed=True)
+            assert len(zones) == 2
+            assert zones[1].name == "Landscaping"
+            assert zones[1].active is True
+            assert zones[1].get("ETcoef") == 0.80000000000000004
+
+            zone = await controller.zones.get(1, typed=True)
+            assert zone.uid == 1
+            assert zone.to_dict() == zone_id_response
+
+            running = await controller.zones.running(typed=True)
+            assert len(running) == 12
+            assert running[0].name == "Zone 1"
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,124 @@
+"""Define tests for columnar watering history analytics."""
+
+import datetime
+import json
+import math
+from collections import defaultdict
+from typing import Any
+
+import pytest
+
+from tests.common import load_fixture
+
+np = pytest.importorskip("numpy")
+
+# pylint: disable-next=wrong-import-position
+from regenmaschine.analytics import (
+    ColumnarTable,
+    RunsTable,
+    WateringLogTable,
+)
+
+
+@pytest.fixture(name="watering_log_days")
+def watering_log_days_fixture() -> list[dict[str, Any]]:
+    """Return the days of a watering log.
+
+    Returns:
+        A list of days.
+    """
+    data = json.loads(load_fixture("watering_log_response.json"))
+    return list(data["waterLog"]["days"])
+
+
+def test_watering_log_table(watering_log_days: list[dict[str, Any]]) -> None:
+    """Test flattening and aggregating a watering log.
+
+    Args:
+        watering_log_days: The days of a watering log.
+    """
+    expected: dict[str, dict[Any, float]] = {
+        "day": defaultdict(float),
+        "program": defaultdict(float),
+        "scheduled": defaultdict(float),
+        "zone": defaultdict(float),
+    }
+    cycles = 0
+    for day in watering_log_days:
+        for program in day["programs"]:
+            for zone in program["zones"]:
+                for cycle in zone["cycles"]:
+                    cycles += 1
+                    date = datetime.date.fromisoformat(day["date"])
+                    expected["day"][date] += cycle["realDuration"]
+                    expected["program"][program["id"]] += cycle["realDuration"]
+                    expected["scheduled"][zone["uid"]] += cycle["userDuration"]
+                    expected["zone"][zone["uid"]] += cycle["realDuration"]
+
+    table = WateringLogTable.from_days(watering_log_days)
+    assert len(table) == cycles
+    assert table["date"].dtype == np.dtype("datetime64[D]")
+    assert np.isnan(table["volume"]).all()
+
+    assert table.total_by_day() == expected["day"]
+    assert table.total_by_program() == expected["program"]
+    assert table.total_by_zone() == expected["zone"]
+    assert table.total_by_zone("volume") == {uid: 0.0 for uid in expected["zone"]}
+
+    comparison = table.get_runtime_comparison()
+    assert {uid: item.scheduled for uid, item in comparison.items()} == dict(
+        expected["scheduled"]
+    )
+    assert {uid: item.actual for uid, item in comparison.items()} == dict(
+        expected["zone"]
+    )
+    assert comparison[1].ratio == expected["zone"][1] / expected["scheduled"][1]
+
+
+def test_watering_log_table_volume() -> None:
+    """Test that cycle volumes are kept (when reported)."""
+    table = WateringLogTable.from_days(
+        [
+            {
+                "date": "2018-06-01",
+                "programs": [
+                    {
+                        "id": 1,
+                        "zones": [
+                            {"uid": 1, "cycles": [{"realDuration": 60, "volume": 2.5}]},
+                            {"uid": 2, "cycles": [{"realDuration": 30}]},
+                        ],
+                    }
+                ],
+            }
+        ]
+    )
+    assert table.total_by_zone("volume") == {1: 2.5, 2: 0.0}
+    assert math.isnan(table.get_runtime_comparison()[1].ratio)
+
+    empty = WateringLogTable.from_days([])
+    assert len(empty) == 0
+    assert empty.total_by_zone() == {}
+
+
+def test_runs_table() -> None:
+    """Test flattening and aggregating past program runs."""
+    runs = json.loads(load_fixture("watering_past_response.json"))["pastValues"]
+    table = RunsTable.from_runs(runs)
+    assert len(table) == len(runs)
+    assert table.columns == ("date", "program_id", "used", "et0", "qpf")
+
+    expected_et0: dict[datetime.date, float] = defaultdict(float)
+    expected_used: dict[int, float] = defaultdict(float)
+    for run in runs:
+        expected_et0[datetime.date.fromisoformat(run["dateTime"][:10])] += run["et0"]
+        expected_used[run["pid"]] += run["used"]
+
+    assert table.total_by_day() == pytest.approx(expected_et0)
+    assert table.total_by_program() == expected_used
+
+
+def test_columnar_table_lengths() -> None:
+    """Test that columns of different lengths are rejected."""
+    with pytest.raises(ValueError):
+        ColumnarTable({"a": [1, 2], "b": [1]})
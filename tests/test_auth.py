@@ -0,0 +1,234 @@
+"""Define tests for access token management."""
+
+# pylint: disable=protected-access
+import asyncio
+import json
+import pickle
+from datetime import datetime, timedelta
+from typing import Any
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.auth import Credentials, TokenManager
+from regenmaschine.errors import TokenExpiredError
+from tests.common import (
+    TEST_EMAIL,
+    TEST_HOST,
+    TEST_PASSWORD,
+    TEST_PORT,
+    TEST_SPRINKLER_ID,
+    load_fixture,
+)
+
+
+def test_credentials_are_not_leaked() -> None:
+    """Test that credentials don't show up in reprs or pickles."""
+    credentials = Credentials(TEST_PASSWORD, email=TEST_EMAIL)
+    assert TEST_PASSWORD not in repr(credentials)
+    with pytest.raises(TypeError):
+        pickle.dumps(credentials)
+
+
+@pytest.mark.asyncio
+async def test_token_manager_serializes_refreshes() -> None:
+    """Test that concurrent refreshes of the same token only log in once."""
+    calls = 0
+
+    async def authenticate() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+
+    manager = TokenManager(authenticate, refresh_margin=60)
+    manager.set_expiration(30)
+    assert manager.needs_refresh
+
+    await asyncio.gather(*(manager.async_ensure_valid() for _ in range(5)))
+    assert calls == 1
+    assert manager.generation == 1
+
+    manager.set_expiration(None)
+    assert not manager.needs_refresh
+
+
+@pytest.mark.asyncio
+async def test_local_token_refreshed_before_expiration(
+    aresponses: ResponsesMockServer,
+    auth_login_response: dict[str, Any],
+    authenticated_local_client: ResponsesMockServer,
+) -> None:
+    """Test that a local token is refreshed before it expires.
+
+    Args:
+        aresponses: An aresponses server.
+        auth_login_response: An API response payload.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/auth/login",
+            "post",
+            response=aiohttp.web_response.json_response(
+                auth_login_response, status=200
+            ),
+        )
+        for _ in range(3):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                "/api/4/watering/stopall",
+                "post",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture("watering_stopall_response.json")),
+                    status=200,
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session, options=ClientOptions(refresh_tokens=True))
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+            assert controller.token_manager is not None
+
+            # Pretend the token expires in 30 seconds (inside the refresh margin);
+            # concurrent requests should trigger a single login:
+            controller.token_manager.set_expiration(30)
+            await asyncio.gather(*(controller.watering.stop_all() for _ in range(3)))
+
+            assert controller.token_manager.generation == 1
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_local_token_refreshed_after_expiration(
+    aresponses: ResponsesMockServer,
+    auth_login_response: dict[str, Any],
+    authenticated_local_client: ResponsesMockServer,
+) -> None:
+    """Test that a request that fails with an expired token is replayed once.
+
+    Args:
+        aresponses: An aresponses server.
+        auth_login_response: An API response payload.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/auth/login",
+            "post",
+            response=aiohttp.web_response.json_response(
+                auth_login_response, status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/stopall",
+            "post",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_stopall_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session, options=ClientOptions(refresh_tokens=True))
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            controller._access_token_expiration = datetime.now() - timedelta(hours=1)
+            data = await controller.watering.stop_all()
+            assert data["statusCode"] == 0
+            assert controller._access_token_expiration > datetime.now()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_remote_token_refreshed_after_expiration(
+    aresponses: ResponsesMockServer,
+    authenticated_remote_client: ResponsesMockServer,
+    remote_auth_login_1_response: dict[str, Any],
+) -> None:
+    """Test that a remote controller logs in through both cloud stages again.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_remote_client: A mock remote controller.
+        remote_auth_login_1_response: An API response payload.
+    """
+    async with authenticated_remote_client:
+        authenticated_remote_client.add(
+            "api.rainmachine.com",
+            f"/{TEST_SPRINKLER_ID}/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("unauthenticated_response.json")), status=401
+            ),
+        )
+        authenticated_remote_client.add(
+            "my.rainmachine.com",
+            "/login/auth",
+            "post",
+            response=aiohttp.web_response.json_response(
+                remote_auth_login_1_response, status=200
+            ),
+        )
+        authenticated_remote_client.add(
+            "my.rainmachine.com",
+            "/devices/login-sprinkler",
+            "post",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("remote_auth_login_2_response.json")),
+                status=200,
+            ),
+        )
+        authenticated_remote_client.add(
+            "api.rainmachine.com",
+            f"/{TEST_SPRINKLER_ID}/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_queue_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session, options=ClientOptions(refresh_tokens=True))
+            await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+            controller = next(iter(client.controllers.values()))
+
+            assert await controller.watering.queue() == []
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_token_refresh_without_credentials(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that an expired token is raised if there aren't credentials to use.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session)
+        await client.load_local(TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False)
+        controller = next(iter(client.controllers.values()))
+
+        # Enabling refreshes after logging in means no credentials were kept:
+        controller.enable_token_refresh()
+        controller._access_token_expiration = datetime.now() - timedelta(hours=1)
+
+        with pytest.raises(TokenExpiredError):
+            await controller.request("get", "random/endpoint")
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,204 @@
+"""Define tests for the circuit breaker."""
+
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.breaker import BreakerState, CircuitBreaker
+from regenmaschine.controller import Controller
+from regenmaschine.errors import (
+    CircuitOpenError,
+    ConnectionFailedError,
+    RequestTimeoutError,
+    UnknownAPICallError,
+)
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT
+
+
+async def fail() -> None:
+    """Fail to reach a controller.
+
+    Raises:
+        RequestTimeoutError: Always.
+    """
+    raise RequestTimeoutError("Timed out")
+
+
+async def succeed() -> str:
+    """Reach a controller.
+
+    Returns:
+        A response.
+    """
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_breaker_states() -> None:
+    """Test that the breaker opens, fails fast, and closes after a good probe."""
+    probe_results: list[Any] = [ConnectionFailedError("Offline"), None]
+    transitions: list[tuple[BreakerState, BreakerState]] = []
+
+    async def probe() -> None:
+        """Probe the controller.
+
+        Raises:
+            BaseException: Raised when the probe fails.
+        """
+        if isinstance(result := probe_results.pop(0), BaseException):
+            raise result
+
+    breaker = CircuitBreaker(
+        probe,
+        failure_threshold=2,
+        reset_timeout=60,
+        on_state_change=lambda old, new: transitions.append((old, new)),
+    )
+
+    for _ in range(2):
+        with pytest.raises(RequestTimeoutError):
+            await breaker.async_call(fail)
+    assert breaker.state is BreakerState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await breaker.async_call(succeed)
+
+    with patch("regenmaschine.breaker.time.monotonic", return_value=10**9):
+        # The first probe fails (and the breaker opens again):
+        with pytest.raises(CircuitOpenError):
+            await breaker.async_call(succeed)
+        assert breaker.state is BreakerState.OPEN
+
+    with patch("regenmaschine.breaker.time.monotonic", return_value=10**10):
+        assert await breaker.async_call(succeed) == "ok"
+
+    assert transitions == [
+        (BreakerState.CLOSED, BreakerState.OPEN),
+        (BreakerState.OPEN, BreakerState.HALF_OPEN),
+        (BreakerState.HALF_OPEN, BreakerState.OPEN),
+        (BreakerState.OPEN, BreakerState.HALF_OPEN),
+        (BreakerState.HALF_OPEN, BreakerState.CLOSED),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_api_errors() -> None:
+    """Test that errors from a reachable controller don't open the breaker."""
+
+    async def unknown_call() -> None:
+        """Call an unknown API.
+
+        Raises:
+            UnknownAPICallError: Always.
+        """
+        raise UnknownAPICallError("Unknown")
+
+    breaker = CircuitBreaker(succeed, failure_threshold=2)
+    for func in (fail, unknown_call, fail):
+        with pytest.raises((RequestTimeoutError, UnknownAPICallError)):
+            await breaker.async_call(func)
+    assert breaker.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_probe() -> None:
+    """Test that one probe is sent at a time and that an API error closes."""
+    probe_started = asyncio.Event()
+    release_probe = asyncio.Event()
+
+    async def probe() -> None:
+        """Probe a controller that answers with an API error.
+
+        Raises:
+            UnknownAPICallError: Always.
+        """
+        probe_started.set()
+        await release_probe.wait()
+        raise UnknownAPICallError("Unknown")
+
+    breaker = CircuitBreaker(probe, failure_threshold=1, reset_timeout=0)
+    with pytest.raises(RequestTimeoutError):
+        await breaker.async_call(fail)
+
+    # The breaker is open, so the first call probes the controller:
+    first_call = asyncio.create_task(breaker.async_call(succeed))
+    await probe_started.wait()
+    with pytest.raises(CircuitOpenError):
+        await breaker.async_call(succeed)
+
+    release_probe.set()
+    assert await first_call == "ok"
+    assert breaker.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_callback_error(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that a broken state change callback doesn't break requests.
+
+    Args:
+        caplog: A mocked logging utility.
+    """
+
+    def on_state_change(old_state: BreakerState, state: BreakerState) -> None:
+        """Fail to handle a state change.
+
+        Args:
+            old_state: The old state.
+            state: The new state.
+
+        Raises:
+            ValueError: Always.
+        """
+        raise ValueError(f"{old_state} -> {state}")
+
+    breaker = CircuitBreaker(
+        succeed, failure_threshold=1, on_state_change=on_state_change
+    )
+    with pytest.raises(RequestTimeoutError):
+        await breaker.async_call(fail)
+    assert breaker.state is BreakerState.OPEN
+    assert "Error in circuit breaker callback" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_controller_breaker(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a controller fails fast once its breaker opens.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    transitions: list[tuple[Controller, BreakerState, BreakerState]] = []
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(
+            session=session,
+            options=ClientOptions(
+                circuit_breakers=True,
+                on_circuit_breaker_state_change=lambda *args: transitions.append(args),
+            ),
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        controller = client.controllers[TEST_MAC]
+
+        with patch.object(
+            session, "request", side_effect=aiohttp.ClientOSError
+        ) as mock_request:
+            for _ in range(3):
+                with pytest.raises(ConnectionFailedError):
+                    await controller.watering.queue()
+            with pytest.raises(CircuitOpenError):
+                await controller.watering.queue()
+
+            assert mock_request.call_count == 3
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert transitions == [(controller, BreakerState.CLOSED, BreakerState.OPEN)]
@@ -0,0 +1,212 @@
+"""Define tests for the response cache."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.cache import ResponseCache
+from tests.common import TEST_HOST, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+def test_cache_ttl() -> None:
+    """Test that cached payloads expire after their endpoint's TTL."""
+    cache = ResponseCache({"zone": 10})
+
+    with patch("regenmaschine.cache.time.monotonic", return_value=100):
+        cache.set("zone", None, {"zones": []})
+        cache.set("program", None, {"programs": []})
+        assert cache.get("zone") == {"zones": []}
+        assert cache.get("program") is None
+
+    with patch("regenmaschine.cache.time.monotonic", return_value=110):
+        assert cache.get("zone") is None
+
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+def test_cache_params() -> None:
+    """Test that query parameters are part of the cache key."""
+    cache = ResponseCache()
+    cache.set("zone", {"a": 1}, {"zones": [1]})
+    assert cache.get("zone", {"a": 1}) == {"zones": [1]}
+    assert cache.get("zone") is None
+
+
+@pytest.mark.parametrize(
+    "post_endpoint,evicted,kept",
+    [
+        ("zone/3/properties", ["zone", "zone/3"], ["zone/4", "program"]),
+        ("zone/3/start", ["zone", "zone/3", "watering/zone"], ["zone/4"]),
+        ("program/2", ["program", "program/2"], ["program/1", "zone"]),
+        ("watering/stopall", ["watering/zone", "watering/queue"], ["apiVer"]),
+        ("restrictions/global", ["restrictions/global"], ["apiVer"]),
+        ("machine/reboot", ["apiVer", "zone", "program"], []),
+    ],
+)
+def test_cache_invalidation(
+    evicted: list[str], kept: list[str], post_endpoint: str
+) -> None:
+    """Test that POSTs evict the cached payloads they make stale.
+
+    Args:
+        evicted: The endpoints that should be evicted.
+        kept: The endpoints that should remain cached.
+        post_endpoint: The endpoint that is POSTed to.
+    """
+    cache = ResponseCache()
+    for endpoint in evicted + kept:
+        cache.set(endpoint, None, {"endpoint": endpoint})
+
+    cache.invalidate(post_endpoint)
+
+    for endpoint in evicted:
+        assert cache.get(endpoint) is None
+    for endpoint in kept:
+        assert cache.get(endpoint) == {"endpoint": endpoint}
+
+
+def test_cache_generation() -> None:
+    """Test that a payload fetched before an invalidation isn't cached after it."""
+    cache = ResponseCache()
+
+    generation = cache.generation("zone")
+    cache.invalidate("zone/3/properties")
+    cache.set("zone", None, {"zones": [1]}, generation=generation)
+    assert cache.get("zone") is None
+
+    generation = cache.generation("zone")
+    cache.invalidate("machine/reboot")
+    cache.set("zone", None, {"zones": [1]}, generation=generation)
+    assert cache.get("zone") is None
+
+    # Invalidating an unrelated endpoint doesn't matter:
+    generation = cache.generation("zone")
+    cache.invalidate("program/2")
+    cache.set("zone", None, {"zones": [1]}, generation=generation)
+    assert cache.get("zone") == {"zones": [1]}
+
+
+@pytest.mark.asyncio
+async def test_controller_cache(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a controller serves GETs from cache until a POST makes them stale.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        for _ in range(2):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                "/api/4/watering/queue",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture("watering_queue_response.json")),
+                    status=200,
+                ),
+            )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/stopall",
+            "post",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_stopall_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(cache_responses=True)
+            )
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+            assert controller.cache is not None
+
+            # The second call is served from cache:
+            assert await controller.watering.queue() == []
+            assert await controller.watering.queue() == []
+            assert controller.cache.hits == 1
+
+            # ...until stopping all watering makes the queue stale:
+            await controller.watering.stop_all()
+            assert await controller.watering.queue() == []
+            assert controller.cache.hits == 1
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_controller_cache_interleaved_post(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a GET that completes after a POST's invalidation isn't cached.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    post_done = asyncio.Event()
+
+    async def get_queue(_: aiohttp.web.Request) -> aiohttp.web.Response:
+        """Respond to the GET only once the POST has completed.
+
+        Returns:
+            An API response.
+        """
+        await post_done.wait()
+        return aiohttp.web_response.json_response(
+            json.loads(load_fixture("watering_queue_response.json")), status=200
+        )
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}", "/api/4/watering/queue", "get", get_queue
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/stopall",
+            "post",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_stopall_response.json")), status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_queue_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(cache_responses=True)
+            )
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+            assert controller.cache is not None
+
+            get_task = asyncio.create_task(controller.watering.queue())
+            await asyncio.sleep(0.1)
+            await controller.watering.stop_all()
+            post_done.set()
+            assert await get_task == []
+
+            # The GET started before the POST, so its response wasn't cached:
+            assert await controller.watering.queue() == []
+            assert not controller.cache.hits
+
+    aresponses.assert_plan_strictly_followed()
@@ -11,13 +11,14 @@ import aiohttp
 import pytest
 from aresponses import ResponsesMockServer
 
-from regenmaschine import Client
+from regenmaschine import Client, ClientOptions
 from regenmaschine.errors import (
     RainMachineError,
     RequestError,
     TokenExpiredError,
     UnknownAPICallError,
 )
+from regenmaschine.fleet import LocalTarget, RemoteTarget
 from tests.common import (
     TEST_ACCESS_TOKEN,
     TEST_API_VERSION,
@@ -28,6 +29,7 @@ from tests.common import (
     TEST_NAME,
     TEST_PASSWORD,
     TEST_PORT,
+    TEST_SPRINKLER_ID,
     TEST_SW_VERSION,
     load_fixture,
 )
@@ -85,6 +87,38 @@ async def test_load_local(
     aresponses.assert_plan_strictly_followed()
 
 
+@pytest.mark.asyncio
+async def test_load_local_lazy(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test lazily loading a local controller.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session)
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False, lazy=True)
+
+        controller = client.controllers[TEST_MAC]
+        assert controller.metadata_deferred
+        assert controller.name == ""
+
+        # Concurrent callers share a single fetch:
+        await asyncio.gather(
+            controller.async_ensure_metadata(), controller.async_ensure_metadata()
+        )
+        # (Looked up again, since mypy doesn't expect the fetch to change the flag.)
+        assert not client.controllers[TEST_MAC].metadata_deferred
+        assert controller.api_version == TEST_API_VERSION
+        assert controller.hardware_version == TEST_HW_VERSION
+        assert controller.name == TEST_NAME
+        assert controller.software_version == TEST_SW_VERSION
+
+    aresponses.assert_plan_strictly_followed()
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("provision_name_response", [{"name": "89"}])
 async def test_load_local_string_name(
@@ -151,6 +185,30 @@ async def test_load_local_skip(
     aresponses.assert_plan_strictly_followed()
 
 
+@pytest.mark.asyncio
+async def test_load_local_skip_other_loaded(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test loading a new local controller while skipping existing ones.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session)
+        other = Mock()
+        client.controllers["aa:bb:cc:dd:ee:ff"] = other
+
+        # The MAC address is checked first, and the metadata is only fetched once
+        # it's clear that the controller isn't loaded yet:
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        assert client.controllers["aa:bb:cc:dd:ee:ff"] is other
+        assert client.controllers[TEST_MAC].name == TEST_NAME
+
+    aresponses.assert_plan_strictly_followed()
+
+
 @pytest.mark.asyncio
 async def test_load_local_http_error(aresponses: ResponsesMockServer) -> None:
     """Test loading a local controller and receiving a fail response.
@@ -219,6 +277,32 @@ async def test_load_remote(
     aresponses.assert_plan_strictly_followed()
 
 
+@pytest.mark.asyncio
+async def test_load_remote_lazy(
+    aresponses: ResponsesMockServer, authenticated_remote_client: ResponsesMockServer
+) -> None:
+    """Test lazily loading a remote controller.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_remote_client: A mock remote controller.
+    """
+    async with authenticated_remote_client, aiohttp.ClientSession() as session:
+        client = Client(session=session)
+        await client.load_remote(TEST_EMAIL, TEST_PASSWORD, lazy=True)
+
+        controller = client.controllers[TEST_MAC]
+        assert controller.metadata_deferred
+        # The cloud provides the name up front:
+        assert controller.name == TEST_NAME
+
+        await controller.async_ensure_metadata()
+        assert not client.controllers[TEST_MAC].metadata_deferred
+        assert controller.api_version == TEST_API_VERSION
+
+    aresponses.assert_plan_strictly_followed()
+
+
 @pytest.mark.asyncio
 async def test_load_remote_skip(
     aresponses: ResponsesMockServer,
@@ -489,3 +573,329 @@ async def test_retry_only_once_on_server_disconnected(
                 await controller.restrictions.raindelay()
 
     aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_owned_session(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a client without a session creates, reuses, and closes its own.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        async with Client() as client:
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            session = client._owned_session
+            assert session is not None
+            assert session.connector is not None
+            assert session.connector.limit_per_host == 4
+            assert client._get_session() is session
+
+        assert session.closed
+        assert client._owned_session is None
+
+        # Closing a client that never created a session is a no-op:
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_owned_session_not_used_with_provided_session(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a caller-provided session is used (and left open) by the client.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        async with Client(session=session) as client:
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            assert client._owned_session is None
+
+        assert not session.closed
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_request_coalescing(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that concurrent, identical GET requests share a single round trip.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/zone",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_zone_response.json")), status=200
+            ),
+        )
+        for _ in range(2):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                "/api/4/watering/stopall",
+                "post",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture("watering_stopall_response.json")),
+                    status=200,
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(coalesce_requests=True)
+            )
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            running_1, running_2 = await asyncio.gather(
+                controller.zones.running(), controller.zones.running()
+            )
+            assert running_1 is running_2
+            assert not client._in_flight_requests
+
+            # POST requests are never coalesced:
+            await asyncio.gather(
+                controller.watering.stop_all(), controller.watering.stop_all()
+            )
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_request_coalescing_error(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that an error in a coalesced request is raised to every caller.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/zone",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("unknown_api_call_response.json")), status=400
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(coalesce_requests=True)
+            )
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            results = await asyncio.gather(
+                controller.zones.running(),
+                controller.zones.running(),
+                return_exceptions=True,
+            )
+            assert all(isinstance(result, UnknownAPICallError) for result in results)
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_custom_json_decoder(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a custom JSON decoder is used to decode responses.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    decoder = Mock(side_effect=json.loads)
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session, options=ClientOptions(json_decoder=decoder))
+        await client.load_local(TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False)
+        assert client.controllers[TEST_MAC].name == TEST_NAME
+        assert decoder.call_count == 4
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_request_raw(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test getting an undecoded response body.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/diag/log",
+            "get",
+            aresponses.Response(text=load_fixture("diag_log_response.json")),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/diag/log",
+            "get",
+            aresponses.Response(text="Internal Server Error", status=500),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/machine/reboot",
+            "post",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("machine_reboot_response.json")), status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(cache_responses=True)
+            )
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = next(iter(client.controllers.values()))
+
+            body = await controller.request_raw("get", "diag/log")
+            assert body == load_fixture("diag_log_response.json").encode()
+
+            with pytest.raises(RequestError):
+                await controller.request_raw("get", "diag/log")
+
+            # A raw POST still evicts stale cached payloads:
+            assert controller.cache is not None
+            assert controller.cache.get("apiVer") is not None
+            await controller.request_raw("post", "machine/reboot")
+            assert controller.cache.get("apiVer") is None
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_load_many(
+    aresponses: ResponsesMockServer,
+    api_version_response: dict[str, Any],
+    authenticated_local_client: ResponsesMockServer,
+    remote_auth_login_1_response: dict[str, Any],
+    remote_sprinklers_response: dict[str, Any],
+) -> None:
+    """Test loading local and remote controllers concurrently.
+
+    Args:
+        aresponses: An aresponses server.
+        api_version_response: An API response payload.
+        authenticated_local_client: A mock local controller.
+        remote_auth_login_1_response: An API response payload.
+        remote_sprinklers_response: An API response payload.
+    """
+    authenticated_local_client.add(
+        "192.168.1.200:8080",
+        "/api/4/auth/login",
+        "post",
+        aresponses.Response(text=None, status=500),
+    )
+    authenticated_local_client.add(
+        "my.rainmachine.com",
+        "/login/auth",
+        "post",
+        response=aiohttp.web_response.json_response(
+            remote_auth_login_1_response, status=200
+        ),
+    )
+    authenticated_local_client.add(
+        "my.rainmachine.com",
+        "/devices/get-sprinklers",
+        "post",
+        response=aiohttp.web_response.json_response(
+            remote_sprinklers_response, status=200
+        ),
+    )
+    authenticated_local_client.add(
+        "my.rainmachine.com",
+        "/devices/login-sprinkler",
+        "post",
+        response=aiohttp.web_response.json_response(
+            json.loads(load_fixture("remote_auth_login_2_response.json")), status=200
+        ),
+    )
+    authenticated_local_client.add(
+        "api.rainmachine.com",
+        f"/{TEST_SPRINKLER_ID}/api/4/apiVer",
+        "get",
+        response=aiohttp.web_response.json_response(api_version_response, status=200),
+    )
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session)
+        local_target = LocalTarget(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        failing_target = LocalTarget("192.168.1.200", TEST_PASSWORD, use_ssl=False)
+        remote_target = RemoteTarget(TEST_EMAIL, TEST_PASSWORD)
+
+        report = await client.load_many(
+            [local_target, failing_target, remote_target],
+            max_concurrency=2,
+            skip_existing=False,
+        )
+
+        assert [result.target for result in report.results] == [
+            local_target,
+            failing_target,
+            remote_target,
+        ]
+        assert [result.target for result in report.succeeded] == [
+            local_target,
+            remote_target,
+        ]
+        assert report.results[0].macs == [TEST_MAC]
+        assert report.results[2].macs == [TEST_MAC]
+
+        [failure] = report.failed
+        assert failure.target.label == "192.168.1.200:8080"
+        assert isinstance(failure.error, RequestError)
+        assert TEST_PASSWORD not in repr(failure.target)
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_load_many_timeout() -> None:
+    """Test that a target that takes too long to load is reported as a failure."""
+
+    async def _slow_load(*args: Any) -> list[str]:  # pylint: disable=unused-argument
+        await asyncio.sleep(10)
+        return []
+
+    client = Client()
+    with patch.object(client, "_async_load_remote", _slow_load):
+        report = await client.load_many(
+            [RemoteTarget(TEST_EMAIL, TEST_PASSWORD)], timeout=0.01
+        )
+
+    [failure] = report.failed
+    assert isinstance(failure.error, asyncio.TimeoutError)
+    assert failure.target.label == TEST_EMAIL
@@ -0,0 +1,192 @@
+"""Define tests for the diff engine."""
+
+import json
+from datetime import datetime
+from typing import Any
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from regenmaschine.controller import LocalController
+from regenmaschine.diff import (
+    ChangeEvent,
+    ChangeType,
+    DiffEngine,
+    FieldChange,
+    get_records,
+)
+from regenmaschine.errors import RequestTimeoutError
+from regenmaschine.snapshot import SnapshotPart, SnapshotSection
+from tests.common import TEST_HOST, TEST_MAC, TEST_PORT, load_fixture
+
+
+def load_zones() -> list[dict[str, Any]]:
+    """Load the running zones fixture.
+
+    Returns:
+        A list of zones.
+    """
+    return json.loads(load_fixture("watering_zone_response.json"))["zones"]  # type: ignore[no-any-return]
+
+
+def test_get_records() -> None:
+    """Test that payloads of different shapes are keyed by uid."""
+    assert get_records({1: {"uid": 1}, 2: {"uid": 2}}) == {
+        1: {"uid": 1},
+        2: {"uid": 2},
+    }
+    assert get_records([{"uid": 3}, {"pid": 4}, {"name": "x"}]) == {
+        3: {"uid": 3},
+        4: {"pid": 4},
+        2: {"name": "x"},
+    }
+    assert get_records({"hourly": False}) == {None: {"hourly": False}}
+    assert get_records("log") == {None: {"value": "log"}}
+    assert get_records([5, 6]) == {0: {"value": 5}, 1: {"value": 6}}
+
+
+def test_zone_changes() -> None:
+    """Test that zone changes emit field-level and semantic events."""
+    engine = DiffEngine()
+    listener = Mock()
+    engine.subscribe(listener)
+
+    zones = load_zones()
+    assert engine.update(TEST_MAC, SnapshotPart.RUNNING_ZONES, zones) == []
+    assert engine.update(TEST_MAC, SnapshotPart.RUNNING_ZONES, load_zones()) == []
+    listener.assert_not_called()
+
+    zones[0] = {**zones[0], "state": 1, "remaining": 300}
+    events = engine.update(TEST_MAC, SnapshotPart.RUNNING_ZONES, zones)
+    assert events == [
+        ChangeEvent(
+            TEST_MAC,
+            SnapshotPart.RUNNING_ZONES,
+            1,
+            ChangeType.UPDATED,
+            {"state": FieldChange(0, 1), "remaining": FieldChange(0, 300)},
+        ),
+        ChangeEvent(
+            TEST_MAC,
+            SnapshotPart.RUNNING_ZONES,
+            1,
+            ChangeType.ZONE_STARTED,
+            {"state": FieldChange(0, 1)},
+        ),
+    ]
+    assert [call.args[0] for call in listener.call_args_list] == events
+
+    zones[0] = {**zones[0], "state": 0, "remaining": 0}
+    events = engine.update(TEST_MAC, SnapshotPart.RUNNING_ZONES, zones)
+    assert [event.type for event in events] == [
+        ChangeType.UPDATED,
+        ChangeType.ZONE_STOPPED,
+    ]
+
+
+def test_restriction_and_program_events() -> None:
+    """Test restriction, program, and membership events (and subscriber filters)."""
+    engine = DiffEngine()
+    events: list[ChangeEvent] = []
+    engine.subscribe(
+        events.append,
+        {
+            ChangeType.PROGRAM_STARTED,
+            ChangeType.PROGRAM_STOPPED,
+            ChangeType.RESTRICTION_ENGAGED,
+            ChangeType.RESTRICTION_LIFTED,
+        },
+    )
+
+    restrictions = json.loads(load_fixture("restrictions_currently_response.json"))
+    engine.update(TEST_MAC, SnapshotPart.CURRENT_RESTRICTIONS, restrictions)
+    engine.update(
+        TEST_MAC,
+        SnapshotPart.CURRENT_RESTRICTIONS,
+        {**restrictions, "freeze": True, "rainDelayCounter": 10},
+    )
+
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [])
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [{"uid": 2, "status": 1}])
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [])
+
+    assert [(event.type, event.uid, event.changes) for event in events] == [
+        (ChangeType.RESTRICTION_ENGAGED, None, {"freeze": FieldChange(False, True)}),
+        (ChangeType.PROGRAM_STARTED, 2, {}),
+        (ChangeType.PROGRAM_STOPPED, 2, {}),
+    ]
+
+
+def test_subscribers_and_clear(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that broken (or removed) subscribers don't get in the way.
+
+    Args:
+        caplog: A mocked logging utility.
+    """
+    engine = DiffEngine()
+    remove_broken = engine.subscribe(Mock(side_effect=ValueError("Broken")))
+    listener = Mock()
+    engine.subscribe(listener)
+
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [])
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [{"uid": 2, "status": 1}])
+    assert listener.call_count == 2
+    assert "Error in change listener" in caplog.text
+
+    remove_broken()
+    caplog.clear()
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [])
+    assert listener.call_count == 4
+    assert not caplog.text
+
+    # Once the last state is forgotten, the next update is a baseline again:
+    engine.clear()
+    engine.update(TEST_MAC, SnapshotPart.RUNNING_PROGRAMS, [{"uid": 2, "status": 1}])
+    assert listener.call_count == 4
+
+
+def test_process_section() -> None:
+    """Test feeding the engine with refreshed sections (e.g., from a coordinator)."""
+    controller = LocalController(AsyncMock(), TEST_HOST, TEST_PORT)
+    controller.mac = TEST_MAC
+    engine = DiffEngine()
+    now = datetime.now()
+
+    queue = [{"uid": 4}]
+    engine.process_section(
+        controller, SnapshotSection(SnapshotPart.WATERING_QUEUE, now, data=queue)
+    )
+    engine.process_section(
+        controller,
+        SnapshotSection(SnapshotPart.WATERING_QUEUE, now, error=RequestTimeoutError()),
+    )
+    assert engine.get_state(TEST_MAC, SnapshotPart.WATERING_QUEUE) == {4: {"uid": 4}}
+
+    # An unchanged response returns the very object the engine last saw:
+    with patch.object(engine, "update") as update:
+        engine.process_section(
+            controller,
+            SnapshotSection(
+                SnapshotPart.WATERING_QUEUE, now, data=queue, unchanged=True
+            ),
+        )
+    update.assert_not_called()
+
+    # ...but it may be unchanged since someone else's request, not since the engine's:
+    listener = Mock()
+    engine.subscribe(listener, {ChangeType.ADDED})
+    engine.process_section(
+        controller,
+        SnapshotSection(
+            SnapshotPart.WATERING_QUEUE,
+            now,
+            data=[{"uid": 4}, {"uid": 5}],
+            unchanged=True,
+        ),
+    )
+    listener.assert_called_once_with(
+        ChangeEvent(TEST_MAC, SnapshotPart.WATERING_QUEUE, 5, ChangeType.ADDED)
+    )
+
+    engine.clear(TEST_MAC)
+    assert engine.get_state(TEST_MAC, SnapshotPart.WATERING_QUEUE) == {}
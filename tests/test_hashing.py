@@ -0,0 +1,146 @@
+"""Define tests for response content hashing."""
+
+import asyncio
+import json
+from unittest.mock import Mock
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+from yarl import URL
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.errors import UnknownAPICallError
+from regenmaschine.hashing import (
+    ResponseHashes,
+    async_track_isolated,
+    get_hash_key,
+    record_response,
+    replay_responses,
+    track_responses,
+)
+from regenmaschine.snapshot import SnapshotPart
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+def test_response_hashes() -> None:
+    """Test that unchanged bodies aren't decoded again."""
+    decoder = Mock(wraps=json.loads)
+    hashes = ResponseHashes(max_entries=2)
+    key = get_hash_key(URL("http://host/api/4/zone"), {"access_token": "abc"})
+    assert key == get_hash_key(URL("http://host/api/4/zone"), {"access_token": "def"})
+
+    data, unchanged = hashes.decode(key, b'{"zones": []}', decoder)
+    assert (data, unchanged) == ({"zones": []}, False)
+
+    cached, unchanged = hashes.decode(key, b'{"zones": []}', decoder)
+    assert cached is data
+    assert unchanged
+    assert decoder.call_count == 1
+
+    assert hashes.decode(key, b'{"zones": [1]}', decoder) == ({"zones": [1]}, False)
+    assert (hashes.hits, hashes.misses) == (1, 2)
+
+    # The least recently used URL is forgotten first:
+    for path in ("program", "provision"):
+        hashes.decode(get_hash_key(URL(f"http://host/{path}"), None), b"{}", decoder)
+    assert len(hashes) == 2
+    assert hashes.decode(key, b'{"zones": [1]}', decoder)[1] is False
+
+    hashes.discard(key)
+    assert hashes.decode(key, b'{"zones": [1]}', decoder)[1] is False
+
+    hashes.clear()
+    assert not hashes
+
+
+@pytest.mark.asyncio
+async def test_response_trackers() -> None:
+    """Test that responses are recorded by every tracker in the context."""
+    with track_responses() as outer:
+        record_response(unchanged=True)
+        with track_responses() as inner:
+            record_response(unchanged=True)
+        assert inner.all_unchanged
+
+        async def request() -> str:
+            """Simulate a request whose response changed.
+
+            Returns:
+                A response payload.
+            """
+            record_response(unchanged=False)
+            return "data"
+
+        data, tracker = await async_track_isolated(request())
+        assert data == "data"
+        assert outer.responses == 2
+        replay_responses(tracker)
+
+    assert (outer.responses, outer.unchanged) == (3, 2)
+    assert not outer.all_unchanged
+
+
+@pytest.mark.asyncio
+async def test_client_hash_responses(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a client flags unchanged responses (including coalesced ones).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/provision",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("provision_response.json")), status=200
+            ),
+            repeat=2,
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/zone",
+            "get",
+            response=aiohttp.web_response.json_response(
+                {"statusCode": 13, "message": "Unknown"}, status=200
+            ),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session,
+                options=ClientOptions(coalesce_requests=True, hash_responses=True),
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+            parts = [SnapshotPart.PROVISION_SETTINGS]
+
+            first = (await controller.snapshot(parts)).provision_settings
+            assert first is not None
+            assert not first.unchanged
+
+            # Both callers share one (coalesced) request, and both see it unchanged:
+            snapshots = await asyncio.gather(
+                controller.snapshot(parts), controller.snapshot(parts)
+            )
+            for snapshot in snapshots:
+                section = snapshot.provision_settings
+                assert section is not None
+                assert section.unchanged
+                assert section.data is first.data
+
+            # Error responses aren't remembered (so they can't be "unchanged"):
+            assert client.response_hashes is not None
+            remembered = len(client.response_hashes)
+            with pytest.raises(UnknownAPICallError):
+                await controller.zones.all()
+            assert len(client.response_hashes) == remembered
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert client.response_hashes is not None
+    assert client.response_hashes.hits == 1
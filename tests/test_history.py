@@ -0,0 +1,266 @@
+"""Define tests for the watering history sync."""
+
+import asyncio
+import json
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, call
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client
+from regenmaschine.errors import RequestError, UnknownAPICallError
+from regenmaschine.history import HistoryKind, WateringHistory
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+@pytest.mark.asyncio
+async def test_history_sync(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    tmp_path: Path,
+) -> None:
+    """Test an initial sync, an incremental sync, and local queries.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        tmp_path: A temporary directory.
+    """
+    async with authenticated_local_client:
+        for endpoint, fixture in (
+            ("watering/log/2018-06-03/2", "watering_log_response.json"),
+            ("watering/past/2018-06-03/2", "watering_past_response.json"),
+            ("dailystats/2018-06-03", "dailystats_date_response.json"),
+            ("dailystats/2018-06-04", "dailystats_date_response.json"),
+            # The second sync refetches the last synced day (and the one before it):
+            ("watering/past/2018-06-03/3", "watering_past_response.json"),
+        ):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/{endpoint}",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture(fixture)), status=200
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            history = WateringHistory(
+                tmp_path / "history.db", initial_days=2, overlap_days=1
+            )
+            result = await history.async_sync(controller, today=date(2018, 6, 4))
+            assert result.synced == {
+                HistoryKind.DAILY_STATS: 2,
+                HistoryKind.PAST_VALUES: 8,
+                HistoryKind.WATER_LOG: 2,
+            }
+            assert result.errors == {}
+
+            result = await history.async_sync(
+                controller, [HistoryKind.PAST_VALUES], today=date(2018, 6, 5)
+            )
+            assert result.synced == {HistoryKind.PAST_VALUES: 8}
+
+            # Kinds a 1st generation controller doesn't support are skipped:
+            controller.hardware_version = "1"
+            result = await history.async_sync(
+                controller, [HistoryKind.WATER_LOG], today=date(2018, 6, 5)
+            )
+            assert isinstance(result.errors[HistoryKind.WATER_LOG], UnknownAPICallError)
+
+            await history.async_close()
+
+    aresponses.assert_plan_strictly_followed()
+
+    # Queries are served from the database (even after it's reopened):
+    history = WateringHistory(tmp_path / "history.db")
+    water_log = await history.async_query(
+        TEST_MAC, HistoryKind.WATER_LOG, date(2018, 6, 1), date(2018, 6, 30)
+    )
+    assert [day["date"] for day in water_log] == ["2018-06-01", "2018-06-02"]
+
+    past_values = await history.async_query(
+        TEST_MAC, HistoryKind.PAST_VALUES, date(2018, 6, 4), date(2018, 6, 4)
+    )
+    assert [value["pid"] for value in past_values] == [1, 2, 3, 4]
+
+    assert (
+        await history.async_query(
+            "00:00:00:00:00:00",
+            HistoryKind.DAILY_STATS,
+            date(2018, 6, 1),
+            date(2018, 6, 30),
+        )
+        == []
+    )
+    await history.async_close()
+
+
+@pytest.mark.asyncio
+async def test_history_sync_daily_stats_partial(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    tmp_path: Path,
+) -> None:
+    """Test that a day of daily stats that fails doesn't discard the others.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        tmp_path: A temporary directory.
+    """
+    in_flight = 0
+    peak_in_flight = 0
+    requested_days: list[str] = []
+
+    async def get_daily_stats(request: aiohttp.web.Request) -> aiohttp.web.Response:
+        """Respond with the stats of the requested day (failing June 4th once).
+
+        Args:
+            request: The request.
+
+        Returns:
+            An API response.
+        """
+        nonlocal in_flight, peak_in_flight
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+        day = request.path.rsplit("/", 1)[-1]
+        requested_days.append(day)
+        if day == "2018-06-04" and requested_days.count(day) == 1:
+            return aiohttp.web_response.Response(text=None, status=500)
+        return aiohttp.web_response.json_response(
+            {**json.loads(load_fixture("dailystats_date_response.json")), "day": day},
+            status=200,
+        )
+
+    async with authenticated_local_client:
+        for day in ("03", "04", "05") * 2:
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/dailystats/2018-06-{day}",
+                "get",
+                get_daily_stats,
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            history = WateringHistory(
+                tmp_path / "history.db",
+                initial_days=3,
+                overlap_days=0,
+                daily_stats_concurrency=2,
+            )
+            result = await history.async_sync(
+                controller, [HistoryKind.DAILY_STATS], today=date(2018, 6, 5)
+            )
+            assert result.synced == {HistoryKind.DAILY_STATS: 2}
+            assert isinstance(result.errors[HistoryKind.DAILY_STATS], RequestError)
+            assert peak_in_flight == 2
+
+            daily_stats = await history.async_query(
+                TEST_MAC, HistoryKind.DAILY_STATS, date(2018, 6, 1), date(2018, 6, 30)
+            )
+            assert [day["day"] for day in daily_stats] == ["2018-06-03", "2018-06-05"]
+
+            # The watermark stopped short of the failed day, so it's fetched again:
+            result = await history.async_sync(
+                controller, [HistoryKind.DAILY_STATS], today=date(2018, 6, 5)
+            )
+            assert result.synced == {HistoryKind.DAILY_STATS: 3}
+            assert result.errors == {}
+            assert sorted(requested_days[3:]) == [
+                "2018-06-03",
+                "2018-06-04",
+                "2018-06-05",
+            ]
+
+            await history.async_close()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_history_sync_unexpected_error(tmp_path: Path) -> None:
+    """Test that an error other than a RequestError isn't swallowed by a sync.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    controller = MagicMock(mac=TEST_MAC)
+    controller.stats.on_date = AsyncMock(side_effect=RuntimeError("Broken"))
+
+    history = WateringHistory(tmp_path / "history.db", initial_days=2)
+    with pytest.raises(RuntimeError):
+        await history.async_sync(
+            controller, [HistoryKind.DAILY_STATS], today=date(2018, 6, 5)
+        )
+    assert (
+        await history.async_query(
+            TEST_MAC, HistoryKind.DAILY_STATS, date(2018, 6, 1), date(2018, 6, 30)
+        )
+        == []
+    )
+    await history.async_close()
+
+
+@pytest.mark.asyncio
+async def test_history_sync_windows(tmp_path: Path) -> None:
+    """Test that a sync fetches (and keeps) one window of days at a time.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    controller = MagicMock(mac=TEST_MAC)
+    controller.watering.log = AsyncMock(
+        side_effect=[
+            [{"date": "2018-06-01"}, {"date": "2018-06-02"}],
+            RequestError("Broken"),
+            [{"date": "2018-06-02"}, {"date": "2018-06-03"}],
+            [{"date": "2018-06-04"}, {"date": "2018-06-05"}],
+        ]
+    )
+
+    history = WateringHistory(
+        tmp_path / "history.db", initial_days=5, overlap_days=0, window_days=2
+    )
+    result = await history.async_sync(
+        controller, [HistoryKind.WATER_LOG], today=date(2018, 6, 5)
+    )
+    assert result.synced == {HistoryKind.WATER_LOG: 2}
+    assert isinstance(result.errors[HistoryKind.WATER_LOG], RequestError)
+
+    # The next sync picks up from the last window that was synced:
+    result = await history.async_sync(
+        controller, [HistoryKind.WATER_LOG], today=date(2018, 6, 5)
+    )
+    assert result.synced == {HistoryKind.WATER_LOG: 4}
+    assert result.errors == {}
+
+    assert controller.watering.log.call_args_list == [
+        call(date(2018, 6, 1), 2, details=False),
+        call(date(2018, 6, 3), 2, details=False),
+        call(date(2018, 6, 2), 2, details=False),
+        call(date(2018, 6, 4), 2, details=False),
+    ]
+    water_log = await history.async_query(
+        TEST_MAC, HistoryKind.WATER_LOG, date(2018, 6, 1), date(2018, 6, 30)
+    )
+    assert len(water_log) == 5
+    await history.async_close()
+
+    with pytest.raises(ValueError):
+        WateringHistory(tmp_path / "history.db", window_days=0)
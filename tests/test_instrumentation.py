@@ -0,0 +1,183 @@
+"""Define tests for request timing instrumentation."""
+
+import json
+import ssl
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+from multidict import CIMultiDict
+from yarl import URL
+
+from regenmaschine import Client
+from regenmaschine.errors import RequestError
+from regenmaschine.instrumentation import RequestInstrumentation, RequestTiming
+from regenmaschine.tls import ResumingSSLObject, get_ssl_context
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+@pytest.mark.asyncio
+async def test_request_timings(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that request timings are tagged and handed to listeners.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    timings: list[RequestTiming] = []
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_queue_response.json")), status=200
+            ),
+        )
+
+        async with Client() as client:
+            remove_listener = client.instrumentation.add_listener(timings.append)
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            controller = client.controllers[TEST_MAC]
+            await controller.watering.queue()
+
+            remove_listener()
+            assert not client.instrumentation.enabled
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert timings[0].endpoint == "auth/login"
+    timing = timings[-1]
+    assert timing.method == "GET"
+    assert timing.endpoint == "watering/queue"
+    assert timing.mac == TEST_MAC
+    assert timing.status == 200
+    assert timing.error is None
+    assert timing.tls is None
+    assert timing.decode is not None
+    assert timing.ttfb is not None
+    assert timing.total is not None
+    assert timing.total >= timing.ttfb
+
+
+@pytest.mark.asyncio
+async def test_request_timing_error(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a failed request's timing (and a broken listener) are handled.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    timings: list[RequestTiming] = []
+
+    def broken_listener(timing: RequestTiming) -> None:
+        """Raise an error.
+
+        Args:
+            timing: A RequestTiming.
+
+        Raises:
+            RuntimeError: Always.
+        """
+        raise RuntimeError("Broken")
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aresponses.Response(text="not json", status=200),
+        )
+
+        async with Client() as client:
+            await client.load_local(
+                TEST_HOST, TEST_PASSWORD, port=TEST_PORT, use_ssl=False
+            )
+            client.instrumentation.add_listener(broken_listener)
+            client.instrumentation.add_listener(timings.append)
+
+            controller = client.controllers[TEST_MAC]
+            with pytest.raises(RequestError):
+                await controller.watering.queue()
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert len(timings) == 1
+    assert timings[0].error is not None
+
+
+@pytest.mark.asyncio
+async def test_connection_phases() -> None:
+    """Test that queueing, DNS, and TLS are timed from the trace hooks."""
+    instrumentation = RequestInstrumentation()
+    session = MagicMock()
+    url = URL(f"https://{TEST_HOST}/api/4/watering/queue")
+
+    # pylint: disable=protected-access
+    async def time_attempt(response: MagicMock) -> RequestTiming:
+        """Run the trace hooks of an attempt that opens a new connection.
+
+        Args:
+            response: The (mock) response that the attempt receives.
+
+        Returns:
+            The attempt's RequestTiming.
+        """
+        timing = RequestTiming(method="GET", endpoint="watering/queue", mac=TEST_MAC)
+        ctx = SimpleNamespace(trace_request_ctx=timing)
+        await instrumentation._on_queued_start(
+            session, ctx, aiohttp.TraceConnectionQueuedStartParams()
+        )
+        await instrumentation._on_queued_end(
+            session, ctx, aiohttp.TraceConnectionQueuedEndParams()
+        )
+        await instrumentation._on_create_start(
+            session, ctx, aiohttp.TraceConnectionCreateStartParams()
+        )
+        await instrumentation._on_dns_start(
+            session, ctx, aiohttp.TraceDnsResolveHostStartParams(TEST_HOST)
+        )
+        await instrumentation._on_dns_end(
+            session, ctx, aiohttp.TraceDnsResolveHostEndParams(TEST_HOST)
+        )
+        await instrumentation._on_create_end(
+            session, ctx, aiohttp.TraceConnectionCreateEndParams()
+        )
+        await instrumentation._on_request_end(
+            session,
+            ctx,
+            aiohttp.TraceRequestEndParams("GET", url, CIMultiDict(), response),
+        )
+        return timing
+
+    # The TLS phase comes from the connection's own SSL object (not from the shared
+    # SSL context, which concurrent handshakes to the same host would overwrite):
+    ssl_object = get_ssl_context().wrap_bio(
+        ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname=TEST_HOST
+    )
+    assert isinstance(ssl_object, ResumingSSLObject)
+    ssl_object.handshake_duration = 0.0
+    response = MagicMock(status=200)
+    response.connection.transport.get_extra_info.return_value = ssl_object
+    timing = await time_attempt(response)
+    assert timing.queued is not None
+    assert timing.dns is not None
+    assert timing.tls == 0.0
+    assert timing.connect is not None
+    assert timing.connect >= 0.0
+
+    # Neither does a plain HTTP connection (or one that was already released):
+    response.connection.transport.get_extra_info.return_value = None
+    for plain_response in (response, MagicMock(status=200, connection=None)):
+        timing = await time_attempt(plain_response)
+        assert timing.connect is not None
+        assert timing.tls is None
@@ -0,0 +1,382 @@
+"""Define tests for request rate limiting."""
+
+import asyncio
+import json
+import time
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.controller import LocalController, RemoteController
+from regenmaschine.limiter import (
+    PriorityGate,
+    RequestLimiter,
+    RequestLimits,
+    RequestPrioritizer,
+    RequestPriority,
+    TokenBucket,
+)
+from regenmaschine.metrics import MetricsRegistry
+from tests.common import (
+    TEST_EMAIL,
+    TEST_HOST,
+    TEST_MAC,
+    TEST_PASSWORD,
+    TEST_PORT,
+    load_fixture,
+)
+
+
+async def measure_concurrency(*limiters: RequestLimiter) -> int:
+    """Run requests through limiters and measure the peak concurrency.
+
+    Args:
+        *limiters: The limiters to send (five) requests through each.
+
+    Returns:
+        The peak number of concurrent requests.
+    """
+    in_flight = 0
+    peak = 0
+
+    async def request(limiter: RequestLimiter) -> None:
+        """Simulate a request.
+
+        Args:
+            limiter: The limiter to go through.
+        """
+        nonlocal in_flight, peak
+        async with limiter.async_slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+    await asyncio.gather(*(request(limiter) for limiter in limiters for _ in range(5)))
+    return peak
+
+
+@pytest.mark.asyncio
+async def test_token_bucket() -> None:
+    """Test that a token bucket allows a burst and then enforces its rate."""
+    bucket = TokenBucket(rate=100, burst=2)
+
+    start = time.monotonic()
+    await bucket.async_acquire()
+    await bucket.async_acquire()
+    assert time.monotonic() - start < 0.005
+
+    await bucket.async_acquire()
+    assert time.monotonic() - start >= 0.009
+
+    # A limiter with a rate sends requests through its bucket:
+    limiter = RequestLimiter(RequestLimits(rate=100, burst=1))
+    start = time.monotonic()
+    for _ in range(2):
+        async with limiter.async_slot():
+            pass
+    assert time.monotonic() - start >= 0.009
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight() -> None:
+    """Test that a limiter caps the number of concurrent requests."""
+    assert (
+        await measure_concurrency(RequestLimiter(RequestLimits(max_in_flight=2))) == 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_account_limiter() -> None:
+    """Test that controllers on the same account share the account's budget."""
+    account_limiter = RequestLimiter(RequestLimits(max_in_flight=1))
+    controller_limiters = [
+        RequestLimiter(RequestLimits(max_in_flight=5), account_limiter)
+        for _ in range(2)
+    ]
+    assert await measure_concurrency(*controller_limiters) == 1
+
+    # The client creates a single limiter per account:
+    client = Client(
+        options=ClientOptions(account_limits=RequestLimits(max_in_flight=1))
+    )
+    for _ in range(2):
+        client._configure_controller(
+            RemoteController(client._request), email=TEST_EMAIL
+        )
+    assert list(client._account_limiters) == [TEST_EMAIL]
+
+
+@pytest.mark.asyncio
+async def test_controller_limits(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that controller requests go through the limiter (and record their waits).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    metrics = MetricsRegistry()
+
+    async with authenticated_local_client:
+        for endpoint, fixture in (
+            ("watering/queue", "watering_queue_response.json"),
+            ("watering/zone", "watering_zone_response.json"),
+        ):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/{endpoint}",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture(fixture)), status=200
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session,
+                options=ClientOptions(
+                    controller_limits=RequestLimits(max_in_flight=1), metrics=metrics
+                ),
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+            assert controller.limiter is not None
+
+            await asyncio.gather(
+                controller.watering.queue(), controller.zones.running()
+            )
+
+    aresponses.assert_plan_strictly_followed()
+
+    rendered = metrics.render_prometheus()
+    assert (
+        "regenmaschine_request_queue_wait_seconds_count"
+        f'{{controller="{TEST_MAC}",endpoint="watering/zone"}} 1'
+    ) in rendered
+
+
+def test_no_default_limits() -> None:
+    """Test that controllers aren't limited (or prioritized) unless limits are set."""
+    client = Client()
+    controllers = [
+        client._configure_controller(
+            LocalController(client._request, TEST_HOST, TEST_PORT, False)
+        ),
+        client._configure_controller(RemoteController(client._request)),
+    ]
+    assert all(controller.limiter is None for controller in controllers)
+
+
+async def admission_order(
+    gate: PriorityGate, priorities: list[RequestPriority], delay: float = 0
+) -> list[int]:
+    """Queue waiters at a (full) gate and return the order in which they're admitted.
+
+    Args:
+        gate: A PriorityGate with a capacity of 1.
+        priorities: The priorities of the waiters (in the order they arrive).
+        delay: The number of seconds to hold the gate after the waiters arrive.
+
+    Returns:
+        The indices of the waiters in the order they were admitted.
+    """
+    order: list[int] = []
+
+    async def wait(index: int, priority: RequestPriority) -> None:
+        """Wait at the gate.
+
+        Args:
+            index: The waiter's index.
+            priority: The waiter's priority.
+        """
+        async with gate.async_slot(priority):
+            order.append(index)
+
+    async with gate.async_slot(RequestPriority.NORMAL):
+        tasks = []
+        for index, priority in enumerate(priorities):
+            tasks.append(asyncio.create_task(wait(index, priority)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(delay)
+
+    await asyncio.gather(*tasks)
+    return order
+
+
+@pytest.mark.parametrize(
+    "method,endpoint,priority",
+    [
+        ("post", "zone/3/stop", RequestPriority.CRITICAL),
+        ("post", "watering/stopall", RequestPriority.CRITICAL),
+        ("post", "watering/pauseall", RequestPriority.CRITICAL),
+        ("post", "zone/3/start", RequestPriority.CONTROL),
+        ("get", "watering/queue", RequestPriority.NORMAL),
+        ("get", "watering/log/details/2023-01-01/2", RequestPriority.BULK),
+        ("get", "dailystats/details", RequestPriority.BULK),
+    ],
+)
+def test_get_priority(endpoint: str, method: str, priority: RequestPriority) -> None:
+    """Test that requests are prioritized by their method and endpoint.
+
+    Args:
+        endpoint: An API URL endpoint.
+        method: An HTTP method.
+        priority: The expected priority.
+    """
+    assert RequestPrioritizer().get_priority(method, endpoint) is priority
+
+
+@pytest.mark.asyncio
+async def test_priority_gate() -> None:
+    """Test that a gate admits waiters by priority (and then by arrival)."""
+    order = await admission_order(
+        PriorityGate(1),
+        [
+            RequestPriority.BULK,
+            RequestPriority.NORMAL,
+            RequestPriority.CRITICAL,
+            RequestPriority.NORMAL,
+        ],
+    )
+    assert order == [2, 1, 3, 0]
+
+    # Without aging, only priority (and then arrival) counts:
+    order = await admission_order(
+        PriorityGate(1, aging_interval=0),
+        [RequestPriority.BULK, RequestPriority.CRITICAL],
+        delay=0.01,
+    )
+    assert order == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_priority_gate_aging() -> None:
+    """Test that a long-waiting, low-priority waiter isn't starved."""
+    gate = PriorityGate(1, aging_interval=0.01)
+
+    async def wait_then_queue_critical() -> list[int]:
+        """Queue a bulk waiter, let it age, and then queue a critical one.
+
+        Returns:
+            The indices of the waiters in the order they were admitted.
+        """
+        order: list[int] = []
+
+        async def wait(index: int, priority: RequestPriority) -> None:
+            """Wait at the gate.
+
+            Args:
+                index: The waiter's index.
+                priority: The waiter's priority.
+            """
+            async with gate.async_slot(priority):
+                order.append(index)
+
+        async with gate.async_slot(RequestPriority.NORMAL):
+            bulk = asyncio.create_task(wait(0, RequestPriority.BULK))
+            await asyncio.sleep(0.05)
+            critical = asyncio.create_task(wait(1, RequestPriority.CRITICAL))
+            await asyncio.sleep(0)
+
+        await asyncio.gather(bulk, critical)
+        return order
+
+    assert await wait_then_queue_critical() == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_priority_gate_cancellation() -> None:
+    """Test that a cancelled waiter doesn't hold up (or leak) the gate."""
+    gate = PriorityGate(1)
+
+    async def wait() -> None:
+        """Wait at the gate."""
+        async with gate.async_slot(RequestPriority.CRITICAL):
+            pass
+
+    async with gate.async_slot(RequestPriority.NORMAL):
+        task = asyncio.create_task(wait())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert await admission_order(gate, [RequestPriority.BULK]) == [0]
+
+
+@pytest.mark.asyncio
+async def test_priority_gate_cancellation_races() -> None:
+    """Test cancelling waiters just before (and just after) they're admitted."""
+    gate = PriorityGate(1)
+
+    async def wait() -> None:
+        """Wait at the gate."""
+        async with gate.async_slot(RequestPriority.NORMAL):
+            pass
+
+    # The waiter is cancelled before the slot is released (but hasn't handled the
+    # cancellation yet):
+    async with gate.async_slot(RequestPriority.NORMAL):
+        task = asyncio.create_task(wait())
+        await asyncio.sleep(0)
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The waiter is granted the slot and then cancelled before it runs:
+    async with gate.async_slot(RequestPriority.NORMAL):
+        task = asyncio.create_task(wait())
+        await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert await admission_order(gate, [RequestPriority.BULK]) == [0]
+
+
+@pytest.mark.asyncio
+async def test_controller_priorities(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a stop command jumps ahead of a queued bulk read.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        # Routes are matched in order, so these also assert the order of requests:
+        for endpoint, method, fixture in (
+            ("watering/queue", "get", "watering_queue_response.json"),
+            ("watering/stopall", "post", "watering_stopall_response.json"),
+            ("watering/log/details", "get", "watering_log_response.json"),
+        ):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/{endpoint}",
+                method,
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture(fixture)), status=200
+                ),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session,
+                options=ClientOptions(controller_limits=RequestLimits(max_in_flight=1)),
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            queue = asyncio.create_task(controller.watering.queue())
+            await asyncio.sleep(0)
+            log = asyncio.create_task(controller.watering.log(details=True))
+            await asyncio.sleep(0)
+            await controller.watering.stop_all()
+            await asyncio.gather(queue, log)
+
+    aresponses.assert_plan_strictly_followed()
@@ -0,0 +1,175 @@
+"""Define tests for request metrics."""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.errors import (
+    CircuitOpenError,
+    ConnectionFailedError,
+    RequestError,
+    TokenExpiredError,
+)
+from regenmaschine.metrics import MetricsRegistry, normalize_endpoint
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT
+
+
+@pytest.mark.parametrize(
+    "endpoint,template",
+    [
+        ("zone", "zone"),
+        ("zone/3/start", "zone/{id}/start"),
+        ("program/12", "program/{id}"),
+        ("dailystats/2023-06-01", "dailystats/{date}"),
+        ("watering/log/details/2023-06-01/7", "watering/log/details/{date}/{id}"),
+        ("/devices/login-sprinkler", "/devices/login-sprinkler"),
+    ],
+)
+def test_normalize_endpoint(endpoint: str, template: str) -> None:
+    """Test that endpoints are normalized into templates.
+
+    Args:
+        endpoint: An API URL endpoint.
+        template: The expected endpoint template.
+    """
+    assert normalize_endpoint(endpoint) == template
+
+
+def test_render_prometheus() -> None:
+    """Test rendering metrics in the Prometheus text format."""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe_request(TEST_MAC, "zone/3/start", "post", 0.05)
+    registry.observe_request(TEST_MAC, "zone/4/start", "post", 0.5)
+    registry.observe_request(
+        TEST_MAC, "zone/4/start", "post", 2.0, RequestError("Oops")
+    )
+    registry.observe_retry(None, "apiVer")
+
+    assert registry.request_count(TEST_MAC, "zone/{id}/start", "POST") == 3
+    assert registry.error_count(TEST_MAC, "zone/5/start", RequestError) == 1
+    assert registry.retry_count(None, "apiVer") == 1
+
+    labels = f'controller="{TEST_MAC}",endpoint="zone/{{id}}/start",method="POST"'
+    lines = registry.render_prometheus().splitlines()
+    assert f'regenmaschine_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in (
+        lines
+    )
+    assert f'regenmaschine_request_duration_seconds_bucket{{{labels},le="1.0"}} 2' in (
+        lines
+    )
+    assert (
+        f'regenmaschine_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3'
+        in lines
+    )
+    assert f"regenmaschine_request_duration_seconds_sum{{{labels}}} 2.55" in lines
+    assert f"regenmaschine_requests_total{{{labels}}} 3" in lines
+    assert (
+        "regenmaschine_request_retries_total"
+        '{controller="unknown",endpoint="apiVer"} 1' in lines
+    )
+    assert (
+        "regenmaschine_request_errors_total"
+        f'{{controller="{TEST_MAC}",endpoint="zone/{{id}}/start",'
+        'error="RequestError"} 1' in lines
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_metrics(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that the client records requests, retries, and errors.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    registry = MetricsRegistry()
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session, options=ClientOptions(metrics=registry))
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        controller = client.controllers[TEST_MAC]
+
+        with (
+            pytest.raises(RequestError),
+            patch.object(
+                session, "request", side_effect=aiohttp.ServerDisconnectedError
+            ),
+        ):
+            await controller.zones.start(3, 60)
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert registry.request_count(None, "auth/login", "post") == 1
+    assert registry.request_count(None, "provision/wifi", "get") == 1
+    assert registry.request_count(TEST_MAC, "zone/{id}/start", "post") == 1
+    assert registry.retry_count(TEST_MAC, "zone/{id}/start") == 1
+    assert registry.error_count(TEST_MAC, "zone/{id}/start", ConnectionFailedError) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_metrics_unsent_requests(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that requests that fail before being sent are counted (but not cancelled).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    registry = MetricsRegistry()
+
+    async def hang(*args: Any, **kwargs: Any) -> None:
+        """Never respond.
+
+        Args:
+            *args: Unused positional arguments.
+            **kwargs: Unused keyword arguments.
+        """
+        await asyncio.Event().wait()
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(
+            session=session,
+            options=ClientOptions(circuit_breakers=True, metrics=registry),
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        controller = client.controllers[TEST_MAC]
+
+        with patch.object(client, "_send_with_session", hang):
+            task = asyncio.create_task(controller.programs.all())
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with (
+            pytest.raises(TokenExpiredError),
+            patch.object(
+                controller,
+                "_access_token_expiration",
+                datetime.now() - timedelta(seconds=1),
+            ),
+        ):
+            await controller.zones.all()
+
+        with patch.object(session, "request", side_effect=aiohttp.ClientOSError):
+            for _ in range(3):
+                with pytest.raises(ConnectionFailedError):
+                    await controller.watering.queue()
+            with pytest.raises(CircuitOpenError):
+                await controller.watering.queue()
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert registry.request_count(TEST_MAC, "program", "get") == 0
+    assert registry.error_count(TEST_MAC, "zone", TokenExpiredError) == 1
+    assert registry.request_count(TEST_MAC, "watering/queue", "get") == 4
+    assert registry.error_count(TEST_MAC, "watering/queue", CircuitOpenError) == 1
@@ -0,0 +1,54 @@
+"""Define tests for typed models."""
+
+import json
+import sys
+
+import pytest
+
+from regenmaschine.models import QueueEntry, ZoneData
+from tests.common import load_fixture
+
+
+def test_model_fields() -> None:
+    """Test that known fields become attributes and unknown fields are kept."""
+    data = {
+        "zid": 3,
+        "pid": 1,
+        "name": "Lawn",
+        "running": True,
+        "remaining": 120,
+        "availableWater": 0.5,
+    }
+    entry = QueueEntry.from_dict(data)
+    assert entry.zone_id == 3
+    assert entry.program_id == 1
+    assert entry.running is True
+    assert entry.get("zid") == 3
+    assert entry.get("availableWater") == 0.5
+    assert entry.get("missing", "default") == "default"
+    assert entry.extras == {"availableWater": 0.5}
+    assert entry.to_dict() == {**QueueEntry().to_dict(), **data}
+
+
+def test_model_slots() -> None:
+    """Test that models don't carry a per-instance dictionary."""
+    zone = ZoneData.from_dict({"uid": 1, "name": "Lawn"})
+    assert not hasattr(zone, "__dict__")
+    with pytest.raises(AttributeError):
+        zone.unknown = True  # type: ignore[attr-defined]
+
+
+def test_model_size() -> None:
+    """Test that models are smaller than the dictionaries they're created from."""
+    zones = json.loads(load_fixture("zone_properties_response.json"))["zones"]
+    models = [ZoneData.from_dict(zone) for zone in zones]
+    assert [model.to_dict() for model in models] == [
+        {**ZoneData(uid=zone["uid"]).to_dict(), **zone} for zone in zones
+    ]
+
+    # Models with the same unknown fields share their keys:
+    assert all(model.extra_keys is models[0].extra_keys for model in models)
+    for model, zone in zip(models, zones):
+        assert sys.getsizeof(model) + sys.getsizeof(model.extra_values) < (
+            sys.getsizeof(zone)
+        )
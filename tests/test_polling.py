@@ -0,0 +1,339 @@
+"""Define tests for the polling coordinator."""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any
+from unittest.mock import AsyncMock, Mock
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client
+from regenmaschine.controller import Controller, LocalController
+from regenmaschine.polling import (
+    AdaptiveInterval,
+    ControllerActivity,
+    PollingCoordinator,
+    TimerWheel,
+    get_seconds_until_next_run,
+    get_start_offset,
+)
+from regenmaschine.snapshot import SnapshotPart, SnapshotSection
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+def test_timer_wheel() -> None:
+    """Test that items come due after the right number of ticks."""
+    wheel: TimerWheel[str] = TimerWheel(4)
+    wheel.schedule("a", 1)
+    wheel.schedule("b", 3)
+    wheel.schedule("c", 6)
+    assert len(wheel) == 3
+
+    due = {tick: wheel.advance() for tick in range(1, 9)}
+    assert due == {1: ["a"], 2: [], 3: ["b"], 4: [], 5: [], 6: ["c"], 7: [], 8: []}
+    assert len(wheel) == 0
+
+
+def test_start_offset() -> None:
+    """Test that start offsets are deterministic and spread across the interval."""
+    controllers = []
+    for index in range(100):
+        controller = LocalController(AsyncMock(), TEST_HOST, TEST_PORT)
+        controller.mac = f"aa:bb:cc:dd:ee:{index:02x}"
+        controllers.append(controller)
+
+    offsets = [
+        get_start_offset(controller, SnapshotPart.ZONES, 60)
+        for controller in controllers
+    ]
+    assert offsets == [
+        get_start_offset(controller, SnapshotPart.ZONES, 60)
+        for controller in controllers
+    ]
+    assert all(0 <= offset < 60 for offset in offsets)
+    # The offsets shouldn't bunch up in one part of the interval:
+    assert min(offsets) < 15 and max(offsets) > 45
+
+
+@pytest.mark.asyncio
+async def test_polling_coordinator(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a coordinator repeatedly polls a controller and notifies listeners.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    results: list[tuple[Controller, SnapshotSection[Any]]] = []
+    done = asyncio.Event()
+
+    def listener(controller: Controller, section: SnapshotSection[Any]) -> None:
+        """Record a refreshed section.
+
+        Args:
+            controller: The Controller that was polled.
+            section: The refreshed SnapshotSection.
+        """
+        results.append((controller, section))
+        if len(results) == 2:
+            done.set()
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/restrictions/raindelay",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("restrictions_raindelay_response.json")),
+                status=200,
+            ),
+            repeat=2,
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            coordinator = PollingCoordinator(tick=0.01)
+            coordinator.add_listener(listener)
+            coordinator.add(controller, SnapshotPart.RAIN_DELAY, 0.05)
+            coordinator.start()
+            assert coordinator.running
+
+            await asyncio.wait_for(done.wait(), 5)
+            await coordinator.async_stop()
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert [c for c, _ in results] == [controller, controller]
+    assert all(section.part is SnapshotPart.RAIN_DELAY for _, section in results)
+    assert results[0][1].fetched_at < results[1][1].fetched_at
+
+
+@pytest.mark.asyncio
+async def test_polling_max_in_flight() -> None:
+    """Test that the coordinator caps the number of concurrent refreshes."""
+    in_flight = 0
+    peak = 0
+    finished = 0
+    done = asyncio.Event()
+
+    async def request(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        """Simulate a slow request.
+
+        Args:
+            *args: Unused positional arguments.
+            **kwargs: Unused keyword arguments.
+
+        Returns:
+            An API response payload.
+        """
+        nonlocal finished, in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        finished += 1
+        if finished == 10:
+            done.set()
+        return {"delayCounter": -1}
+
+    coordinator = PollingCoordinator(tick=0.001, max_in_flight=3)
+    for index in range(10):
+        controller = LocalController(request, TEST_HOST, TEST_PORT)
+        controller.mac = f"aa:bb:cc:dd:ee:{index:02x}"
+        coordinator.add(controller, SnapshotPart.RAIN_DELAY, 0.002)
+
+    coordinator.start()
+    await asyncio.wait_for(done.wait(), 5)
+    await coordinator.async_stop()
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_polling_removal(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that removed jobs (and broken or removed listeners) are left alone.
+
+    Args:
+        caplog: A mocked logging utility.
+    """
+    counts: dict[str, int] = {}
+    controller = create_fake_controller(
+        0, {"restrictions/raindelay": {"delayCounter": -1}}, counts
+    )
+    done = asyncio.Event()
+
+    coordinator = PollingCoordinator(tick=0.005)
+    coordinator.add_listener(Mock(side_effect=ValueError("Broken")))
+    remove_listener = coordinator.add_listener(lambda *_: done.set())
+    remove = coordinator.add(controller, SnapshotPart.RAIN_DELAY, 0.02)
+    coordinator.start()
+
+    await asyncio.wait_for(done.wait(), 5)
+    assert "Error in polling listener" in caplog.text
+
+    # The job's next refresh is already scheduled, but it's skipped once removed:
+    remove_listener()
+    remove()
+    remove()
+    polls = counts["restrictions/raindelay"]
+    await asyncio.sleep(0.1)
+    await coordinator.async_stop()
+
+    assert counts["restrictions/raindelay"] == polls
+    assert not coordinator._jobs  # pylint: disable=protected-access
+
+
+def create_fake_controller(
+    index: int, responses: dict[str, Any], counts: dict[str, int]
+) -> LocalController:
+    """Create a controller whose requests are answered from a dictionary.
+
+    Args:
+        index: A number that makes the controller's MAC address unique.
+        responses: A dictionary of endpoint to response payload (or to a callable that
+            returns one).
+        counts: A dictionary in which to count the requests to each endpoint.
+
+    Returns:
+        A LocalController.
+    """
+
+    async def request(*args: Any, endpoint: str, **kwargs: Any) -> dict[str, Any]:
+        """Answer a request.
+
+        Args:
+            *args: Unused positional arguments.
+            endpoint: An API URL endpoint.
+            **kwargs: Unused keyword arguments.
+
+        Returns:
+            An API response payload.
+        """
+        counts[endpoint] = counts.get(endpoint, 0) + 1
+        response = responses[endpoint]
+        return response() if callable(response) else response  # type: ignore[no-any-return]
+
+    controller = LocalController(request, TEST_HOST, TEST_PORT)
+    controller.mac = f"aa:bb:cc:dd:ee:{index:02x}"
+    return controller
+
+
+def test_adaptive_interval() -> None:
+    """Test that an adaptive interval tightens when active and backs off when idle."""
+    interval = AdaptiveInterval(active_interval=5, idle_interval=60, backoff_factor=2)
+    assert interval.get_next_interval(40, True) == 5
+    assert interval.get_next_interval(5, False) == 10
+    assert interval.get_next_interval(40, False) == 60
+
+
+def test_seconds_until_next_run() -> None:
+    """Test finding the soonest next program run (including past midnight)."""
+    now = datetime(2023, 6, 1, 23, 50, 30)
+    assert (
+        get_seconds_until_next_run(
+            [{"pid": 1, "startTime": "06:00"}, {"pid": 2, "startTime": "00:10"}], now
+        )
+        == 19 * 60 + 30
+    )
+    assert get_seconds_until_next_run([{"pid": 1, "startTime": "bad"}], now) is None
+    assert get_seconds_until_next_run([], now) is None
+
+
+def test_controller_activity() -> None:
+    """Test tracking whether a controller is active."""
+    now = datetime(2023, 6, 1, 5, 0)
+    activity = ControllerActivity()
+    assert not activity.is_active(600, now)
+
+    activity.update(
+        SnapshotSection(
+            SnapshotPart.NEXT_RUNS, now, data=[{"pid": 1, "startTime": "05:05"}]
+        )
+    )
+    assert activity.is_active(600, now)
+    assert not activity.is_active(60, now)
+
+    activity.update(
+        SnapshotSection(
+            SnapshotPart.RUNNING_ZONES,
+            now,
+            data=[{"uid": 1, "state": 0}, {"uid": 2, "state": 1}],
+        )
+    )
+    assert activity.is_active(60, now)
+
+    # A section that failed to refresh doesn't change anything:
+    activity.update(SnapshotSection(SnapshotPart.RUNNING_ZONES, now))
+    assert activity.running_zones
+
+    activity.update(
+        SnapshotSection(
+            SnapshotPart.RUNNING_PROGRAMS, now, data=[{"uid": 1, "status": 1}]
+        )
+    )
+    assert activity.running_programs
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling() -> None:
+    """Test that idle controllers are polled far less often than active ones."""
+    counts: list[dict[str, int]] = [{}, {}]
+    controllers = [
+        create_fake_controller(
+            index,
+            {"watering/zone": {"zones": [{"uid": 1, "state": index}]}},
+            counts[index],
+        )
+        for index in range(2)
+    ]
+
+    coordinator = PollingCoordinator(tick=0.005)
+    for controller in controllers:
+        coordinator.add(
+            controller,
+            SnapshotPart.RUNNING_ZONES,
+            AdaptiveInterval(active_interval=0.005, idle_interval=0.08),
+        )
+    coordinator.start()
+    await asyncio.sleep(0.3)
+    await coordinator.async_stop()
+
+    idle, active = (count["watering/zone"] for count in counts)
+    assert active > 2 * idle
+    assert coordinator.get_activity(controllers[1]).running_zones
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling_tightens() -> None:
+    """Test that a backed-off job is rescheduled once its controller becomes active."""
+    counts: dict[str, int] = {}
+    queues = iter([[], [{"uid": 1}]])
+    controller = create_fake_controller(
+        0,
+        {
+            "watering/queue": lambda: {"queue": next(queues, [{"uid": 1}])},
+            "watering/zone": {"zones": [{"uid": 1, "state": 0}]},
+        },
+        counts,
+    )
+
+    coordinator = PollingCoordinator(tick=0.005)
+    coordinator.add(
+        controller,
+        SnapshotPart.RUNNING_ZONES,
+        AdaptiveInterval(active_interval=0.01, idle_interval=60, backoff_factor=6000),
+    )
+    coordinator.add(controller, SnapshotPart.WATERING_QUEUE, 0.05)
+    coordinator.start()
+    await asyncio.sleep(0.3)
+    await coordinator.async_stop()
+
+    # Without tightening, the zones would be polled once (and then not for a minute):
+    assert counts["watering/zone"] > 2
@@ -0,0 +1,165 @@
+"""Define tests for the retry policy."""
+
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.errors import (
+    ConnectionFailedError,
+    RequestTimeoutError,
+    ServerError,
+    TokenExpiredError,
+)
+from regenmaschine.metrics import MetricsRegistry
+from regenmaschine.retry import RetryPolicy, RetryState
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+@pytest.mark.parametrize(
+    "method,endpoint,idempotent",
+    [
+        ("get", "zone/3", True),
+        ("post", "zone/3/properties", True),
+        ("post", "zone/3/stop", True),
+        ("post", "zone/3/start", False),
+        ("post", "program/2/start", False),
+        ("post", "machine/reboot", False),
+        ("post", "parser/data", False),
+    ],
+)
+def test_idempotency(endpoint: str, idempotent: bool, method: str) -> None:
+    """Test that only idempotent requests are considered safe to replay.
+
+    Args:
+        endpoint: An API URL endpoint.
+        idempotent: Whether the request should be considered idempotent.
+        method: An HTTP method.
+    """
+    assert RetryPolicy().is_idempotent(method, endpoint) is idempotent
+
+
+def test_should_retry() -> None:
+    """Test which failures are retried."""
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry("get", "zone", RequestTimeoutError(), 1)
+    assert policy.should_retry("get", "zone", ConnectionFailedError(), 2)
+    assert not policy.should_retry("get", "zone", ServerError(), 3)
+    assert not policy.should_retry("get", "zone", TokenExpiredError(), 1)
+    assert not policy.should_retry("post", "zone/1/start", ServerError(), 1)
+
+
+def test_backoff() -> None:
+    """Test that backoff delays are jittered and capped."""
+    policy = RetryPolicy(backoff_base=1, backoff_cap=5)
+    for retry in range(10):
+        assert 0 <= policy.get_backoff(retry) <= min(5, 2**retry)
+
+
+def test_retry_state() -> None:
+    """Test that a request's attempts are counted against its policy (and deadline)."""
+    retry = RetryState(RetryPolicy(max_attempts=3, backoff_cap=0), "get", "zone")
+    assert retry.get_retry_delay(RequestTimeoutError()) == 0
+    assert retry.get_retry_delay(RequestTimeoutError()) == 0
+    assert retry.get_retry_delay(RequestTimeoutError()) is None
+    assert retry.attempts == 3
+
+    retry = RetryState(RetryPolicy(max_attempts=3, deadline=5), "get", "zone")
+    with patch("regenmaschine.retry.time.monotonic", return_value=retry.start + 5):
+        assert retry.get_retry_delay(RequestTimeoutError()) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_transient_errors(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that idempotent requests are retried (and others are not).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    registry = MetricsRegistry()
+
+    async with authenticated_local_client:
+        for _ in range(2):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                "/api/4/watering/queue",
+                "get",
+                response=aresponses.Response(status=503),
+            )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aiohttp.web_response.json_response(
+                json.loads(load_fixture("watering_queue_response.json")), status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/zone/1/start",
+            "post",
+            response=aresponses.Response(status=503),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session,
+                options=ClientOptions(
+                    metrics=registry,
+                    retry_policy=RetryPolicy(max_attempts=3, backoff_base=0),
+                ),
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            assert await controller.watering.queue() == []
+            assert registry.retry_count(TEST_MAC, "watering/queue") == 2
+
+            # Starting a zone isn't idempotent, so it's never replayed:
+            with pytest.raises(ServerError):
+                await controller.zones.start(1, 60)
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_retry_deadline(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that a request isn't retried past the policy's deadline.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/queue",
+            "get",
+            response=aresponses.Response(status=503),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session,
+                options=ClientOptions(
+                    retry_policy=RetryPolicy(max_attempts=5, deadline=5)
+                ),
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            with (
+                pytest.raises(ServerError),
+                patch("regenmaschine.retry.random.uniform", return_value=10),
+            ):
+                await controller.watering.queue()
+
+    aresponses.assert_plan_strictly_followed()
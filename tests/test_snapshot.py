@@ -0,0 +1,94 @@
+"""Define tests for controller snapshots."""
+
+import json
+from dataclasses import fields
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client
+from regenmaschine.controller import LocalController
+from regenmaschine.errors import ServerError, UnknownAPICallError
+from regenmaschine.snapshot import ControllerSnapshot, SnapshotPart, get_part_fetchers
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+def test_snapshot_parts() -> None:
+    """Test that every part has a fetcher and a matching snapshot attribute."""
+    fetchers = get_part_fetchers(LocalController(AsyncMock(), TEST_HOST, TEST_PORT))
+    assert set(fetchers) == set(SnapshotPart)
+    assert {part.value for part in SnapshotPart} <= {
+        snapshot_field.name for snapshot_field in fields(ControllerSnapshot)
+    }
+
+
+@pytest.mark.asyncio
+async def test_snapshot(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test taking a snapshot (with sections that can't be fetched).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        for endpoint, fixture in (
+            ("provision", "provision_response.json"),
+            ("restrictions/raindelay", "restrictions_raindelay_response.json"),
+        ):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/{endpoint}",
+                "get",
+                response=aiohttp.web_response.json_response(
+                    json.loads(load_fixture(fixture)), status=200
+                ),
+            )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/program",
+            "get",
+            response=aresponses.Response(status=500),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+            # Simulate a 1st generation controller (which has no diagnostics API):
+            controller.hardware_version = "1"
+
+            snapshot = await controller.snapshot(
+                [
+                    SnapshotPart.DIAGNOSTICS,
+                    SnapshotPart.PROGRAMS,
+                    SnapshotPart.RAIN_DELAY,
+                    SnapshotPart.PROVISION_SETTINGS,
+                ]
+            )
+
+    aresponses.assert_plan_strictly_followed()
+
+    assert snapshot.mac == TEST_MAC
+    assert snapshot.zones is None
+    assert snapshot.provision_settings is not None
+    assert snapshot.provision_settings.data == json.loads(
+        load_fixture("provision_response.json")
+    )
+    assert snapshot.rain_delay is not None
+    assert snapshot.rain_delay.success
+    assert snapshot.rain_delay.fetched_at >= snapshot.taken_at
+
+    assert set(snapshot.sections) == {
+        SnapshotPart.DIAGNOSTICS,
+        SnapshotPart.PROGRAMS,
+        SnapshotPart.RAIN_DELAY,
+        SnapshotPart.PROVISION_SETTINGS,
+    }
+    errors = snapshot.errors
+    assert set(errors) == {SnapshotPart.DIAGNOSTICS, SnapshotPart.PROGRAMS}
+    assert isinstance(errors[SnapshotPart.DIAGNOSTICS], UnknownAPICallError)
+    assert isinstance(errors[SnapshotPart.PROGRAMS], ServerError)
@@ -0,0 +1,654 @@
+"""Define tests for the controller store."""
+
+# pylint: disable=protected-access
+import asyncio
+import json
+import stat
+import time
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.store import ControllerRecord, ControllerStore
+from tests.common import (
+    TEST_ACCESS_TOKEN,
+    TEST_EMAIL,
+    TEST_HOST,
+    TEST_MAC,
+    TEST_NAME,
+    TEST_PASSWORD,
+    TEST_PORT,
+    TEST_SPRINKLER_ID,
+    TEST_SW_VERSION,
+    load_fixture,
+)
+
+TEST_NEW_MAC = "ab:cd:ef:65:43:21"
+
+
+def get_local_record(**kwargs: Any) -> ControllerRecord:
+    """Get a record of the local test controller (with an unexpired access token).
+
+    Args:
+        **kwargs: Fields to override.
+
+    Returns:
+        A ControllerRecord.
+    """
+    return ControllerRecord(
+        **{
+            "mac": TEST_MAC,
+            "base_url": f"http://{TEST_HOST}:{TEST_PORT}/api/4",
+            "use_ssl": False,
+            "name": TEST_NAME,
+            "api_version": "4.5.0",
+            "hardware_version": "3",
+            "software_version": TEST_SW_VERSION,
+            "access_token": TEST_ACCESS_TOKEN,
+            "access_token_expiration": time.time() + 3600,
+            **kwargs,
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_round_trip(tmp_path: Path) -> None:
+    """Test that records survive a round trip through a private file.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(get_local_record())
+    await store.async_save()
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert TEST_PASSWORD not in path.read_text(encoding="utf-8")
+
+    new_store = ControllerStore(path)
+    await new_store.async_load()
+    record = new_store.get(TEST_MAC)
+    assert record is not None
+    assert record.name == TEST_NAME
+    assert record.has_valid_token
+
+    # Remote tokens don't expire (as far as the cloud says), but missing ones can't be
+    # used:
+    assert get_local_record(access_token_expiration=None).has_valid_token
+    assert not get_local_record(access_token=None).has_valid_token
+
+    new_store.remove(TEST_MAC)
+    assert not new_store.records
+
+
+@pytest.mark.asyncio
+async def test_store_ignores_bad_files(tmp_path: Path) -> None:
+    """Test that an unreadable (or unknown) store file is ignored.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+
+    path.write_text("not json", encoding="utf-8")
+    store = ControllerStore(path)
+    await store.async_load()
+    assert not store.records
+
+    path.write_text(json.dumps({"version": 999, "controllers": []}), encoding="utf-8")
+    store = ControllerStore(path)
+    await store.async_load()
+    assert not store.records
+
+    path.write_text(
+        json.dumps({"version": 1, "controllers": [{"mac": TEST_MAC}]}),
+        encoding="utf-8",
+    )
+    store = ControllerStore(path)
+    await store.async_load()
+    assert not store.records
+
+
+@pytest.mark.asyncio
+async def test_warm_restart(
+    api_version_response: dict[str, Any],
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    provision_name_response: dict[str, Any],
+    provision_wifi_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test that a stored controller loads without requests and revalidates later.
+
+    Args:
+        api_version_response: An API response payload.
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        provision_name_response: An API response payload.
+        provision_wifi_response: An API response payload.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+
+    async with authenticated_local_client:
+        # The background revalidation after the warm restart:
+        for endpoint, response in (
+            ("provision/wifi", provision_wifi_response),
+            ("apiVer", api_version_response),
+            ("provision/name", provision_name_response),
+        ):
+            authenticated_local_client.add(
+                f"{TEST_HOST}:{TEST_PORT}",
+                f"/api/4/{endpoint}",
+                "get",
+                response=aiohttp.web_response.json_response(response, status=200),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(store=ControllerStore(path))
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            await client.close()
+
+            client = Client(
+                session=session, options=ClientOptions(store=ControllerStore(path))
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+
+            controller = client.controllers[TEST_MAC]
+            assert controller._access_token == TEST_ACCESS_TOKEN
+            assert controller.name == TEST_NAME
+            assert controller.software_version == TEST_SW_VERSION
+
+            await asyncio.gather(*client._background_tasks)
+            await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_expired_token(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    tmp_path: Path,
+) -> None:
+    """Test that a stored controller with an expired token is loaded from scratch.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(
+        get_local_record(
+            name="Old Name",
+            access_token="expired",
+            access_token_expiration=time.time() - 1,
+        )
+    )
+    await store.async_save()
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(
+            session=session, options=ClientOptions(store=ControllerStore(path))
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+
+        controller = client.controllers[TEST_MAC]
+        assert controller._access_token == TEST_ACCESS_TOKEN
+        assert controller.name == TEST_NAME
+        assert not client._background_tasks
+
+    aresponses.assert_plan_strictly_followed()
+
+    new_store = ControllerStore(path)
+    await new_store.async_load()
+    record = new_store.get(TEST_MAC)
+    assert record is not None
+    assert record.name == TEST_NAME
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_remote(
+    api_version_response: dict[str, Any],
+    aresponses: ResponsesMockServer,
+    authenticated_remote_client: ResponsesMockServer,
+    remote_auth_login_1_response: dict[str, Any],
+    remote_sprinklers_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test that stored remote controllers load without requests and log in again.
+
+    Args:
+        api_version_response: An API response payload.
+        aresponses: An aresponses server.
+        authenticated_remote_client: A mock remote controller.
+        remote_auth_login_1_response: An API response payload.
+        remote_sprinklers_response: An API response payload.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+
+    async with authenticated_remote_client:
+        # The background revalidation after the warm restart fetches the account's
+        # controllers again, finds that the stored access token has expired, and logs
+        # in again:
+        for host, endpoint, method, response in (
+            ("my.rainmachine.com", "/login/auth", "post", remote_auth_login_1_response),
+            (
+                "my.rainmachine.com",
+                "/devices/get-sprinklers",
+                "post",
+                remote_sprinklers_response,
+            ),
+            (
+                "api.rainmachine.com",
+                f"/{TEST_SPRINKLER_ID}/api/4/apiVer",
+                "get",
+                json.loads(load_fixture("unauthenticated_response.json")),
+            ),
+            (
+                "my.rainmachine.com",
+                "/devices/login-sprinkler",
+                "post",
+                json.loads(load_fixture("remote_auth_login_2_response.json")),
+            ),
+            (
+                "api.rainmachine.com",
+                f"/{TEST_SPRINKLER_ID}/api/4/apiVer",
+                "get",
+                api_version_response,
+            ),
+        ):
+            authenticated_remote_client.add(
+                host,
+                endpoint,
+                method,
+                response=aiohttp.web_response.json_response(response, status=200),
+            )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(store=ControllerStore(path))
+            )
+            await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+            await client.close()
+
+            client = Client(
+                session=session, options=ClientOptions(store=ControllerStore(path))
+            )
+            await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+            # Already loaded controllers aren't restored again:
+            await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+            assert len(client._background_tasks) == 1
+
+            controller = client.controllers[TEST_MAC]
+            assert controller.name == TEST_NAME
+            assert controller.base_url.endswith(f"/{TEST_SPRINKLER_ID}/api/4")
+
+            await asyncio.gather(*client._background_tasks)
+            assert controller._access_token == TEST_ACCESS_TOKEN
+            await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+    store = ControllerStore(path)
+    await store.async_load()
+    record = store.get(TEST_MAC)
+    assert record is not None
+    assert record.email == TEST_EMAIL
+    assert record.sprinkler_id == TEST_SPRINKLER_ID
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_new_controller(
+    api_version_response: dict[str, Any],
+    aresponses: ResponsesMockServer,
+    auth_login_response: dict[str, Any],
+    provision_name_response: dict[str, Any],
+    provision_wifi_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test revalidating a stored host that now belongs to a different controller.
+
+    Args:
+        api_version_response: An API response payload.
+        aresponses: An aresponses server.
+        auth_login_response: An API response payload.
+        provision_name_response: An API response payload.
+        provision_wifi_response: An API response payload.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(get_local_record(access_token="revoked"))
+    await store.async_save()
+
+    # The stored access token is rejected, so the controller is logged into again
+    # (and turns out to have a new MAC address):
+    for endpoint, method, response in (
+        (
+            "provision/wifi",
+            "get",
+            json.loads(load_fixture("unauthenticated_response.json")),
+        ),
+        ("apiVer", "get", api_version_response),
+        ("provision/name", "get", provision_name_response),
+        ("auth/login", "post", auth_login_response),
+        (
+            "provision/wifi",
+            "get",
+            {**provision_wifi_response, "macAddress": TEST_NEW_MAC},
+        ),
+        ("apiVer", "get", api_version_response),
+        ("provision/name", "get", provision_name_response),
+    ):
+        aresponses.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            f"/api/4/{endpoint}",
+            method,
+            response=aiohttp.web_response.json_response(response, status=200),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        client = Client(
+            session=session, options=ClientOptions(store=ControllerStore(path))
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        assert list(client.controllers) == [TEST_MAC]
+
+        await asyncio.gather(*client._background_tasks)
+        # Let the requests from before the login finish:
+        await asyncio.sleep(0)
+        assert list(client.controllers) == [TEST_NEW_MAC]
+        assert client.controllers[TEST_NEW_MAC]._access_token == TEST_ACCESS_TOKEN
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+    store = ControllerStore(path)
+    await store.async_load()
+    assert list(store.records) == [TEST_NEW_MAC]
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_revalidation_error(
+    aresponses: ResponsesMockServer,
+    caplog: pytest.LogCaptureFixture,
+    remote_auth_login_1_response: dict[str, Any],
+    remote_sprinklers_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test that restored controllers are kept when they can't be revalidated.
+
+    Args:
+        aresponses: An aresponses server.
+        caplog: A mocked logging utility.
+        remote_auth_login_1_response: An API response payload.
+        remote_sprinklers_response: An API response payload.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(get_local_record())
+    store.set(
+        get_local_record(
+            mac=TEST_NEW_MAC,
+            base_url=f"https://api.rainmachine.com/{TEST_SPRINKLER_ID}/api/4",
+            use_ssl=True,
+            access_token_expiration=None,
+            email=TEST_EMAIL,
+            sprinkler_id=TEST_SPRINKLER_ID,
+        )
+    )
+    await store.async_save()
+
+    for endpoint in ("provision/wifi", "apiVer", "provision/name"):
+        aresponses.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            f"/api/4/{endpoint}",
+            "get",
+            response=aresponses.Response(text="", status=404),
+        )
+    for endpoint, response in (
+        ("/login/auth", remote_auth_login_1_response),
+        (
+            "/devices/get-sprinklers",
+            {
+                "sprinklers": [
+                    {**remote_sprinklers_response["sprinklers"][0], "mac": TEST_NEW_MAC}
+                ]
+            },
+        ),
+    ):
+        aresponses.add(
+            "my.rainmachine.com",
+            endpoint,
+            "post",
+            response=aiohttp.web_response.json_response(response, status=200),
+        )
+    aresponses.add(
+        "api.rainmachine.com",
+        f"/{TEST_SPRINKLER_ID}/api/4/apiVer",
+        "get",
+        response=aresponses.Response(text="", status=404),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        client = Client(
+            session=session, options=ClientOptions(store=ControllerStore(path))
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        await asyncio.gather(*client._background_tasks)
+        await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+        await asyncio.gather(*client._background_tasks)
+
+        assert sorted(client.controllers) == [TEST_MAC, TEST_NEW_MAC]
+        assert caplog.text.count("Unable to revalidate controller") == 2
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_remote_account_changes(
+    api_version_response: dict[str, Any],
+    aresponses: ResponsesMockServer,
+    remote_auth_login_1_response: dict[str, Any],
+    remote_sprinklers_response: dict[str, Any],
+    tmp_path: Path,
+) -> None:
+    """Test that a warm restart picks up changes to the account's controllers.
+
+    Args:
+        api_version_response: An API response payload.
+        aresponses: An aresponses server.
+        remote_auth_login_1_response: An API response payload.
+        remote_sprinklers_response: An API response payload.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    # The stored controller has since been removed from the account (and the one in
+    # the sprinkler list was added):
+    store.set(
+        get_local_record(
+            mac=TEST_NEW_MAC,
+            base_url="https://api.rainmachine.com/67890fghij/api/4",
+            use_ssl=True,
+            access_token_expiration=None,
+            email=TEST_EMAIL,
+            sprinkler_id="67890fghij",
+        )
+    )
+    await store.async_save()
+
+    for host, endpoint, method, response in (
+        ("my.rainmachine.com", "/login/auth", "post", remote_auth_login_1_response),
+        (
+            "my.rainmachine.com",
+            "/devices/get-sprinklers",
+            "post",
+            remote_sprinklers_response,
+        ),
+        (
+            "my.rainmachine.com",
+            "/devices/login-sprinkler",
+            "post",
+            json.loads(load_fixture("remote_auth_login_2_response.json")),
+        ),
+        (
+            "api.rainmachine.com",
+            f"/{TEST_SPRINKLER_ID}/api/4/apiVer",
+            "get",
+            api_version_response,
+        ),
+    ):
+        aresponses.add(
+            host,
+            endpoint,
+            method,
+            response=aiohttp.web_response.json_response(response, status=200),
+        )
+
+    async with aiohttp.ClientSession() as session:
+        client = Client(
+            session=session, options=ClientOptions(store=ControllerStore(path))
+        )
+        await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+        assert list(client.controllers) == [TEST_NEW_MAC]
+
+        await asyncio.gather(*client._background_tasks)
+        assert list(client.controllers) == [TEST_MAC]
+        assert client.controllers[TEST_MAC].name == TEST_NAME
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+    store = ControllerStore(path)
+    await store.async_load()
+    assert list(store.records) == [TEST_MAC]
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_remote_account_error(
+    aresponses: ResponsesMockServer,
+    caplog: pytest.LogCaptureFixture,
+    tmp_path: Path,
+) -> None:
+    """Test that restored controllers are kept when the account can't be reached.
+
+    Args:
+        aresponses: An aresponses server.
+        caplog: A mocked logging utility.
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(
+        get_local_record(
+            base_url=f"https://api.rainmachine.com/{TEST_SPRINKLER_ID}/api/4",
+            use_ssl=True,
+            access_token_expiration=None,
+            email=TEST_EMAIL,
+            sprinkler_id=TEST_SPRINKLER_ID,
+        )
+    )
+    await store.async_save()
+
+    aresponses.add(
+        "my.rainmachine.com",
+        "/login/auth",
+        "post",
+        response=aresponses.Response(text="", status=404),
+    )
+
+    async with aiohttp.ClientSession() as session:
+        client = Client(
+            session=session, options=ClientOptions(store=ControllerStore(path))
+        )
+        await client.load_remote(TEST_EMAIL, TEST_PASSWORD)
+        await asyncio.gather(*client._background_tasks)
+
+        assert list(client.controllers) == [TEST_MAC]
+        assert "Unable to revalidate the controllers of" in caplog.text
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_warm_restart_closed(tmp_path: Path) -> None:
+    """Test that closing the client cancels pending revalidations.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    path = tmp_path / "controllers.json"
+    store = ControllerStore(path)
+    await store.async_load()
+    store.set(get_local_record())
+    await store.async_save()
+
+    async with aiohttp.ClientSession() as session:
+        client = Client(
+            session=session,
+            options=ClientOptions(refresh_tokens=True, store=ControllerStore(path)),
+        )
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        # Already loaded controllers aren't restored again:
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+        assert len(client._background_tasks) == 1
+
+        (task,) = client._background_tasks
+        await client.close()
+        assert task.cancelled()
+
+    store = ControllerStore(path)
+    await store.async_load()
+    assert list(store.records) == [TEST_MAC]
+
+
+@pytest.mark.asyncio
+async def test_store_errors(
+    aresponses: ResponsesMockServer,
+    authenticated_local_client: ResponsesMockServer,
+    caplog: pytest.LogCaptureFixture,
+    tmp_path: Path,
+) -> None:
+    """Test that partial controllers aren't stored and that save errors are logged.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+        caplog: A mocked logging utility.
+        tmp_path: A temporary directory.
+    """
+    # The store's directory can't be created:
+    (tmp_path / "file").write_text("", encoding="utf-8")
+    store = ControllerStore(tmp_path / "file" / "controllers.json")
+
+    async with authenticated_local_client, aiohttp.ClientSession() as session:
+        client = Client(session=session, options=ClientOptions(store=store))
+        await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False, lazy=True)
+        await client.close()
+
+    aresponses.assert_plan_strictly_followed()
+
+    # The lazily loaded controller's metadata was never fetched:
+    assert not store.records
+    assert "Unable to save the controller store" in caplog.text
@@ -0,0 +1,247 @@
+"""Define tests for incremental JSON parsing."""
+
+import asyncio
+import json
+from typing import Any
+
+import aiohttp
+import pytest
+from aresponses import ResponsesMockServer
+
+from regenmaschine import Client, ClientOptions
+from regenmaschine.errors import RequestError, TokenExpiredError
+from regenmaschine.streaming import ItemStream, JSONItemParser
+from tests.common import TEST_HOST, TEST_MAC, TEST_PASSWORD, TEST_PORT, load_fixture
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 65536])
+def test_json_item_parser(chunk_size: int) -> None:
+    """Test that items are parsed no matter how the document is split up.
+
+    Args:
+        chunk_size: The number of bytes to feed at a time.
+    """
+    document: dict[str, Any] = {
+        "statusCode": 0,
+        "other": {"days": [{"tricky": "]}"}]},
+        "waterLog": {
+            "note": "[{",
+            "days": [{"date": "2018-06-01", "s": 'a"]},[{'}, 3, "ü", [1, [2]], None],
+        },
+        "message": "OK, },",
+    }
+    body = json.dumps(document, ensure_ascii=False).encode()
+
+    parser = JSONItemParser(("waterLog", "days"))
+    items: list[Any] = []
+    for index in range(0, len(body), chunk_size):
+        items += parser.feed(body[index : index + chunk_size])
+    items += parser.close()
+
+    assert items == document["waterLog"]["days"]
+    assert parser.found
+    assert parser.scalars == {"statusCode": 0, "message": "OK, },"}
+
+
+def test_json_item_parser_buffer() -> None:
+    """Test that items are returned as soon as they're complete."""
+    parser = JSONItemParser(())
+    assert parser.feed(b'[{"a": 1}, {"b": ') == [{"a": 1}]
+    assert parser.feed(b"[2]}, 3]") == [{"b": [2]}, 3]
+    assert parser.close() == []
+
+    parser = JSONItemParser(("days",))
+    parser.feed(b'{"days": [1, 2')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+@pytest.mark.asyncio
+async def test_item_stream() -> None:
+    """Test that an item stream hands items to its sink (and can start over)."""
+    received: list[Any] = []
+
+    async def sink(item: Any) -> None:
+        """Receive an item.
+
+        Args:
+            item: An item.
+        """
+        received.append(item)
+
+    stream = ItemStream(("days",), sink)
+    stream.start(json.loads)
+    await stream.async_feed(b'{"days": [1')
+    stream.start(json.loads)
+    await stream.async_feed(b'{"days": [1, 2]}')
+    await stream.async_close()
+    assert received == [1, 2]
+    assert stream.items == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_watering_log(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test streaming the watering log.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    log = json.loads(load_fixture("watering_log_response.json"))
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/log/details",
+            "get",
+            response=aiohttp.web_response.json_response(log, status=200),
+            repeat=2,
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            days = [day async for day in controller.watering.log_stream(details=True)]
+            assert days == log["waterLog"]["days"]
+
+            # Stopping early closes the request:
+            async for day in controller.watering.log_stream(details=True):
+                assert day == log["waterLog"]["days"][0]
+                break
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_stream_close_early(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test closing a stream while its buffer is full.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    log = {
+        "waterLog": {"days": [{"date": f"2018-06-{day:02}"} for day in range(1, 11)]}
+    }
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/watering/log/details",
+            "get",
+            response=aiohttp.web_response.json_response(log, status=200),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            stream = controller.request_stream(
+                "get", "watering/log/details", ("waterLog", "days"), max_buffered=2
+            )
+            assert await anext(stream) == log["waterLog"]["days"][0]
+            # Let the request fill the buffer (and wait for room in it):
+            await asyncio.sleep(0.1)
+            await asyncio.wait_for(stream.aclose(), timeout=1)
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_stream_errors(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test that errors in streamed responses are raised.
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    stats = json.loads(load_fixture("dailystats_details_response.json"))
+
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/dailystats/details",
+            "get",
+            response=aiohttp.web_response.json_response(
+                {"statusCode": 2, "message": "Expired"}, status=200
+            ),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/dailystats/details",
+            "get",
+            response=aiohttp.web_response.json_response(stats, status=200),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(session=session)
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            with pytest.raises(TokenExpiredError):
+                async for _ in controller.stats.upcoming_stream(details=True):
+                    pass
+
+            days = [day async for day in controller.stats.upcoming_stream(True)]
+            assert days == stats["DailyStatsDetails"]
+
+    aresponses.assert_plan_strictly_followed()
+
+
+@pytest.mark.asyncio
+async def test_stream_missing_array_and_post(
+    aresponses: ResponsesMockServer, authenticated_local_client: ResponsesMockServer
+) -> None:
+    """Test a streamed response without the array (and a streamed POST).
+
+    Args:
+        aresponses: An aresponses server.
+        authenticated_local_client: A mock local controller.
+    """
+    async with authenticated_local_client:
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/dailystats/details",
+            "get",
+            response=aiohttp.web_response.json_response({"statusCode": 0}, status=200),
+        )
+        authenticated_local_client.add(
+            f"{TEST_HOST}:{TEST_PORT}",
+            "/api/4/parser/data",
+            "post",
+            response=aiohttp.web_response.json_response({"items": [1, 2]}, status=200),
+        )
+
+        async with aiohttp.ClientSession() as session:
+            client = Client(
+                session=session, options=ClientOptions(cache_responses=True)
+            )
+            await client.load_local(TEST_HOST, TEST_PASSWORD, TEST_PORT, False)
+            controller = client.controllers[TEST_MAC]
+
+            with pytest.raises(RequestError, match="No DailyStatsDetails array"):
+                async for _ in controller.stats.upcoming_stream(details=True):
+                    pass
+
+            # A streamed POST makes cached responses stale, like any other POST:
+            assert controller.cache is not None
+            controller.cache.set("parser", None, {"parsers": []})
+            items = [
+                item
+                async for item in controller.request_stream(
+                    "post", "parser/data", ("items",)
+                )
+            ]
+            assert items == [1, 2]
+            assert controller.cache.get("parser") is None
+
+    aresponses.assert_plan_strictly_followed()
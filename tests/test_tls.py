@@ -0,0 +1,68 @@
+"""Define tests for TLS helpers."""
+
+# pylint: disable=protected-access
+import ssl
+from unittest.mock import Mock, patch
+
+from regenmaschine import Client
+from regenmaschine.tls import (
+    HandshakeStats,
+    ResumingSSLObject,
+    get_ssl_context,
+)
+from tests.common import TEST_HOST
+
+
+def test_shared_ssl_context() -> None:
+    """Test that every client shares the same SSL context."""
+    assert Client()._ssl_context is Client()._ssl_context
+    assert get_ssl_context().verify_mode == ssl.CERT_NONE
+
+
+def test_handshake_stats() -> None:
+    """Test recording full and resumed handshakes."""
+    context = get_ssl_context()
+    context.forget_session(TEST_HOST)
+    context.handshake_stats.pop(TEST_HOST, None)
+    session = Mock(spec=ssl.SSLSession)
+
+    context.record_handshake(TEST_HOST, session, False, 0.5)
+    context.record_handshake(TEST_HOST, session, True, 0.1)
+
+    stats = Client().tls_stats[TEST_HOST]
+    assert stats.full_handshakes == 1
+    assert stats.resumed_handshakes == 1
+    assert stats.last_handshake_time == 0.1
+    assert stats.average_handshake_time == 0.3
+    assert HandshakeStats().average_handshake_time is None
+
+
+def test_session_offered_on_reconnect() -> None:
+    """Test that a cached session is offered when wrapping a new connection."""
+    context = get_ssl_context()
+    session = Mock(spec=ssl.SSLSession)
+    context.record_handshake(TEST_HOST, session, False, 0.5)
+
+    with patch.object(ssl.SSLContext, "wrap_bio") as mock_wrap_bio:
+        context.wrap_bio(ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname=TEST_HOST)
+        assert mock_wrap_bio.call_args.kwargs["session"] is session
+
+        context.forget_session(TEST_HOST)
+        context.wrap_bio(ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname=TEST_HOST)
+        assert mock_wrap_bio.call_args.kwargs["session"] is None
+
+
+def test_handshake_recorded_by_ssl_object() -> None:
+    """Test that a completed handshake is timed and recorded."""
+    context = get_ssl_context()
+    context.forget_session("other.host")
+    sslobj = context.wrap_bio(
+        ssl.MemoryBIO(), ssl.MemoryBIO(), server_hostname="other.host"
+    )
+    assert isinstance(sslobj, ResumingSSLObject)
+
+    with patch.object(ssl.SSLObject, "do_handshake"):
+        sslobj.do_handshake()
+
+    assert sslobj.handshake_duration is not None
+    assert context.handshake_stats["other.host"].full_handshakes >= 1